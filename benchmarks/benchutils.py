@@ -0,0 +1,112 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Helpers for the benchmark drivers in this directory.  These run under the
+# regular Python interpreter (not within gcc), invoking gcc with the plugin
+# from the top of the source tree, in the same way as run-test-suite.py
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+from distutils.sysconfig import get_python_inc
+from subprocess import Popen
+
+TOPDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLUGIN_NAME = os.environ.get('PLUGIN_NAME', 'python')
+
+CC = os.environ.get('CC', 'gcc')
+
+class Result:
+    """
+    The outcome of one invocation of gcc: its stdout, exit code, wallclock
+    time, and resource usage (from os.wait4, so that it covers just that
+    one process)
+    """
+    def __init__(self, out, err, returncode, wallclock, rusage):
+        self.out = out
+        self.err = err
+        self.returncode = returncode
+        self.wallclock = wallclock
+        self.rusage = rusage
+
+    @property
+    def cpu(self):
+        return self.rusage.ru_utime + self.rusage.ru_stime
+
+    @property
+    def maxrss_kb(self):
+        # (in kilobytes on Linux)
+        return self.rusage.ru_maxrss
+
+def find_inputs_below(path):
+    """
+    Get a sorted list of the test-case input files below the given directory
+    of the test suite
+    """
+    return sorted(glob.glob(os.path.join(TOPDIR, path, '**', 'input.c'),
+                            recursive=True))
+
+def invoke_gcc(sourcefiles, script, env=None, extra_args=None, link=False,
+               cwd=None):
+    """
+    Compile the given source files with the plugin, running the given
+    script, returning a Result (if script is None, the files are compiled
+    without the plugin)
+
+    If link is True, the files are also linked (e.g. so that the script
+    runs within the LTO stage), discarding the resulting executable
+    """
+    if link:
+        outdir = tempfile.mkdtemp()
+        args = [CC, '-o', os.path.join(outdir, 'a.out')]
+    else:
+        outdir = None
+        args = [CC, '-c', '-o', os.devnull]
+    if script:
+        args += ['-fplugin=%s' % os.path.join(TOPDIR, '%s.so' % PLUGIN_NAME),
+                 '-fplugin-arg-%s-script=%s' % (PLUGIN_NAME, script)]
+    args += ['-I' + get_python_inc()]
+    if extra_args:
+        args += extra_args
+    args += sourcefiles
+
+    fullenv = dict(os.environ)
+    fullenv['LC_ALL'] = 'C'
+    fullenv['PYTHONPATH'] = TOPDIR
+    fullenv['LD_LIBRARY_PATH'] = os.path.join(TOPDIR, 'gcc-c-api')
+    if env:
+        fullenv.update(env)
+
+    # Capture output into temporary files, rather than pipes, so that we
+    # can reap the process ourselves with os.wait4, giving the resource
+    # usage of just that one process:
+    with tempfile.TemporaryFile() as outfile, \
+            tempfile.TemporaryFile() as errfile:
+        start = time.time()
+        p = Popen(args, env=fullenv, stdout=outfile, stderr=errfile, cwd=cwd)
+        pid, status, rusage = os.wait4(p.pid, 0)
+        wallclock = time.time() - start
+        p.returncode = os.WEXITSTATUS(status)
+        if outdir:
+            shutil.rmtree(outdir)
+        outfile.seek(0)
+        errfile.seek(0)
+        return Result(outfile.read().decode(), errfile.read().decode(),
+                      p.returncode, wallclock, rusage)
@@ -0,0 +1,103 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+"""
+Timing of the refcount checker's test suite.
+
+Runs the script.py of every test below tests/cpychecker/refcounts on its
+input.c, reporting the total CPU time of the compiler.  If a git revision
+is given, the Python code of the checker (gccutils, libcpychecker and
+libcpychecker_html) at that revision is timed too, against the same plugin
+and tests, giving a before/after comparison of changes to the checker.
+
+Usage (from the top of the source tree, after building the plugin):
+    python benchmarks/refcount-suite.py [--repeat N] [REVISION]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchutils import TOPDIR, find_inputs_below, invoke_gcc
+
+PACKAGES = ('gccutils', 'libcpychecker', 'libcpychecker_html')
+
+def export_revision(revision, destdir):
+    """
+    Extract the Python code of the checker at the given git revision into
+    destdir
+    """
+    archive = subprocess.check_output(['git', 'archive', revision]
+                                      + list(PACKAGES),
+                                      cwd=TOPDIR)
+    p = subprocess.Popen(['tar', '-x', '-C', destdir], stdin=subprocess.PIPE)
+    p.communicate(archive)
+    if p.returncode:
+        raise ValueError('unable to extract %s' % revision)
+
+def time_suite(pythonpath, repeat):
+    """
+    Get the CPU time taken to run the suite with the checker from the given
+    directory (the best of the given number of runs), and the number of tests
+    """
+    best = None
+    inputs = find_inputs_below('tests/cpychecker/refcounts')
+    for i in range(repeat):
+        total = 0.0
+        workdir = tempfile.mkdtemp()
+        try:
+            for inputfile in inputs:
+                script = os.path.join(os.path.dirname(inputfile), 'script.py')
+                result = invoke_gcc([inputfile], script,
+                                    env={'PYTHONPATH': pythonpath},
+                                    cwd=workdir)
+                total += result.cpu
+        finally:
+            shutil.rmtree(workdir)
+        if best is None or total < best:
+            best = total
+    return best, len(inputs)
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('revision', nargs='?')
+    args = parser.parse_args(argv[1:])
+
+    results = []
+    if args.revision:
+        tmpdir = tempfile.mkdtemp()
+        try:
+            export_revision(args.revision, tmpdir)
+            results.append((args.revision, time_suite(tmpdir, args.repeat)))
+        finally:
+            shutil.rmtree(tmpdir)
+    results.append(('working tree', time_suite(TOPDIR, args.repeat)))
+
+    print('%-20s %8s %10s' % ('checker', 'tests', 'CPU (s)'))
+    for name, (cpu, numtests) in results:
+        print('%-20s %8i %10.2f' % (name, numtests, cpu))
+    if len(results) == 2:
+        before, after = results[0][1][0], results[1][1][0]
+        if before:
+            print('change: %+.1f%%' % (100.0 * (after - before) / before))
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,103 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark of the per-invocation startup cost of the plugin.
+
+Compiles the trivial source file of the tests/examples/hello-world test
+repeatedly: without the plugin, with the plugin running that test's script,
+and with the plugin running cpychecker (with its default options, as
+gcc-with-cpychecker does).  Reports the minimum and median wallclock time
+and the median CPU time of each, and the overhead of the plugin relative
+to plain gcc.  Then shows the slowest imports made by cpychecker's startup,
+as reported by PYTHONPROFILEIMPORTTIME.
+
+Usage (from the top of the source tree, after building the plugin):
+    python benchmarks/startup.py [NUM_RUNS]
+"""
+
+import os
+import sys
+
+from benchutils import TOPDIR, invoke_gcc
+
+TESTDIR = os.path.join(TOPDIR, 'tests', 'examples', 'hello-world')
+INPUT = os.path.join(TESTDIR, 'input.c')
+
+CONFIGS = [('gcc', None),
+           ('hello-world', os.path.join(TESTDIR, 'script.py')),
+           ('cpychecker', os.path.join(TOPDIR, 'cpychecker.py'))]
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    if len(values) % 2:
+        return values[mid]
+    return (values[mid - 1] + values[mid]) / 2.0
+
+def run(script, num_runs):
+    wallclocks = []
+    cpus = []
+    for i in range(num_runs):
+        result = invoke_gcc([INPUT], script)
+        if result.returncode != 0:
+            raise ValueError('gcc failed: %s' % result.err)
+        wallclocks.append(result.wallclock)
+        cpus.append(result.cpu)
+    return dict(min=min(wallclocks), median=median(wallclocks),
+                cpu=median(cpus))
+
+def get_slowest_imports(script, count):
+    """
+    Get a list of (cumulative microseconds, module name) pairs for the
+    slowest imports made when running the given script
+    """
+    result = invoke_gcc([INPUT], script,
+                        env={'PYTHONPROFILEIMPORTTIME': '1'})
+    imports = []
+    for line in result.err.splitlines():
+        # e.g. "import time:       330 |        330 | libcpychecker.utils"
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                imports.append((int(cumulative), name.rstrip()))
+    return sorted(imports, reverse=True)[:count]
+
+def main(argv):
+    num_runs = int(argv[1]) if len(argv) > 1 else 20
+
+    results = {}
+    for name, script in CONFIGS:
+        results[name] = run(script, num_runs)
+
+    print('%-12s %12s %12s %12s %14s'
+          % ('config', 'min (ms)', 'median (ms)', 'CPU (ms)',
+             'overhead (ms)'))
+    baseline = results['gcc']['median']
+    for name, script in CONFIGS:
+        r = results[name]
+        print('%-12s %12.1f %12.1f %12.1f %14.1f'
+              % (name, r['min'] * 1000, r['median'] * 1000, r['cpu'] * 1000,
+                 (r['median'] - baseline) * 1000))
+
+    print()
+    print('slowest imports within cpychecker (cumulative ms):')
+    for cumulative, name in get_slowest_imports(CONFIGS[-1][1], 15):
+        print('%10.1f %s' % (cumulative / 1000.0, name))
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,60 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+# Script run within gcc by state-copy.py: runs the refcount checker's
+# abstract interpretation on each function, tracing memory allocations
+
+import os
+import tracemalloc
+
+import gcc
+
+from libcpychecker.absinterp import iter_traces, Limits, TooComplicated
+from libcpychecker.deltamap import DeltaMap, _Layer
+from libcpychecker.refcounts import make_stmt_graph, CPython
+from libcpychecker.types import get_PyObject
+
+if os.environ.get('STATE_COPY_MODE') == 'flat':
+    # Emulate copying the whole mapping on every State.copy():
+    def flat_copy(self):
+        result = DeltaMap()
+        result._layer = _Layer(self._flatten(), None)
+        result._len = self._len
+        return result
+    DeltaMap.copy = flat_copy
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return' and fn and get_PyObject():
+        stmtgraph = make_stmt_graph(fn)
+        tracemalloc.start()
+        traces = []
+        try:
+            traces = iter_traces(stmtgraph, {'cpython': CPython},
+                                 limits=Limits(maxtrans=256))
+        except TooComplicated as err:
+            traces = err.complete_traces
+        except Exception:
+            # Not all of the corpus can be analyzed on every version of gcc
+            pass
+        # Measure while the traces (and hence their States) are still alive:
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('STATE-COPY %s %i %i %i'
+              % (fn.decl.name, len(traces), retained, peak))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
@@ -0,0 +1,75 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark of the cost of copying States within the refcount checker.
+
+Runs the refcount checker over every function in the
+tests/cpychecker/refcounts corpus, twice: once with the State store
+flattening every copy (equivalent to the old behavior of copying the whole
+of region_for_var and value_for_region on every transition), and once
+with the structural sharing of libcpychecker.deltamap.  Reports the total
+memory retained by the resulting traces and the peak traced memory (via
+tracemalloc within gcc), together with the CPU time and peak RSS of the compiler.
+
+Usage (from the top of the source tree, after building the plugin):
+    python benchmarks/state-copy.py
+"""
+
+import os
+import sys
+
+from benchutils import find_inputs_below, invoke_gcc
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      'state-copy-script.py')
+
+def run(mode):
+    totals = dict(retained=0, peak=0, cpu=0.0, maxrss=0, functions=0)
+    for inputfile in find_inputs_below('tests/cpychecker/refcounts'):
+        result = invoke_gcc([inputfile], SCRIPT,
+                            env={'STATE_COPY_MODE': mode})
+        totals['cpu'] += result.cpu
+        totals['maxrss'] = max(totals['maxrss'], result.maxrss_kb)
+        for line in result.out.splitlines():
+            if line.startswith('STATE-COPY '):
+                _, fnname, numtraces, retained, peak = line.split()
+                totals['functions'] += 1
+                totals['retained'] += int(retained)
+                totals['peak'] = max(totals['peak'], int(peak))
+    return totals
+
+def main():
+    results = {}
+    for mode in ('flat', 'shared'):
+        results[mode] = run(mode)
+    print('%-8s %10s %16s %14s %10s %14s'
+          % ('mode', 'functions', 'retained (KB)', 'peak (KB)',
+             'CPU (s)', 'max RSS (KB)'))
+    for mode in ('flat', 'shared'):
+        r = results[mode]
+        print('%-8s %10i %16i %14i %10.2f %14i'
+              % (mode, r['functions'], r['retained'] // 1024,
+                 r['peak'] // 1024, r['cpu'], r['maxrss']))
+    flat, shared = results['flat'], results['shared']
+    if flat['retained']:
+        print('retained memory reduced by %.1f%%'
+              % (100.0 * (flat['retained'] - shared['retained'])
+                 / flat['retained']))
+
+if __name__ == '__main__':
+    sys.exit(main())
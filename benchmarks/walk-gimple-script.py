@@ -0,0 +1,69 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+# Script run within gcc by walk-gimple.py: during the LTO stage, walk every
+# gimple statement of every function in the program, visiting all of the
+# tree nodes within them, then time a forced GCC garbage collection
+
+import os
+import time
+
+import gcc
+
+# If set, hold a reference to every wrapper object visited, emulating the
+# old wrapper caches, which kept every wrapper alive forever:
+RETAIN = os.environ.get('WALK_GIMPLE_MODE') == 'retain'
+
+class WalkGimple(gcc.IpaPass):
+    def execute(self):
+        if not gcc.is_lto():
+            return
+        retained = []
+        counts = dict(stmts=0, trees=0)
+
+        def visit_tree(node):
+            counts['trees'] += 1
+            if RETAIN:
+                retained.append(node)
+
+        start = time.process_time()
+        for node in gcc.get_callgraph_nodes():
+            fun = node.decl.function
+            if not fun or not fun.cfg:
+                continue
+            for bb in fun.cfg.basic_blocks:
+                for stmts in (bb.phi_nodes, bb.gimple):
+                    if not stmts:
+                        continue
+                    for stmt in stmts:
+                        counts['stmts'] += 1
+                        if RETAIN:
+                            retained.append(stmt)
+                        stmt.walk_tree(visit_tree)
+        walk_time = time.process_time() - start
+
+        # GCC's garbage collector has to mark the objects wrapped by every
+        # live wrapper:
+        start = time.process_time()
+        gcc._force_garbage_collection()
+        gc_time = time.process_time() - start
+
+        print('WALK-GIMPLE %i %i %f %f'
+              % (counts['stmts'], counts['trees'], walk_time, gc_time))
+
+ps = WalkGimple(name='walk-gimple')
+ps.register_before('whole-program')
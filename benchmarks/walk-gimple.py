@@ -0,0 +1,104 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark of wrapping every gimple statement in a large LTO build.
+
+Generates a synthetic program of many translation units, and builds it with
+-flto, walking every gimple statement (and every tree node within them) of
+the whole program from within the LTO stage.  This is run twice: once
+holding a reference to every wrapper object visited (as the old wrapper
+caches did), and once letting the wrappers go as soon as the script is done
+with them.  Reports the time taken by the walk, the time taken by a forced
+GCC garbage collection afterwards (which has to mark everything that a live
+wrapper refers to), and the CPU time and peak RSS of the compiler.
+
+Usage (from the top of the source tree, after building the plugin):
+    python benchmarks/walk-gimple.py [NUM_UNITS [NUM_FUNCTIONS]]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from benchutils import invoke_gcc
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      'walk-gimple-script.py')
+
+def generate_unit(path, unit, num_functions):
+    with open(path, 'w') as f:
+        for i in range(num_functions):
+            f.write('int unit%i_fn%i(int a, int b, int *p)\n' % (unit, i))
+            f.write('{\n')
+            f.write('    int i, total = %i;\n' % i)
+            f.write('    for (i = 0; i < a; i++) {\n')
+            f.write('        if (p[i] > b)\n')
+            f.write('            total += p[i] * %i;\n' % (i + 1))
+            f.write('        else\n')
+            f.write('            total -= b / (i + 1);\n')
+            f.write('    }\n')
+            if i:
+                f.write('    total += unit%i_fn%i(a - 1, b, p);\n'
+                        % (unit, i - 1))
+            f.write('    return total;\n')
+            f.write('}\n\n')
+
+def run(mode, sourcefiles):
+    result = invoke_gcc(sourcefiles, SCRIPT,
+                        env={'WALK_GIMPLE_MODE': mode},
+                        extra_args=['-fPIC', '-shared',
+                                    '-flto', '-flto-partition=none'],
+                        link=True)
+    for line in result.out.splitlines():
+        if line.startswith('WALK-GIMPLE '):
+            _, stmts, trees, walk_time, gc_time = line.split()
+            return dict(stmts=int(stmts), trees=int(trees),
+                        walk=float(walk_time), gc=float(gc_time),
+                        cpu=result.cpu, maxrss=result.maxrss_kb)
+    raise ValueError('no result from gcc: %s' % result.err)
+
+def main(argv):
+    num_units = int(argv[1]) if len(argv) > 1 else 50
+    num_functions = int(argv[2]) if len(argv) > 2 else 200
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        sourcefiles = []
+        for unit in range(num_units):
+            path = os.path.join(tmpdir, 'unit%i.c' % unit)
+            generate_unit(path, unit, num_functions)
+            sourcefiles.append(path)
+
+        results = {}
+        for mode in ('retain', 'release'):
+            results[mode] = run(mode, sourcefiles)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    print('%-8s %10s %10s %10s %10s %10s %14s'
+          % ('mode', 'stmts', 'trees', 'walk (s)', 'GC (s)',
+             'CPU (s)', 'max RSS (KB)'))
+    for mode in ('retain', 'release'):
+        r = results[mode]
+        print('%-8s %10i %10i %10.2f %10.3f %10.2f %14i'
+              % (mode, r['stmts'], r['trees'], r['walk'], r['gc'],
+                 r['cpu'], r['maxrss']))
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -200,6 +200,39 @@ class PyNumberMethods(NamedEntity):
         result += '};\n'
         return result
 
+# See http://docs.python.org/c-api/typeobj.html#sequence-structs
+class PySequenceMethods(NamedEntity):
+    def __init__(self, identifier):
+        NamedEntity.__init__(self, identifier)
+
+    def c_defn(self):
+        result = 'static PySequenceMethods %s = {\n' % self.identifier
+        result += self.c_ptr_field('sq_length')
+        result += self.c_ptr_field('sq_concat')
+        result += self.c_ptr_field('sq_repeat')
+        result += self.c_ptr_field('sq_item')
+        result += self.c_ptr_field('was_sq_slice')
+        result += self.c_ptr_field('sq_ass_item')
+        result += self.c_ptr_field('was_sq_ass_slice')
+        result += self.c_ptr_field('sq_contains')
+        result += self.c_ptr_field('sq_inplace_concat')
+        result += self.c_ptr_field('sq_inplace_repeat')
+        result += '};\n'
+        return result
+
+# See http://docs.python.org/c-api/typeobj.html#mapping-structs
+class PyMappingMethods(NamedEntity):
+    def __init__(self, identifier):
+        NamedEntity.__init__(self, identifier)
+
+    def c_defn(self):
+        result = 'static PyMappingMethods %s = {\n' % self.identifier
+        result += self.c_ptr_field('mp_length')
+        result += self.c_ptr_field('mp_subscript')
+        result += self.c_ptr_field('mp_ass_subscript')
+        result += '};\n'
+        return result
+
     def add_method(self, name, fn_name, args, docstring):
         self.methods.append(PyMethodDef(name, fn_name, args, docstring))
 
@@ -125,6 +125,9 @@ handle_python_attribute(tree *node, tree name, tree args,
 
         gstate = PyGILState_Ensure();
 
+        /* GCC may have changed its nodes since Python last ran: */
+        PyGcc_ClearStrMemos();
+
         /*
            The args to the function call will be the node, plus the args of the
            attribute:
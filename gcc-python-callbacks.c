@@ -134,6 +134,10 @@ PyGcc_FinishInvokingCallback(PyGILState_STATE gstate,
     enum plugin_event saved_event;
 
     assert(closure);
+
+    /* GCC may have changed its nodes since Python last ran: */
+    PyGcc_ClearStrMemos();
+
     /* We take ownership of wrapped_gcc_data.
        For some callbacks types it will always be NULL; for others, it's only
        NULL if an error has occurred: */
@@ -189,6 +193,13 @@ PyGcc_CallbackFor_tree(void *gcc_data, void *user_data)
 {
     PyGILState_STATE gstate;
     tree t = (tree)gcc_data;
+    struct callback_closure *closure = (struct callback_closure *)user_data;
+
+    /* Skip trees that don't match the callback's filters (if any), without
+       acquiring the GIL or creating a wrapper object: */
+    if (closure->filter && !PyGcc_CallbackFilter_Matches(closure->filter, t)) {
+        return;
+    }
 
     gstate = PyGILState_Ensure();
 
@@ -217,10 +228,18 @@ PyGcc_CallbackFor_PLUGIN_PASS_EXECUTION(void *gcc_data, void *user_data)
 {
     PyGILState_STATE gstate;
     struct opt_pass *pass = (struct opt_pass *)gcc_data;
+    struct callback_closure *closure = (struct callback_closure *)user_data;
 
     //printf("%s:%i:(%p, %p)\n", __FILE__, __LINE__, gcc_data, user_data);
     assert(pass);
 
+    /* Skip passes that don't match the callback's filter (if any), without
+       acquiring the GIL or creating any wrapper objects: */
+    if (closure->filter
+        && !PyGcc_CallbackFilter_MatchesPass(closure->filter, pass->name)) {
+        return;
+    }
+
     gstate = PyGILState_Ensure();
 
     PyGcc_FinishInvokingCallback(gstate, 
@@ -301,6 +320,8 @@ PyGcc_RegisterCallback(PyObject *self, PyObject *args, PyObject *kwargs)
     PyObject *callback = NULL;
     PyObject *extraargs = NULL;
     struct callback_closure *closure;
+    struct callback_filter *filter;
+    PyObject *callback_kwargs;
 
     if (!PyArg_ParseTuple(args, "iO|O:register_callback", &event, &callback, &extraargs)) {
         return NULL;
@@ -308,11 +329,48 @@ PyGcc_RegisterCallback(PyObject *self, PyObject *args, PyObject *kwargs)
 
     //printf("%s:%i:PyGcc_RegisterCallback\n", __FILE__, __LINE__);
 
-    closure = PyGcc_Closure_NewForPluginEvent(callback, extraargs, kwargs,
+    /* Extract any filter_* keyword arguments: */
+    if (PyGcc_CallbackFilter_FromKwargs(kwargs, &filter, &callback_kwargs)) {
+        return NULL;
+    }
+
+    if (filter && PyGcc_CallbackFilter_HasTreeFilters(filter)) {
+        /* Filters on trees are only meaningful for callbacks that are
+           passed a tree: */
+        switch ((enum plugin_event)event) {
+        case PLUGIN_PRE_GENERICIZE:
+        case PLUGIN_FINISH_TYPE:
+#ifdef GCC_PYTHON_PLUGIN_CONFIG_has_PLUGIN_FINISH_DECL
+        case PLUGIN_FINISH_DECL:
+#endif
+            break;
+
+        default:
+            PyGcc_CallbackFilter_Free(filter);
+            Py_XDECREF(callback_kwargs);
+            PyErr_SetString(PyExc_ValueError,
+                            "filters are only supported for events that pass a tree to the callback");
+            return NULL;
+        }
+    }
+
+    if (filter && filter->pass_names
+        && (enum plugin_event)event != PLUGIN_PASS_EXECUTION) {
+        PyGcc_CallbackFilter_Free(filter);
+        Py_XDECREF(callback_kwargs);
+        PyErr_SetString(PyExc_ValueError,
+                        "filter_passes is only supported for gcc.PLUGIN_PASS_EXECUTION");
+        return NULL;
+    }
+
+    closure = PyGcc_Closure_NewForPluginEvent(callback, extraargs, callback_kwargs,
                                                       (enum plugin_event)event);
+    Py_XDECREF(callback_kwargs);
     if (!closure) {
+        PyGcc_CallbackFilter_Free(filter);
         return PyErr_NoMemory();
     }
+    closure->filter = filter;
 
     switch ((enum plugin_event)event) {
     case PLUGIN_ATTRIBUTES:
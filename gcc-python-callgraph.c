@@ -56,24 +56,25 @@ PyGccCallgraphNode_str(struct PyGccCallgraphNode * self)
                                          Py_TYPE(self)->tp_name);
 }
 
-IMPL_APPENDER(add_cgraph_edge_to_list,
-              gcc_cgraph_edge,
-              PyGccCallgraphEdge_New)
+IMPL_VIEW_KIND(cgraph_edge_view_kind,
+               gcc_cgraph_edge,
+               PyGccCallgraphEdge_New,
+               gcc_cgraph_edge_mark_in_use)
 
 PyObject *
 PyGccCallgraphNode_get_callees(struct PyGccCallgraphNode * self)
 {
-    IMPL_LIST_MAKER(gcc_cgraph_node_for_each_callee,
+    IMPL_VIEW_MAKER(gcc_cgraph_node_for_each_callee,
                     self->node,
-                    add_cgraph_edge_to_list)
+                    cgraph_edge_view_kind)
 }
 
 PyObject *
 PyGccCallgraphNode_get_callers(struct PyGccCallgraphNode * self)
 {
-    IMPL_LIST_MAKER(gcc_cgraph_node_for_each_caller,
+    IMPL_VIEW_MAKER(gcc_cgraph_node_for_each_caller,
                     self->node,
-                    add_cgraph_edge_to_list)
+                    cgraph_edge_view_kind)
 }
 
 union gcc_cgraph_edge_as_ptr {
@@ -102,7 +103,7 @@ error:
     return NULL;
 }
 
-static PyObject *cgraph_edge_wrapper_cache = NULL;
+static PyGccWrapperCache cgraph_edge_wrapper_cache;
 PyObject *
 PyGccCallgraphEdge_New(gcc_cgraph_edge edge)
 {
@@ -153,7 +154,7 @@ PyGcc_WrtpMarkForPyGccCallgraphNode(PyGccCallgraphNode *wrapper)
 }
 
 
-static PyObject *cgraph_node_wrapper_cache = NULL;
+static PyGccWrapperCache cgraph_node_wrapper_cache;
 PyObject *
 PyGccCallgraphNode_New(gcc_cgraph_node node)
 {
@@ -164,9 +165,10 @@ PyGccCallgraphNode_New(gcc_cgraph_node node)
 					    real_make_cgraph_node_wrapper);
 }
 
-IMPL_APPENDER(add_cgraph_node_to_list,
-              gcc_cgraph_node,
-              PyGccCallgraphNode_New)
+IMPL_VIEW_KIND(cgraph_node_view_kind,
+               gcc_cgraph_node,
+               PyGccCallgraphNode_New,
+               gcc_cgraph_node_mark_in_use)
 
 PyObject *
 PyGcc_get_callgraph_nodes(PyObject *self, PyObject *args)
@@ -182,8 +184,8 @@ PyGcc_get_callgraph_nodes(PyObject *self, PyObject *args)
         fprintf(stderr, "---------------- END ----------------\n");
     }
 
-    IMPL_GLOBAL_LIST_MAKER(gcc_for_each_cgraph_node,
-                           add_cgraph_node_to_list)
+    IMPL_GLOBAL_VIEW_MAKER(gcc_for_each_cgraph_node,
+                           cgraph_node_view_kind)
 }
 
 /*
@@ -70,7 +70,7 @@ error:
     return NULL;
 }
 
-static PyObject *edge_wrapper_cache = NULL;
+static PyGccWrapperCache edge_wrapper_cache;
 
 PyObject *
 PyGccEdge_New(gcc_cfg_edge e)
@@ -89,9 +89,10 @@ PyGcc_WrtpMarkForPyGccEdge(PyGccEdge *wrapper)
     gcc_cfg_edge_mark_in_use(wrapper->e);
 }
 
-IMPL_APPENDER(add_edge_to_list,
-              gcc_cfg_edge,
-              PyGccEdge_New)
+IMPL_VIEW_KIND(edge_view_kind,
+               gcc_cfg_edge,
+               PyGccEdge_New,
+               gcc_cfg_edge_mark_in_use)
 
 PyObject *
 PyGccBasicBlock_repr(struct PyGccBasicBlock * self)
@@ -104,22 +105,23 @@ PyGccBasicBlock_repr(struct PyGccBasicBlock * self)
 PyObject *
 PyGccBasicBlock_get_preds(PyGccBasicBlock *self, void *closure)
 {
-    IMPL_LIST_MAKER(gcc_cfg_block_for_each_pred_edge,
+    IMPL_VIEW_MAKER(gcc_cfg_block_for_each_pred_edge,
                     self->bb,
-                    add_edge_to_list)
+                    edge_view_kind)
 }
 
 PyObject *
 PyGccBasicBlock_get_succs(PyGccBasicBlock *self, void *closure)
 {
-    IMPL_LIST_MAKER(gcc_cfg_block_for_each_succ_edge,
+    IMPL_VIEW_MAKER(gcc_cfg_block_for_each_succ_edge,
                     self->bb,
-                    add_edge_to_list)
+                    edge_view_kind)
 }
 
-IMPL_APPENDER(append_gimple_to_list,
-              gcc_gimple,
-              PyGccGimple_New)
+IMPL_VIEW_KIND(gimple_view_kind,
+               gcc_gimple,
+               PyGccGimple_New,
+               gcc_gimple_mark_in_use)
 
 PyObject *
 PyGccBasicBlock_get_gimple(PyGccBasicBlock *self, void *closure)
@@ -127,9 +129,9 @@ PyGccBasicBlock_get_gimple(PyGccBasicBlock *self, void *closure)
     assert(self);
     assert(self->bb.inner);
 
-    IMPL_LIST_MAKER(gcc_cfg_block_for_each_gimple,
+    IMPL_VIEW_MAKER(gcc_cfg_block_for_each_gimple,
                     self->bb,
-                    append_gimple_to_list)
+                    gimple_view_kind)
 }
 
 static PyObject*
@@ -138,9 +140,16 @@ PyGccGimple_New_phi(gcc_gimple_phi phi)
     return PyGccGimple_New(gcc_gimple_phi_as_gcc_gimple(phi));
 }
 
-IMPL_APPENDER(append_gimple_phi_to_list,
-              gcc_gimple_phi,
-              PyGccGimple_New_phi)
+static void
+mark_phi(gcc_gimple_phi phi)
+{
+    gcc_gimple_mark_in_use(gcc_gimple_phi_as_gcc_gimple(phi));
+}
+
+IMPL_VIEW_KIND(gimple_phi_view_kind,
+               gcc_gimple_phi,
+               PyGccGimple_New_phi,
+               mark_phi)
 
 PyObject *
 PyGccBasicBlock_get_phi_nodes(PyGccBasicBlock *self, void *closure)
@@ -148,9 +157,9 @@ PyGccBasicBlock_get_phi_nodes(PyGccBasicBlock *self, void *closure)
     assert(self);
     assert(self->bb.inner);
 
-    IMPL_LIST_MAKER(gcc_cfg_block_for_each_gimple_phi,
+    IMPL_VIEW_MAKER(gcc_cfg_block_for_each_gimple_phi,
                     self->bb,
-                    append_gimple_phi_to_list)
+                    gimple_phi_view_kind)
 }
 
 IMPL_APPENDER(append_rtl_to_list,
@@ -170,102 +179,81 @@ PyGccBasicBlock_get_rtl(PyGccBasicBlock *self, void *closure)
 
 
 /*
-  Force a 1-1 mapping between pointer values and wrapper objects
+  Force a 1-1 mapping between pointer values and live wrapper objects
+
+  The cache only holds borrowed references: a wrapper is removed from it when
+  it is deallocated, so that we don't keep alive every wrapper that we've
+  ever created (and, in turn, every GCC object that they wrap).
  */
 PyObject *
-PyGcc_LazilyCreateWrapper(PyObject **cache,
+PyGcc_LazilyCreateWrapper(PyGccWrapperCache *cache,
 				 void *ptr,
 				 PyObject *(*ctor)(void *ptr))
 {
-    PyObject *key = NULL;
-    PyObject *oldobj = NULL;
+    PyGccWrapper *oldobj = NULL;
     PyObject *newobj = NULL;
 
-    /* printf("PyGcc_LazilyCreateWrapper(&%p, %p, %p)\n", *cache, ptr, ctor); */
+    /* printf("PyGcc_LazilyCreateWrapper(&%p, %p, %p)\n", cache, ptr, ctor); */
 
     assert(cache);
     /* ptr is allowed to be NULL */
     assert(ctor);
 
-    /* The cache is lazily created: */
-    if (!*cache) {
-	*cache = PyDict_New();
-	if (!*cache) {
-	    return NULL;
-	}
-    }
-
-    key = PyLong_FromVoidPtr(ptr);
-    if (!key) {
-	return NULL;
-    }
-
-    oldobj = PyDict_GetItem(*cache, key);
+    oldobj = PyGccWrapperCache_Lookup(cache, ptr);
     if (oldobj) {
-	/* The cache already contains an object wrapping "ptr": reuse t */
+	/* The cache already contains an object wrapping "ptr": reuse it */
 	/* printf("reusing %p for %p\n", oldobj, ptr); */
 	Py_INCREF(oldobj); /* it was a borrowed ref */
-	Py_DECREF(key);
-	return oldobj;
+	return (PyObject*)oldobj;
     }
 
-    /* 
-       Not in the cache: we don't yet have a wrapper object for this pointer
+    /*
+       Not in the cache: we don't yet have a live wrapper object for this
+       pointer
     */
-       
-    assert(NULL != key); /* we own a ref */
-    assert(NULL == oldobj);
-    assert(NULL == newobj);
 
     /* Construct a wrapper : */
 
     newobj = (*ctor)(ptr);
     if (!newobj) {
-	Py_DECREF(key);
 	return NULL;
     }
 
     /* printf("created %p for %p\n", newobj, ptr); */
 
-    if (PyDict_SetItem(*cache, key, newobj)) {
+    /* The ctor can return None e.g. for a NULL ptr; only cache wrappers: */
+    if (!PyObject_TypeCheck((PyObject*)Py_TYPE(newobj),
+                            &PyGccWrapperMeta_TypeObj)) {
+	return newobj;
+    }
+
+    if (PyGccWrapperCache_Insert(cache, ptr, (PyGccWrapper*)newobj)) {
 	Py_DECREF(newobj);
-	Py_DECREF(key);
 	return NULL;
     }
 
-    Py_DECREF(key);
     return newobj;
 }
 
+/*
+  Add an existing wrapper object to the cache, keeping it alive for the
+  rest of the process (e.g. for passes defined in Python, which GCC can
+  call back into at any time)
+*/
 int
-PyGcc_insert_new_wrapper_into_cache(PyObject **cache,
+PyGcc_insert_new_wrapper_into_cache(PyGccWrapperCache *cache,
                                          void *ptr,
                                          PyObject *obj)
 {
-    PyObject *key;
     assert(cache);
     assert(ptr);
     assert(obj);
 
-    /* The cache is lazily created: */
-    if (!*cache) {
-	*cache = PyDict_New();
-	if (!*cache) {
-	    return -1;
-	}
-    }
-
-    key = PyLong_FromVoidPtr(ptr);
-    if (!key) {
+    if (PyGccWrapperCache_Insert(cache, ptr, (PyGccWrapper*)obj)) {
 	return -1;
     }
 
-    if (PyDict_SetItem(*cache, key, obj)) {
-	Py_DECREF(key);
-	return -1;
-    }
-
-    Py_DECREF(key);
+    Py_INCREF(obj);
     return 0;
 }
 
@@ -368,7 +356,7 @@ PyGcc_WrtpMarkForPyGccBasicBlock(PyGccBasicBlock *wrapper)
 }
 
 
-static PyObject *basic_block_wrapper_cache = NULL;
+static PyGccWrapperCache basic_block_wrapper_cache;
 PyObject *
 PyGccBasicBlock_New(gcc_cfg_block bb)
 {
@@ -377,37 +365,21 @@ PyGccBasicBlock_New(gcc_cfg_block bb)
 					    real_make_basic_block_wrapper);
 }
 
-static bool
-add_block_to_list(gcc_cfg_block bb, void *user_data)
-{
-    PyObject *result = (PyObject*)user_data;
-    PyObject *obj_var;
-    obj_var = PyGccBasicBlock_New(bb);
-    if (!obj_var) {
-        return true;
-    }
-
-    /* It appears that with optimization there can be occasional NULLs,
-       which get turned into None.  Skip them:
-    */
-    if (obj_var != Py_None) {
-        if (-1 == PyList_Append(result, obj_var)) {
-            Py_DECREF(obj_var);
-            return true;
-        }
-
-        /* Success: */
-    }
-    Py_DECREF(obj_var);
-    return false;
-}
+/*
+  It appears that with optimization there can be occasional NULL blocks;
+  PyGccSequenceView_Append skips them:
+*/
+IMPL_VIEW_KIND(block_view_kind,
+               gcc_cfg_block,
+               PyGccBasicBlock_New,
+               gcc_cfg_block_mark_in_use)
 
 PyObject *
 PyGccCfg_get_basic_blocks(PyGccCfg *self, void *closure)
 {
-    IMPL_LIST_MAKER(gcc_cfg_for_each_block,
+    IMPL_VIEW_MAKER(gcc_cfg_for_each_block,
                     self->cfg,
-                    add_block_to_list)
+                    block_view_kind)
 }
 
 extern PyTypeObject PyGccLabelDecl_TypeObj;
@@ -481,7 +453,7 @@ error:
     return NULL;
 }
 
-static PyObject *cfg_wrapper_cache = NULL;
+static PyGccWrapperCache cfg_wrapper_cache;
 PyObject *
 PyGccCfg_New(gcc_cfg cfg)
 {
@@ -18,6 +18,9 @@
 */
 
 #include <Python.h>
+#include <regex.h>
+#include <stdlib.h>
+#include <string.h>
 #include <gcc-plugin.h>
 
 #include "gcc-python-closure.h"
@@ -63,6 +66,7 @@ PyGcc_closure_new_generic(PyObject *callback, PyObject *extraargs, PyObject *kwa
     }
 
     closure->event = (enum plugin_event)GCC_PYTHON_PLUGIN_BAD_EVENT;
+    closure->filter = NULL;
 
     return closure;
 }
@@ -144,10 +148,422 @@ PyGcc_closure_free(struct callback_closure *closure)
     Py_XDECREF(closure->callback);
     Py_XDECREF(closure->extraargs);
     Py_XDECREF(closure->kwargs);
+    if (closure->filter) {
+        PyGcc_CallbackFilter_Free(closure->filter);
+    }
 
     PyMem_Free(closure);
 }
 
+/*
+  Callback filters
+*/
+static char *
+copy_string(const char *str)
+{
+    size_t len = strlen(str);
+    char *result = (char*)PyMem_Malloc(len + 1);
+    if (!result) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+    memcpy(result, str, len + 1);
+    return result;
+}
+
+/*
+  Convert a str, or an iterable of str, into an array of copies of the
+  strings, returning 0 on success, or -1 with an exception set
+*/
+static int
+get_filter_strings(PyObject *value, const char *argname,
+                   char ***out_strs, int *out_count)
+{
+    PyObject *seq = NULL;
+    const char *str;
+    Py_ssize_t i, count;
+
+    if (PyArg_Parse(value, "s", &str)) {
+        *out_strs = PyMem_New(char *, 1);
+        if (!*out_strs) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        (*out_strs)[0] = copy_string(str);
+        if (!(*out_strs)[0]) {
+            return -1;
+        }
+        *out_count = 1;
+        return 0;
+    }
+    PyErr_Clear();
+
+    seq = PySequence_Fast(value, "");
+    if (!seq) {
+        PyErr_Format(PyExc_TypeError,
+                     "%s must be a str or an iterable of str", argname);
+        return -1;
+    }
+    count = PySequence_Fast_GET_SIZE(seq);
+    *out_strs = PyMem_New(char *, count ? count : 1);
+    if (!*out_strs) {
+        PyErr_NoMemory();
+        goto error;
+    }
+    *out_count = 0;
+    for (i = 0; i < count; i++) {
+        if (!PyArg_Parse(PySequence_Fast_GET_ITEM(seq, i), "s", &str)) {
+            PyErr_Format(PyExc_TypeError,
+                         "%s must be a str or an iterable of str", argname);
+            goto error;
+        }
+        (*out_strs)[i] = copy_string(str);
+        if (!(*out_strs)[i]) {
+            goto error;
+        }
+        *out_count = i + 1;
+    }
+    Py_DECREF(seq);
+    return 0;
+
+ error:
+    Py_XDECREF(seq);
+    return -1;
+}
+
+static int
+compare_strings(const void *a, const void *b)
+{
+    return strcmp(*(char * const *)a, *(char * const *)b);
+}
+
+/*
+  Build a table of the tree codes whose Python wrapper type is a subclass of
+  the given type (or of any of the given tuple of types).  Codes without a
+  wrapper type never match.
+*/
+static char *
+get_filter_codes(PyObject *value)
+{
+    char *codes;
+    int code;
+
+    codes = (char*)PyMem_Malloc(MAX_TREE_CODES);
+    if (!codes) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+    memset(codes, 0, MAX_TREE_CODES);
+    for (code = 0; code < PyGcc_autogenerated_num_tree_codes; code++) {
+        PyObject *cls = (PyObject*)PyGcc_autogenerated_tree_type_for_tree_code((enum tree_code)code, 1);
+        int is_subclass = PyObject_IsSubclass(cls, value);
+        if (is_subclass == -1) {
+            PyMem_Free(codes);
+            return NULL;
+        }
+        codes[code] = (char)is_subclass;
+    }
+    return codes;
+}
+
+/*
+  Extract any of the filter_* keyword arguments to gcc.register_callback:
+
+    filter_types: a gcc.Tree subclass, or a tuple of them
+    filter_prefixes, filter_suffixes, filter_names: a str, or an iterable
+      of str
+    filter_regex: a str, holding a POSIX extended regular expression
+    filter_passes: a str, or an iterable of str (for PLUGIN_PASS_EXECUTION)
+
+  On success, returns 0, writing a new callback_filter (or NULL if there
+  were no filters) to *out_filter, and a new reference to the remaining
+  keyword arguments (or NULL if there were none) to *out_kwargs.
+  On failure, returns -1 with an exception set.
+*/
+int
+PyGcc_CallbackFilter_FromKwargs(PyObject *kwargs,
+                                struct callback_filter **out_filter,
+                                PyObject **out_kwargs)
+{
+    struct callback_filter *filter = NULL;
+    PyObject *remaining = NULL;
+    PyObject *value;
+    const char *pattern;
+    int err;
+
+    *out_filter = NULL;
+    *out_kwargs = NULL;
+
+    if (!kwargs) {
+        return 0;
+    }
+
+    if (!PyDict_GetItemString(kwargs, "filter_types")
+        && !PyDict_GetItemString(kwargs, "filter_prefixes")
+        && !PyDict_GetItemString(kwargs, "filter_suffixes")
+        && !PyDict_GetItemString(kwargs, "filter_names")
+        && !PyDict_GetItemString(kwargs, "filter_regex")
+        && !PyDict_GetItemString(kwargs, "filter_passes")) {
+        /* No filters; use the keyword arguments as they are: */
+        Py_INCREF(kwargs);
+        *out_kwargs = kwargs;
+        return 0;
+    }
+
+    filter = PyMem_New(struct callback_filter, 1);
+    if (!filter) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    memset(filter, 0, sizeof(*filter));
+
+    /* Don't pass the filters on to the callback: */
+    remaining = PyDict_Copy(kwargs);
+    if (!remaining) {
+        goto error;
+    }
+
+    value = PyDict_GetItemString(kwargs, "filter_types");
+    if (value) {
+        filter->codes = get_filter_codes(value);
+        if (!filter->codes) {
+            goto error;
+        }
+        if (PyDict_DelItemString(remaining, "filter_types")) {
+            goto error;
+        }
+    }
+
+    value = PyDict_GetItemString(kwargs, "filter_prefixes");
+    if (value) {
+        if (get_filter_strings(value, "filter_prefixes",
+                               &filter->prefixes, &filter->num_prefixes)) {
+            goto error;
+        }
+        if (PyDict_DelItemString(remaining, "filter_prefixes")) {
+            goto error;
+        }
+    }
+
+    value = PyDict_GetItemString(kwargs, "filter_suffixes");
+    if (value) {
+        if (get_filter_strings(value, "filter_suffixes",
+                               &filter->suffixes, &filter->num_suffixes)) {
+            goto error;
+        }
+        if (PyDict_DelItemString(remaining, "filter_suffixes")) {
+            goto error;
+        }
+    }
+
+    value = PyDict_GetItemString(kwargs, "filter_names");
+    if (value) {
+        if (get_filter_strings(value, "filter_names",
+                               &filter->names, &filter->num_names)) {
+            goto error;
+        }
+        qsort(filter->names, filter->num_names, sizeof(char *),
+              compare_strings);
+        if (PyDict_DelItemString(remaining, "filter_names")) {
+            goto error;
+        }
+    }
+
+    value = PyDict_GetItemString(kwargs, "filter_regex");
+    if (value) {
+        if (!PyArg_Parse(value, "s:register_callback", &pattern)) {
+            goto error;
+        }
+        filter->regex = PyMem_Malloc(sizeof(regex_t));
+        if (!filter->regex) {
+            PyErr_NoMemory();
+            goto error;
+        }
+        err = regcomp((regex_t*)filter->regex, pattern,
+                      REG_EXTENDED | REG_NOSUB);
+        if (err) {
+            char buf[256];
+            regerror(err, (regex_t*)filter->regex, buf, sizeof(buf));
+            PyMem_Free(filter->regex);
+            filter->regex = NULL;
+            PyErr_Format(PyExc_ValueError,
+                         "invalid filter_regex %s: %s", pattern, buf);
+            goto error;
+        }
+        if (PyDict_DelItemString(remaining, "filter_regex")) {
+            goto error;
+        }
+    }
+
+    value = PyDict_GetItemString(kwargs, "filter_passes");
+    if (value) {
+        if (get_filter_strings(value, "filter_passes",
+                               &filter->pass_names, &filter->num_pass_names)) {
+            goto error;
+        }
+        qsort(filter->pass_names, filter->num_pass_names, sizeof(char *),
+              compare_strings);
+        if (PyDict_DelItemString(remaining, "filter_passes")) {
+            goto error;
+        }
+    }
+
+    *out_filter = filter;
+    if (PyDict_Size(remaining)) {
+        *out_kwargs = remaining;
+    } else {
+        Py_DECREF(remaining);
+    }
+    return 0;
+
+ error:
+    Py_XDECREF(remaining);
+    PyGcc_CallbackFilter_Free(filter);
+    return -1;
+}
+
+/*
+  Get the name of a declaration or type, or NULL if it doesn't have one
+*/
+static const char *
+get_name_of_tree(tree t, size_t *out_len)
+{
+    tree id = NULL_TREE;
+
+    if (DECL_P(t)) {
+        id = DECL_NAME(t);
+    } else if (TYPE_P(t)) {
+        id = TYPE_NAME(t);
+        if (id && DECL_P(id)) {
+            id = DECL_NAME(id);
+        }
+    }
+    if (!id || TREE_CODE(id) != IDENTIFIER_NODE) {
+        return NULL;
+    }
+    *out_len = IDENTIFIER_LENGTH(id);
+    return IDENTIFIER_POINTER(id);
+}
+
+/*
+  Does the filter have any filters on trees (as opposed to passes)?
+*/
+int
+PyGcc_CallbackFilter_HasTreeFilters(struct callback_filter *filter)
+{
+    assert(filter);
+    return (filter->codes
+            || filter->num_prefixes || filter->num_suffixes
+            || filter->num_names || filter->regex);
+}
+
+/*
+  Does the tree pass the filter?  This doesn't need the GIL.
+*/
+int
+PyGcc_CallbackFilter_Matches(struct callback_filter *filter, tree t)
+{
+    const char *name;
+    size_t len;
+    int i;
+
+    assert(filter);
+
+    if (filter->codes && !filter->codes[TREE_CODE(t)]) {
+        return 0;
+    }
+
+    if (!(filter->num_prefixes || filter->num_suffixes
+          || filter->num_names || filter->regex)) {
+        /* No filters on the name: */
+        return 1;
+    }
+
+    name = get_name_of_tree(t, &len);
+    if (!name) {
+        return 0;
+    }
+
+    for (i = 0; i < filter->num_prefixes; i++) {
+        if (0 == strncmp(name, filter->prefixes[i],
+                         strlen(filter->prefixes[i]))) {
+            return 1;
+        }
+    }
+
+    for (i = 0; i < filter->num_suffixes; i++) {
+        size_t suffix_len = strlen(filter->suffixes[i]);
+        if (suffix_len <= len
+            && 0 == strcmp(name + len - suffix_len, filter->suffixes[i])) {
+            return 1;
+        }
+    }
+
+    if (filter->num_names
+        && bsearch(&name, filter->names, filter->num_names, sizeof(char *),
+                   compare_strings)) {
+        return 1;
+    }
+
+    if (filter->regex
+        && 0 == regexec((regex_t*)filter->regex, name, 0, NULL, 0)) {
+        return 1;
+    }
+
+    return 0;
+}
+
+/*
+  Does the pass with the given name pass the filter?  This doesn't need
+  the GIL.
+*/
+int
+PyGcc_CallbackFilter_MatchesPass(struct callback_filter *filter,
+                                 const char *pass_name)
+{
+    assert(filter);
+
+    if (!filter->pass_names) {
+        return 1;
+    }
+    if (!pass_name) {
+        return 0;
+    }
+    return NULL != bsearch(&pass_name, filter->pass_names,
+                           filter->num_pass_names, sizeof(char *),
+                           compare_strings);
+}
+
+static void
+free_strings(char **strs, int count)
+{
+    int i;
+    if (strs) {
+        for (i = 0; i < count; i++) {
+            PyMem_Free(strs[i]);
+        }
+        PyMem_Free(strs);
+    }
+}
+
+void
+PyGcc_CallbackFilter_Free(struct callback_filter *filter)
+{
+    if (!filter) {
+        return;
+    }
+    PyMem_Free(filter->codes);
+    free_strings(filter->prefixes, filter->num_prefixes);
+    free_strings(filter->suffixes, filter->num_suffixes);
+    free_strings(filter->names, filter->num_names);
+    free_strings(filter->pass_names, filter->num_pass_names);
+    if (filter->regex) {
+        regfree((regex_t*)filter->regex);
+        PyMem_Free(filter->regex);
+    }
+    PyMem_Free(filter);
+}
+
 /*
   PEP-7  
 Local variables:
@@ -20,6 +20,33 @@
 #ifndef INCLUDED__GCC_PYTHON_CLOSURE_H
 #define INCLUDED__GCC_PYTHON_CLOSURE_H
 
+/*
+  Filters on the tree passed to a callback, or on the pass passed to a
+  PLUGIN_PASS_EXECUTION callback, evaluated in C so that trees and passes
+  that don't match never enter Python (see gcc.register_callback)
+*/
+struct callback_filter
+{
+    /* If non-NULL, an array of MAX_TREE_CODES flags; the tree's code must
+       be one of those flagged: */
+    char *codes;
+
+    /* If any of these are set, the tree must have a name that matches at
+       least one of them: */
+    char **prefixes;
+    int num_prefixes;
+    char **suffixes;
+    int num_suffixes;
+    char **names; /* sorted, for use with bsearch */
+    int num_names;
+    void *regex; /* a regex_t, or NULL */
+
+    /* If set, the name of the pass must be one of these (sorted, for use
+       with bsearch): */
+    char **pass_names;
+    int num_pass_names;
+};
+
 struct callback_closure
 {
     PyObject *callback;
@@ -27,6 +54,7 @@ struct callback_closure
     PyObject *kwargs;
     enum plugin_event event;
       /* or GCC_PYTHON_PLUGIN_BAD_EVENT if not an event */
+    struct callback_filter *filter; /* or NULL */
 };
 
 struct callback_closure *
@@ -47,6 +75,24 @@ PyGcc_Closure_MakeArgs(struct callback_closure * closure,
 void
 PyGcc_closure_free(struct callback_closure *closure);
 
+int
+PyGcc_CallbackFilter_FromKwargs(PyObject *kwargs,
+                                struct callback_filter **out_filter,
+                                PyObject **out_kwargs);
+
+int
+PyGcc_CallbackFilter_HasTreeFilters(struct callback_filter *filter);
+
+int
+PyGcc_CallbackFilter_Matches(struct callback_filter *filter, tree t);
+
+int
+PyGcc_CallbackFilter_MatchesPass(struct callback_filter *filter,
+                                 const char *pass_name);
+
+void
+PyGcc_CallbackFilter_Free(struct callback_filter *filter);
+
 /*
   PEP-7
 Local variables:
@@ -30,6 +30,9 @@
 
 #include "function.h"
 #include "gcc-c-api/gcc-function.h"
+#include "gcc-c-api/gcc-cfg.h"
+#include "gcc-c-api/gcc-gimple.h"
+#include "gcc-c-api/gcc-location.h"
 
 PyObject *
 PyGccFunction_repr(struct PyGccFunction * self)
@@ -179,6 +182,478 @@ PyGcc_WrtpMarkForPyGccFunction(PyGccFunction *wrapper)
     gcc_function_mark_in_use(wrapper->fun);
 }
 
+/*
+  gcc.Function.snapshot(): export the blocks, edges and statements of a
+  function in a single pass, as a gcc.FunctionSnapshot holding parallel
+  arrays, rather than a graph of wrapper objects
+*/
+
+/* A growable array of ints: */
+struct int_vec {
+    int *data;
+    int len;
+    int alloc;
+};
+
+static void
+int_vec_push(struct int_vec *v, int value)
+{
+    if (v->len == v->alloc) {
+        v->alloc = v->alloc ? v->alloc * 2 : 16;
+        v->data = XRESIZEVEC(int, v->data, v->alloc);
+    }
+    v->data[v->len++] = value;
+}
+
+static PyObject *
+int_vec_as_array(struct int_vec *v, PyObject *array_type)
+{
+    PyObject *bytes;
+    PyObject *result;
+
+    bytes = PyBytes_FromStringAndSize((const char *)v->data,
+                                      (Py_ssize_t)v->len * sizeof(int));
+    if (!bytes) {
+        return NULL;
+    }
+    result = PyObject_CallFunction(array_type, (char*)"sO", "i", bytes);
+    Py_DECREF(bytes);
+    return result;
+}
+
+/*
+  Get the index of the string within "list", appending it if it isn't
+  there yet ("dict" maps from the strings to their indices), or -1 with an
+  exception set:
+*/
+static int
+intern_string(PyObject *dict, PyObject *list, const char *str)
+{
+    PyObject *key;
+    PyObject *index_obj;
+    int index = -1;
+
+    key = PyGccString_FromString(str);
+    if (!key) {
+        return -1;
+    }
+    index_obj = PyDict_GetItem(dict, key);
+    if (index_obj) {
+        index = (int)PyGccInt_AsLong(index_obj);
+        goto out;
+    }
+    index = (int)PyList_GET_SIZE(list);
+    index_obj = PyGccInt_FromLong(index);
+    if (!index_obj) {
+        index = -1;
+        goto out;
+    }
+    if (-1 == PyDict_SetItem(dict, key, index_obj)
+        || -1 == PyList_Append(list, key)) {
+        index = -1;
+    }
+    Py_DECREF(index_obj);
+
+ out:
+    Py_DECREF(key);
+    return index;
+}
+
+struct snapshot_builder {
+    struct PyGccFunctionSnapshot *snapshot;
+
+    int max_blocks;
+    int max_stmts;
+
+    struct int_vec block_index;
+    struct int_vec succ_offsets;
+    struct int_vec succ_block_index; /* (fixed up into succ_dest later) */
+    struct int_vec succ_flags;
+    struct int_vec stmt_offsets;
+    struct int_vec stmt_kind;
+    struct int_vec callee;
+    struct int_vec file;
+    struct int_vec line;
+    struct int_vec column;
+
+    /* The distinct gcc.Gimple subclasses seen so far: */
+    PyObject *kind_list;
+
+    PyObject *callee_dict;
+    PyObject *callee_list;
+    PyObject *file_dict;
+    PyObject *file_list;
+};
+
+static bool
+add_stmt_to_snapshot(gcc_gimple stmt, void *user_data)
+{
+    struct snapshot_builder *b = (struct snapshot_builder *)user_data;
+    struct PyGccFunctionSnapshot *snapshot = b->snapshot;
+    PyObject *tp;
+    gcc_location loc;
+    Py_ssize_t kind;
+    int callee = -1;
+
+    if (snapshot->num_stmts == b->max_stmts) {
+        b->max_stmts = b->max_stmts ? b->max_stmts * 2 : 64;
+        snapshot->stmts = XRESIZEVEC(gcc_gimple, snapshot->stmts, b->max_stmts);
+    }
+    snapshot->stmts[snapshot->num_stmts++] = stmt;
+
+    /* The gcc.Gimple subclass that a wrapper for the statement would have: */
+    tp = (PyObject*)PyGcc_autogenerated_gimple_type_for_stmt(stmt);
+    for (kind = 0; kind < PyList_GET_SIZE(b->kind_list); kind++) {
+        if (PyList_GET_ITEM(b->kind_list, kind) == tp) {
+            break;
+        }
+    }
+    if (kind == PyList_GET_SIZE(b->kind_list)) {
+        if (-1 == PyList_Append(b->kind_list, tp)) {
+            return true;
+        }
+    }
+    int_vec_push(&b->stmt_kind, (int)kind);
+
+    if (GIMPLE_CALL == gimple_code(stmt.inner)) {
+        tree fndecl = gcc_gimple_call_get_fndecl(gcc_gimple_as_gcc_gimple_call(stmt)).inner;
+        if (fndecl && DECL_NAME(fndecl)) {
+            callee = intern_string(b->callee_dict, b->callee_list,
+                                   IDENTIFIER_POINTER(DECL_NAME(fndecl)));
+            if (-1 == callee) {
+                return true;
+            }
+        }
+    }
+    int_vec_push(&b->callee, callee);
+
+    loc = gcc_gimple_get_location(stmt);
+    if (gcc_location_is_unknown(loc)) {
+        int_vec_push(&b->file, -1);
+        int_vec_push(&b->line, 0);
+        int_vec_push(&b->column, 0);
+    } else {
+        int file = intern_string(b->file_dict, b->file_list,
+                                 gcc_location_get_filename(loc));
+        if (-1 == file) {
+            return true;
+        }
+        int_vec_push(&b->file, file);
+        int_vec_push(&b->line, gcc_location_get_line(loc));
+        int_vec_push(&b->column, gcc_location_get_column(loc));
+    }
+
+    return false;
+}
+
+static bool
+add_phi_to_snapshot(gcc_gimple_phi phi, void *user_data)
+{
+    return add_stmt_to_snapshot(gcc_gimple_phi_as_gcc_gimple(phi), user_data);
+}
+
+static bool
+add_edge_to_snapshot(gcc_cfg_edge edge, void *user_data)
+{
+    struct snapshot_builder *b = (struct snapshot_builder *)user_data;
+
+    int_vec_push(&b->succ_block_index,
+                 gcc_cfg_block_get_index(gcc_cfg_edge_get_dest(edge)));
+    int_vec_push(&b->succ_flags,
+                 (gcc_cfg_edge_is_true_value(edge) ? PYGCC_EDGE_TRUE_VALUE : 0)
+                 | (gcc_cfg_edge_is_false_value(edge) ? PYGCC_EDGE_FALSE_VALUE : 0)
+                 | (gcc_cfg_edge_is_loop_exit(edge) ? PYGCC_EDGE_LOOP_EXIT : 0)
+                 | (gcc_cfg_edge_get_can_fallthru(edge) ? PYGCC_EDGE_CAN_FALLTHRU : 0)
+                 | (gcc_cfg_edge_is_complex(edge) ? PYGCC_EDGE_COMPLEX : 0)
+                 | (gcc_cfg_edge_is_eh(edge) ? PYGCC_EDGE_EH : 0));
+    return false;
+}
+
+static bool
+add_block_to_snapshot(gcc_cfg_block block, void *user_data)
+{
+    struct snapshot_builder *b = (struct snapshot_builder *)user_data;
+    struct PyGccFunctionSnapshot *snapshot = b->snapshot;
+
+    /* Skip the occasional NULL, as per gcc.Cfg.basic_blocks: */
+    if (!block.inner) {
+        return false;
+    }
+
+    if (snapshot->num_blocks == b->max_blocks) {
+        b->max_blocks = b->max_blocks ? b->max_blocks * 2 : 16;
+        snapshot->blocks = XRESIZEVEC(gcc_cfg_block, snapshot->blocks,
+                                      b->max_blocks);
+    }
+    snapshot->blocks[snapshot->num_blocks++] = block;
+    int_vec_push(&b->block_index, gcc_cfg_block_get_index(block));
+
+    int_vec_push(&b->succ_offsets, b->succ_block_index.len);
+    if (gcc_cfg_block_for_each_succ_edge(block, add_edge_to_snapshot, b)) {
+        return true;
+    }
+
+    /* The phi nodes of each block come before its other statements, as if
+       iterating over bb.phi_nodes then bb.gimple: */
+    int_vec_push(&b->stmt_offsets, snapshot->num_stmts);
+    if (gcc_cfg_block_for_each_gimple_phi(block, add_phi_to_snapshot, b)) {
+        return true;
+    }
+    if (gcc_cfg_block_for_each_gimple(block, add_stmt_to_snapshot, b)) {
+        return true;
+    }
+
+    return false;
+}
+
+PyObject *
+PyGccFunction_snapshot(struct PyGccFunction *self, PyObject *args)
+{
+    gcc_cfg cfg;
+    struct snapshot_builder b;
+    struct PyGccFunctionSnapshot *snapshot = NULL;
+    PyObject *array_mod = NULL;
+    PyObject *array_type = NULL;
+    struct int_vec succ_dest;
+    int *position_for_index = NULL;
+    int max_index = 0;
+    int i;
+
+    cfg = gcc_function_get_cfg(self->fun);
+    if (!cfg.inner) {
+        /* (as per gcc.Function.cfg) */
+        Py_RETURN_NONE;
+    }
+
+    memset(&b, 0, sizeof(b));
+    memset(&succ_dest, 0, sizeof(succ_dest));
+
+    array_mod = PyImport_ImportModule("array");
+    if (!array_mod) {
+        goto error;
+    }
+    array_type = PyObject_GetAttrString(array_mod, "array");
+    if (!array_type) {
+        goto error;
+    }
+
+    snapshot = PyGccWrapper_New(struct PyGccFunctionSnapshot,
+                                &PyGccFunctionSnapshot_TypeObj);
+    if (!snapshot) {
+        goto error;
+    }
+    /* Ensure that the marking and the dealloc are safe if we bail out
+       below: */
+    memset((char*)snapshot + sizeof(struct PyGccWrapper), 0,
+           sizeof(struct PyGccFunctionSnapshot) - sizeof(struct PyGccWrapper));
+    b.snapshot = snapshot;
+
+    Py_INCREF(self);
+    snapshot->function = (PyObject*)self;
+
+    b.kind_list = PyList_New(0);
+    b.callee_dict = PyDict_New();
+    b.callee_list = PyList_New(0);
+    b.file_dict = PyDict_New();
+    b.file_list = PyList_New(0);
+    if (!b.kind_list || !b.callee_dict || !b.callee_list || !b.file_dict || !b.file_list) {
+        goto error;
+    }
+
+    /* The single pass over GCC's data: */
+    if (gcc_cfg_for_each_block(cfg, add_block_to_snapshot, &b)) {
+        goto error;
+    }
+    int_vec_push(&b.succ_offsets, b.succ_block_index.len);
+    int_vec_push(&b.stmt_offsets, snapshot->num_stmts);
+
+    /* Convert the destinations of the edges from block indices to positions
+       within the snapshot: */
+    for (i = 0; i < b.block_index.len; i++) {
+        if (b.block_index.data[i] + 1 > max_index) {
+            max_index = b.block_index.data[i] + 1;
+        }
+    }
+    position_for_index = XNEWVEC(int, max_index + 1);
+    for (i = 0; i <= max_index; i++) {
+        position_for_index[i] = -1;
+    }
+    for (i = 0; i < b.block_index.len; i++) {
+        position_for_index[b.block_index.data[i]] = i;
+    }
+    for (i = 0; i < b.succ_block_index.len; i++) {
+        int index = b.succ_block_index.data[i];
+        int_vec_push(&succ_dest,
+                     (index >= 0 && index < max_index)
+                     ? position_for_index[index] : -1);
+    }
+
+    if (!(snapshot->block_index = int_vec_as_array(&b.block_index, array_type))
+        || !(snapshot->succ_offsets = int_vec_as_array(&b.succ_offsets, array_type))
+        || !(snapshot->succ_dest = int_vec_as_array(&succ_dest, array_type))
+        || !(snapshot->succ_flags = int_vec_as_array(&b.succ_flags, array_type))
+        || !(snapshot->stmt_offsets = int_vec_as_array(&b.stmt_offsets, array_type))
+        || !(snapshot->stmt_kind = int_vec_as_array(&b.stmt_kind, array_type))
+        || !(snapshot->callee = int_vec_as_array(&b.callee, array_type))
+        || !(snapshot->file = int_vec_as_array(&b.file, array_type))
+        || !(snapshot->line = int_vec_as_array(&b.line, array_type))
+        || !(snapshot->column = int_vec_as_array(&b.column, array_type))) {
+        goto error;
+    }
+
+    if (!(snapshot->kinds = PyList_AsTuple(b.kind_list))
+        || !(snapshot->callee_names = PyList_AsTuple(b.callee_list))
+        || !(snapshot->files = PyList_AsTuple(b.file_list))) {
+        goto error;
+    }
+
+    goto cleanup;
+
+ error:
+    Py_XDECREF(snapshot);
+    snapshot = NULL;
+
+ cleanup:
+    XDELETEVEC(b.block_index.data);
+    XDELETEVEC(b.succ_offsets.data);
+    XDELETEVEC(b.succ_block_index.data);
+    XDELETEVEC(b.succ_flags.data);
+    XDELETEVEC(b.stmt_offsets.data);
+    XDELETEVEC(b.stmt_kind.data);
+    XDELETEVEC(b.callee.data);
+    XDELETEVEC(b.file.data);
+    XDELETEVEC(b.line.data);
+    XDELETEVEC(b.column.data);
+    XDELETEVEC(succ_dest.data);
+    XDELETEVEC(position_for_index);
+    Py_XDECREF(b.kind_list);
+    Py_XDECREF(b.callee_dict);
+    Py_XDECREF(b.callee_list);
+    Py_XDECREF(b.file_dict);
+    Py_XDECREF(b.file_list);
+    Py_XDECREF(array_type);
+    Py_XDECREF(array_mod);
+    return (PyObject*)snapshot;
+}
+
+static bool
+walk_tree_of_stmt(gcc_gimple stmt, void *user_data)
+{
+    return PyGccWalkTree_Stmt((struct PyGccWalkTree *)user_data, stmt);
+}
+
+static bool
+walk_tree_of_block(gcc_cfg_block block, void *user_data)
+{
+    /* (as per snapshot(), skipping the occasional NULL block) */
+    if (!block.inner) {
+        return false;
+    }
+    return gcc_cfg_block_for_each_gimple(block, walk_tree_of_stmt, user_data);
+}
+
+PyObject *
+PyGccFunction_walk_tree(struct PyGccFunction *self, PyObject *args, PyObject *kwargs)
+{
+    struct PyGccWalkTree *walk;
+    gcc_cfg cfg;
+
+    walk = PyGccWalkTree_New(args, kwargs);
+    if (!walk) {
+        return NULL;
+    }
+
+    /* Walk the statements of each block in turn (there's nothing to walk
+       during early passes, when there's no cfg): */
+    cfg = gcc_function_get_cfg(self->fun);
+    if (cfg.inner) {
+        gcc_cfg_for_each_block(cfg, walk_tree_of_block, walk);
+    }
+
+    return PyGccWalkTree_Finish(walk);
+}
+
+PyObject *
+PyGccFunctionSnapshot_get_field(PyObject *field)
+{
+    Py_INCREF(field);
+    return field;
+}
+
+static int
+get_position(PyObject *args, int count, const char *what)
+{
+    int i;
+
+    if (!PyArg_ParseTuple(args, "i", &i)) {
+        return -1;
+    }
+    if (i < 0 || i >= count) {
+        PyErr_Format(PyExc_IndexError, "%s index out of range", what);
+        return -1;
+    }
+    return i;
+}
+
+PyObject *
+PyGccFunctionSnapshot_block(struct PyGccFunctionSnapshot *self, PyObject *args)
+{
+    int i = get_position(args, self->num_blocks, "block");
+    if (-1 == i) {
+        return NULL;
+    }
+    return PyGccBasicBlock_New(self->blocks[i]);
+}
+
+PyObject *
+PyGccFunctionSnapshot_stmt(struct PyGccFunctionSnapshot *self, PyObject *args)
+{
+    int i = get_position(args, self->num_stmts, "statement");
+    if (-1 == i) {
+        return NULL;
+    }
+    return PyGccGimple_New(self->stmts[i]);
+}
+
+void
+PyGcc_WrtpMarkForPyGccFunctionSnapshot(PyGccFunctionSnapshot *wrapper)
+{
+    int i;
+
+    /* Mark the underlying objects (recursing into their fields): */
+    for (i = 0; i < wrapper->num_blocks; i++) {
+        gcc_cfg_block_mark_in_use(wrapper->blocks[i]);
+    }
+    for (i = 0; i < wrapper->num_stmts; i++) {
+        gcc_gimple_mark_in_use(wrapper->stmts[i]);
+    }
+}
+
+void
+PyGccFunctionSnapshot_dealloc(PyObject *obj)
+{
+    struct PyGccFunctionSnapshot *self = (struct PyGccFunctionSnapshot *)obj;
+
+    Py_XDECREF(self->function);
+    XDELETEVEC(self->blocks);
+    XDELETEVEC(self->stmts);
+    Py_XDECREF(self->block_index);
+    Py_XDECREF(self->succ_offsets);
+    Py_XDECREF(self->succ_dest);
+    Py_XDECREF(self->succ_flags);
+    Py_XDECREF(self->stmt_offsets);
+    Py_XDECREF(self->stmt_kind);
+    Py_XDECREF(self->kinds);
+    Py_XDECREF(self->callee);
+    Py_XDECREF(self->callee_names);
+    Py_XDECREF(self->file);
+    Py_XDECREF(self->files);
+    Py_XDECREF(self->line);
+    Py_XDECREF(self->column);
+
+    PyGccWrapper_Dealloc(obj);
+}
+
 
 /*
   PEP-7  
@@ -99,8 +99,19 @@ PyGccGimple_as_gcc_gimple_label(struct PyGccGimple *self)
 static PyObject *
 do_pretty_print(struct PyGccGimple * self, int spc, dump_flags_t flags)
 {
-    PyObject *ppobj = PyGccPrettyPrinter_New();
-    PyObject *result = NULL;
+    enum PyGccStrMemoKind kind = ((flags & TDF_NOUID)
+                                  ? PYGCC_STR_MEMO_GIMPLE_NO_UID
+                                  : PYGCC_STR_MEMO_GIMPLE);
+    PyObject *ppobj;
+    PyObject *result;
+
+    /* (the only callers use spc == 0, so the memo needn't consider it) */
+    result = PyGcc_GetMemoizedStr(kind, self->stmt.inner);
+    if (result) {
+        return result;
+    }
+
+    ppobj = PyGccPrettyPrinter_New();
     if (!ppobj) {
 	return NULL;
     }
@@ -123,12 +134,13 @@ do_pretty_print(struct PyGccGimple * self, int spc, dump_flags_t flags)
     if (!result) {
 	goto error;
     }
-    
-    Py_XDECREF(ppobj);
+    PyGcc_MemoizeStr(kind, self->stmt.inner, result);
+
+    PyGccPrettyPrinter_Release(ppobj);
     return result;
-    
+
  error:
-    Py_XDECREF(ppobj);
+    PyGccPrettyPrinter_Release(ppobj);
     return NULL;
 }
 
@@ -190,22 +202,91 @@ PyGccGimple_richcompare(PyObject *o1, PyObject *o2, int op)
     return result_obj;
 }
 
+/*
+  The state of a walk over the tree nodes of one or more statements, as
+  per gcc.Gimple.walk_tree and gcc.Function.walk_tree
+*/
+struct PyGccWalkTree {
+    /*
+      Tuple of gcc.Tree subclasses: only nodes that are instances of one
+      of these are wrapped and passed to Python (or NULL for all nodes)
+    */
+    PyObject *types;
+
+    /*
+      Whether nodes with each tree code match "types" (as the class of a
+      wrapper depends only on the tree code): -1 for not yet known, else
+      0 or 1:
+    */
+    signed char match_for_code[MAX_TREE_CODES];
+
+    /* The list that matching nodes are collected into, or NULL: */
+    PyObject *results;
+
+    /* The callback for matching nodes, when not collecting them: */
+    struct callback_closure *closure;
+
+    /* The node that the callback stopped the walk at, if any: */
+    tree result;
+};
+
+static bool
+walk_tree_node_matches(struct PyGccWalkTree *walk, tree node)
+{
+    enum tree_code code = TREE_CODE(node);
+
+    if (!walk->types) {
+        return true;
+    }
+
+    if (-1 == walk->match_for_code[code]) {
+        PyTypeObject *tp;
+        Py_ssize_t i;
+
+        tp = (PyTypeObject*)PyGcc_autogenerated_tree_type_for_tree_code(code, 1);
+        walk->match_for_code[code] = 0;
+        for (i = 0; i < PyTuple_GET_SIZE(walk->types); i++) {
+            if (PyType_IsSubtype(tp,
+                                 (PyTypeObject*)PyTuple_GET_ITEM(walk->types, i))) {
+                walk->match_for_code[code] = 1;
+                break;
+            }
+        }
+    }
+    return walk->match_for_code[code];
+}
+
 static tree
 gimple_walk_tree_callback(tree *tree_ptr, int *walk_subtrees, void *data)
 {
     struct walk_stmt_info *wi = (struct walk_stmt_info*)data;
-    struct callback_closure *closure = (struct callback_closure *)wi->info;
+    struct PyGccWalkTree *walk = (struct PyGccWalkTree *)wi->info;
+    struct callback_closure *closure = walk->closure;
     PyObject *tree_obj = NULL;
     PyObject *args = NULL;
     PyObject *result = NULL;
 
-    assert(closure);
     assert(*tree_ptr);
+
+    /* Skip non-matching nodes without creating a wrapper for them: */
+    if (!walk_tree_node_matches(walk, *tree_ptr)) {
+        return NULL;
+    }
+
     tree_obj = PyGccTree_New(gcc_private_make_tree(*tree_ptr));
     if (!tree_obj) {
         goto error;
     }
 
+    if (walk->results) {
+        if (-1 == PyList_Append(walk->results, tree_obj)) {
+            goto error;
+        }
+        Py_DECREF(tree_obj);
+        return NULL;
+    }
+
+    assert(closure);
     args = PyGcc_Closure_MakeArgs(closure, 0, tree_obj);
     if (!args) {
         goto error;
@@ -237,40 +318,186 @@ gimple_walk_tree_callback(tree *tree_ptr, int *walk_subtrees, void *data)
     return NULL;
 }
 
-PyObject *
-PyGccGimple_walk_tree(struct PyGccGimple * self, PyObject *args, PyObject *kwargs)
+/*
+  Get the "types" argument to walk_tree as a tuple of gcc.Tree subclasses,
+  or NULL with an exception set
+*/
+static PyObject *
+get_walk_tree_types(PyObject *types)
+{
+    PyObject *result;
+    Py_ssize_t i;
+
+    if (PyType_Check(types)) {
+        result = PyTuple_Pack(1, types);
+    } else {
+        /* Accept any iterable, such as a tuple or set: */
+        result = PySequence_Tuple(types);
+    }
+    if (!result) {
+        return NULL;
+    }
+
+    for (i = 0; i < PyTuple_GET_SIZE(result); i++) {
+        PyObject *item = PyTuple_GET_ITEM(result, i);
+        if (!PyType_Check(item)
+            || !PyType_IsSubtype((PyTypeObject*)item,
+                                 (PyTypeObject*)&PyGccTree_TypeObj)) {
+            PyErr_Format(PyExc_TypeError,
+                         "types must be subclasses of gcc.Tree (got %R)",
+                         item);
+            Py_DECREF(result);
+            return NULL;
+        }
+    }
+    return result;
+}
+
+struct PyGccWalkTree *
+PyGccWalkTree_New(PyObject *args, PyObject *kwargs)
 {
-    PyObject *callback;
+    struct PyGccWalkTree *walk;
+    PyObject *types = NULL;
+    PyObject *collect = NULL;
+    PyObject *callback_kwargs = NULL;
     PyObject *extraargs = NULL;
-    struct callback_closure *closure;
-    tree result;
-    struct walk_stmt_info wi;
 
-    callback = PyTuple_GetItem(args, 0);
-    extraargs = PyTuple_GetSlice(args, 1, PyTuple_Size(args));
+    walk = XNEW(struct PyGccWalkTree);
+    memset(walk, 0, sizeof(*walk));
+    memset(walk->match_for_code, -1, sizeof(walk->match_for_code));
+
+    /* Take our own keyword arguments; pass the rest on to the callback: */
+    if (kwargs) {
+        types = PyDict_GetItemString(kwargs, "types");
+        collect = PyDict_GetItemString(kwargs, "collect");
+        if (types || collect) {
+            callback_kwargs = PyDict_Copy(kwargs);
+            if (!callback_kwargs) {
+                goto error;
+            }
+            if (types && -1 == PyDict_DelItemString(callback_kwargs, "types")) {
+                goto error;
+            }
+            if (collect && -1 == PyDict_DelItemString(callback_kwargs, "collect")) {
+                goto error;
+            }
+        }
+    }
 
-    closure = PyGcc_closure_new_generic(callback, extraargs, kwargs);
-    if (!closure) {
-        Py_DECREF(callback);
-        Py_DECREF(extraargs);
-        return NULL;
+    if (types && types != Py_None) {
+        walk->types = get_walk_tree_types(types);
+        if (!walk->types) {
+            goto error;
+        }
     }
 
+    if (collect) {
+        int is_true = PyObject_IsTrue(collect);
+        if (-1 == is_true) {
+            goto error;
+        }
+        if (is_true) {
+            if (PyTuple_GET_SIZE(args) > 0) {
+                PyErr_SetString(PyExc_TypeError,
+                                "walk_tree() takes no callback when collect is true");
+                goto error;
+            }
+            walk->results = PyList_New(0);
+            if (!walk->results) {
+                goto error;
+            }
+            Py_XDECREF(callback_kwargs);
+            return walk;
+        }
+    }
+
+    if (PyTuple_GET_SIZE(args) < 1) {
+        PyErr_SetString(PyExc_TypeError,
+                        "walk_tree() requires a callback, unless collect is true");
+        goto error;
+    }
+
+    extraargs = PyTuple_GetSlice(args, 1, PyTuple_GET_SIZE(args));
+    if (!extraargs) {
+        goto error;
+    }
+
+    walk->closure = PyGcc_closure_new_generic(PyTuple_GET_ITEM(args, 0),
+                                              extraargs,
+                                              callback_kwargs ? callback_kwargs : kwargs);
+    if (!walk->closure) {
+        goto error;
+    }
+    Py_DECREF(extraargs);
+    Py_XDECREF(callback_kwargs);
+    return walk;
+
+ error:
+    Py_XDECREF(extraargs);
+    Py_XDECREF(callback_kwargs);
+    PyGccWalkTree_Free(walk);
+    return NULL;
+}
+
+bool
+PyGccWalkTree_Stmt(struct PyGccWalkTree *walk, gcc_gimple stmt)
+{
+    struct walk_stmt_info wi;
+
     memset(&wi, 0, sizeof(wi));
-    wi.info = closure;
+    wi.info = walk;
+
+    walk->result = walk_gimple_op (stmt.inner,
+                                   gimple_walk_tree_callback,
+                                   &wi);
 
-    result = walk_gimple_op (self->stmt.inner,
-                             gimple_walk_tree_callback,
-                             &wi);
+    /* Stop at the first match, or on an exception: */
+    return walk->result || PyErr_Occurred();
+}
 
-    PyGcc_closure_free(closure);
+PyObject *
+PyGccWalkTree_Finish(struct PyGccWalkTree *walk)
+{
+    PyObject *result = NULL;
 
     /* Propagate exceptions: */
-    if (PyErr_Occurred()) {
+    if (!PyErr_Occurred()) {
+        if (walk->results) {
+            result = walk->results;
+            Py_INCREF(result);
+        } else {
+            result = PyGccTree_New(gcc_private_make_tree(walk->result));
+        }
+    }
+
+    PyGccWalkTree_Free(walk);
+    return result;
+}
+
+void
+PyGccWalkTree_Free(struct PyGccWalkTree *walk)
+{
+    Py_XDECREF(walk->types);
+    Py_XDECREF(walk->results);
+    if (walk->closure) {
+        PyGcc_closure_free(walk->closure);
+    }
+    XDELETE(walk);
+}
+
+PyObject *
+PyGccGimple_walk_tree(struct PyGccGimple * self, PyObject *args, PyObject *kwargs)
+{
+    struct PyGccWalkTree *walk;
+
+    walk = PyGccWalkTree_New(args, kwargs);
+    if (!walk) {
         return NULL;
     }
 
-    return PyGccTree_New(gcc_private_make_tree(result));
+    PyGccWalkTree_Stmt(walk, self->stmt);
+
+    return PyGccWalkTree_Finish(walk);
 }
 
 PyObject *
@@ -391,9 +618,10 @@ PyGccGimpleSwitch_get_labels(struct PyGccGimple *self, void *closure)
 
 
 /*
-   Ensure we have a unique PyGccGimple per gimple address (by maintaining a dict):
+   Ensure we have a unique PyGccGimple per gimple address (by maintaining a
+   PyGccWrapperCache):
 */
-static PyObject *gimple_wrapper_cache = NULL;
+static PyGccWrapperCache gimple_wrapper_cache;
 
 union gcc_gimple_or_ptr {
     gcc_gimple stmt;
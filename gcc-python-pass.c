@@ -33,14 +33,14 @@
 */
 
 /*
-   Ensure we have a unique PyGccPass per pass address (by maintaining a dict)
+   Ensure we have a unique PyGccPass per pass address (by maintaining a
+   PyGccWrapperCache)
 
-   For passes defined in Python, this dictionary maps from
-   long (struct opt_pass *) to the gcc.Pass wrapper object for that pass
-
-   The references on the right-hand-side keep these wrappers alive
+   For passes defined in Python, this maps from the (struct opt_pass *) to
+   the gcc.Pass wrapper object for that pass; PyGcc_insert_new_wrapper_into_cache
+   keeps these wrappers alive
 */
-static PyObject *pass_wrapper_cache = NULL;
+static PyGccWrapperCache pass_wrapper_cache;
 
 static bool impl_gate(function *fun)
 {
@@ -63,6 +63,10 @@ static bool impl_gate(function *fun)
     }
 
     assert(current_pass);
+
+    /* GCC may have changed its nodes since Python last ran: */
+    PyGcc_ClearStrMemos();
+
     pass_obj = PyGccPass_New(current_pass);
     assert(pass_obj); /* we own a ref at this point */
 
@@ -115,6 +119,10 @@ static unsigned int impl_execute(function *fun)
     gcc_location saved_loc = gcc_get_input_location();
 
     assert(current_pass);
+
+    /* GCC may have changed its nodes since Python last ran: */
+    PyGcc_ClearStrMemos();
+
     pass_obj = PyGccPass_New(current_pass);
     assert(pass_obj); /* we own a ref at this point */
 
@@ -25,10 +25,50 @@
 #include <new>
 #endif
 
+/*
+  The (FILE*) of each pretty-printer is backed by a buffer that grows as
+  needed (via fopencookie), so that long expressions aren't truncated.
+*/
+static ssize_t
+PyGccPrettyPrinter_write(void *cookie, const char *data, size_t size)
+{
+    struct PyGccPrettyPrinter *ppobj = (struct PyGccPrettyPrinter *)cookie;
+
+    if (ppobj->len + size + 1 > ppobj->alloc) {
+        size_t new_alloc = ppobj->alloc ? ppobj->alloc : 1024;
+        while (ppobj->len + size + 1 > new_alloc) {
+            new_alloc *= 2;
+        }
+        ppobj->buf = XRESIZEVEC(char, ppobj->buf, new_alloc);
+        ppobj->alloc = new_alloc;
+    }
+    memcpy(ppobj->buf + ppobj->len, data, size);
+    ppobj->len += size;
+    ppobj->buf[ppobj->len] = '\0';
+
+    return size;
+}
+
+/*
+  A pretty-printer that has been released by PyGccPrettyPrinter_Release,
+  ready for reuse by the next call to PyGccPrettyPrinter_New, so that we
+  don't need to construct a pretty_printer and open a (FILE*) for every
+  str() of a tree or statement:
+*/
+static struct PyGccPrettyPrinter *pooled_printer = NULL;
+
 PyObject*
 PyGccPrettyPrinter_New(void)
 {
     struct PyGccPrettyPrinter *obj;
+    cookie_io_functions_t io_funcs;
+
+    if (pooled_printer) {
+        /* We take over the pool's reference: */
+        obj = pooled_printer;
+        pooled_printer = NULL;
+        return (PyObject*)obj;
+    }
 
     obj = PyObject_New(struct PyGccPrettyPrinter, &PyGccPrettyPrinter_TypeObj);
     if (!obj) {
@@ -37,9 +77,16 @@ PyGccPrettyPrinter_New(void)
     
     //printf("PyGccPrettyPrinter_New\n");
 
-    /* Gross hack for getting at a FILE* ; rewrite using fopencookie? */
-    obj->buf[0] = '\0';
-    obj->file_ptr = fmemopen(obj->buf, sizeof(obj->buf), "w");
+    obj->buf = NULL;
+    obj->len = 0;
+    obj->alloc = 0;
+    memset(&io_funcs, 0, sizeof(io_funcs));
+    io_funcs.write = PyGccPrettyPrinter_write;
+    obj->file_ptr = fopencookie(obj, "w", io_funcs);
+    if (!obj->file_ptr) {
+        Py_DECREF(obj);
+        return PyErr_SetFromErrno(PyExc_IOError);
+    }
 
 #if (GCC_VERSION >= 4009)
     /* GCC 4.9 eliminated pp_construct in favor of a C++ ctor.
@@ -65,6 +112,29 @@ PyGccPrettyPrinter_New(void)
     return (PyObject*)obj;
 }
 
+void
+PyGccPrettyPrinter_Release(PyObject *obj)
+{
+    struct PyGccPrettyPrinter *ppobj;
+
+    /* FIXME: */
+    assert(Py_TYPE(obj) == &PyGccPrettyPrinter_TypeObj);
+    ppobj = (struct PyGccPrettyPrinter *)obj;
+
+    if (pooled_printer) {
+        Py_DECREF(obj);
+        return;
+    }
+
+    /* Discard anything left over (e.g. if an error occurred), then keep
+       it (and our reference) for reuse: */
+    pp_clear_output_area(&ppobj->pp);
+    pp_needs_newline(&ppobj->pp) = false;
+    fflush(ppobj->file_ptr);
+    ppobj->len = 0;
+    pooled_printer = ppobj;
+}
+
 pretty_printer*
 PyGccPrettyPrinter_as_pp(PyObject *obj)
 {
@@ -81,7 +151,7 @@ PyObject*
 PyGccPrettyPrinter_as_string(PyObject *obj)
 {
     struct PyGccPrettyPrinter *ppobj;
-    int len;
+    size_t len;
 
     /* FIXME: */
     assert(Py_TYPE(obj) == &PyGccPrettyPrinter_TypeObj);
@@ -89,16 +159,14 @@ PyGccPrettyPrinter_as_string(PyObject *obj)
 
     /* Flush the pp first.  This forcibly adds a trailing newline: */
     pp_flush(&ppobj->pp);
+    fflush(ppobj->file_ptr);
 
     /* Convert to a python string, leaving off the trailing newline: */
-    len = strlen(ppobj->buf);
-    assert(len > 0);
-    if ('\n' == ppobj->buf[len - 1]) {
-	return PyGccString_FromString_and_size(ppobj->buf,
-						      len - 1);
-    } else {
-	return PyGccString_FromString(ppobj->buf);
+    len = ppobj->len;
+    if (len > 0 && '\n' == ppobj->buf[len - 1]) {
+        len--;
     }
+    return PyGccString_FromString_and_size(len ? ppobj->buf : "", len);
 }
 
 void
@@ -115,10 +183,83 @@ PyGccPrettyPrinter_dealloc(PyObject *obj)
 	fclose(ppobj->file_ptr);
 	ppobj->file_ptr = NULL;
     }
+    XDELETEVEC(ppobj->buf);
+    ppobj->buf = NULL;
 
     Py_TYPE(obj)->tp_free(obj);
 }
 
+/*
+  Memos of the strings rendered for trees and statements, keyed by the
+  address of the underlying GCC node.
+
+  GCC is free to modify (or free) its nodes whenever it has control, so the
+  memos only last until control next passes from GCC to Python (see
+  PyGcc_ClearStrMemos); within a single callback or pass, the same node is
+  only pretty-printed once.
+*/
+static PyObject *str_memos[PYGCC_NUM_STR_MEMOS];
+
+/* Bound the size of each memo, in case a script walks a huge amount of
+   code within a single callback: */
+#define MAX_STR_MEMO_SIZE 65536
+
+PyObject *
+PyGcc_GetMemoizedStr(enum PyGccStrMemoKind kind, const void *node)
+{
+    PyObject *key;
+    PyObject *result;
+
+    if (!str_memos[kind]) {
+        return NULL;
+    }
+    key = PyLong_FromVoidPtr((void*)node);
+    if (!key) {
+        PyErr_Clear();
+        return NULL;
+    }
+    /* (borrowed reference, or NULL without an exception set) */
+    result = PyDict_GetItem(str_memos[kind], key);
+    Py_DECREF(key);
+    Py_XINCREF(result);
+    return result;
+}
+
+void
+PyGcc_MemoizeStr(enum PyGccStrMemoKind kind, const void *node, PyObject *str)
+{
+    PyObject *key;
+
+    if (!str_memos[kind]) {
+        str_memos[kind] = PyDict_New();
+        if (!str_memos[kind]) {
+            /* The memo is merely an optimization: */
+            PyErr_Clear();
+            return;
+        }
+    }
+    if (PyDict_Size(str_memos[kind]) >= MAX_STR_MEMO_SIZE) {
+        PyDict_Clear(str_memos[kind]);
+    }
+    key = PyLong_FromVoidPtr((void*)node);
+    if (!key || -1 == PyDict_SetItem(str_memos[kind], key, str)) {
+        PyErr_Clear();
+    }
+    Py_XDECREF(key);
+}
+
+void
+PyGcc_ClearStrMemos(void)
+{
+    int i;
+
+    for (i = 0; i < PYGCC_NUM_STR_MEMOS; i++) {
+        if (str_memos[i] && PyDict_Size(str_memos[i]) > 0) {
+            PyDict_Clear(str_memos[i]);
+        }
+    }
+}
+
 /*
   PEP-7  
 Local variables:
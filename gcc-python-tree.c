@@ -109,8 +109,19 @@ raise_not_during_lto(const char *what)
 static PyObject *
 do_pretty_print(struct PyGccTree * self, int spc, dump_flags_t flags)
 {
-    PyObject *ppobj = PyGccPrettyPrinter_New();
-    PyObject *result = NULL;
+    enum PyGccStrMemoKind kind = ((flags & TDF_NOUID)
+                                  ? PYGCC_STR_MEMO_TREE_NO_UID
+                                  : PYGCC_STR_MEMO_TREE);
+    PyObject *ppobj;
+    PyObject *result;
+
+    /* (the only callers use spc == 0, so the memo needn't consider it) */
+    result = PyGcc_GetMemoizedStr(kind, self->t.inner);
+    if (result) {
+        return result;
+    }
+
+    ppobj = PyGccPrettyPrinter_New();
     if (!ppobj) {
 	return NULL;
     }
@@ -121,12 +132,13 @@ do_pretty_print(struct PyGccTree * self, int spc, dump_flags_t flags)
     if (!result) {
 	goto error;
     }
+    PyGcc_MemoizeStr(kind, self->t.inner, result);
 
-    Py_XDECREF(ppobj);
+    PyGccPrettyPrinter_Release(ppobj);
     return result;
 
  error:
-    Py_XDECREF(ppobj);
+    PyGccPrettyPrinter_Release(ppobj);
     return NULL;
 }
 
@@ -1133,10 +1145,11 @@ PyGcc_WrtpMarkForPyGccTree(PyGccTree *wrapper)
 }
 
 /*
-   Ensure we have a unique PyGccTree per tree address (by maintaining a dict)
-   (what about lifetimes?)
+   Ensure we have a unique PyGccTree per tree address (by maintaining a
+   PyGccWrapperCache).  The cache doesn't keep the wrappers alive: they
+   remove themselves from it when deallocated.
 */
-static PyObject *tree_wrapper_cache = NULL;
+static PyGccWrapperCache tree_wrapper_cache;
 
 PyObject *
 PyGccTree_New(gcc_tree t)
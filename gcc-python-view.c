@@ -0,0 +1,317 @@
+/*
+   Copyright 2026 Red Hat, Inc.
+
+   This is free software: you can redistribute it and/or modify it
+   under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful, but
+   WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+   General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see
+   <http://www.gnu.org/licenses/>.
+*/
+
+#include <Python.h>
+#include "gcc-python.h"
+#include "gcc-python-wrappers.h"
+
+/*
+  gcc.SequenceView: see gcc-python-wrappers.h
+*/
+
+PyObject *
+PyGccSequenceView_New(const struct PyGccSequenceViewKind *kind)
+{
+    PyGccSequenceView *view;
+
+    view = PyGccWrapper_New(PyGccSequenceView, &PyGccSequenceView_TypeObj);
+    if (!view) {
+        return NULL;
+    }
+    view->kind = kind;
+    view->items = NULL;
+    view->num_items = 0;
+    view->alloc_items = 0;
+
+    return (PyObject*)view;
+}
+
+bool
+PyGccSequenceView_Append(PyObject *obj, void *item)
+{
+    PyGccSequenceView *view = (PyGccSequenceView *)obj;
+
+    /* It appears that with optimization there can be occasional NULLs
+       (e.g. within the blocks of a cfg).  Skip them: */
+    if (!item) {
+        return false;
+    }
+
+    if (view->num_items == view->alloc_items) {
+        view->alloc_items = view->alloc_items ? view->alloc_items * 2 : 8;
+        view->items = XRESIZEVEC(void *, view->items, view->alloc_items);
+    }
+    view->items[view->num_items++] = item;
+    return false;
+}
+
+void
+PyGcc_WrtpMarkForPyGccSequenceView(PyGccSequenceView *wrapper)
+{
+    Py_ssize_t i;
+
+    /* Mark the underlying objects (recursing into their fields): */
+    for (i = 0; i < wrapper->num_items; i++) {
+        wrapper->kind->mark(wrapper->items[i]);
+    }
+}
+
+void
+PyGccSequenceView_dealloc(PyObject *obj)
+{
+    PyGccSequenceView *view = (PyGccSequenceView *)obj;
+
+    XDELETEVEC(view->items);
+    PyGccWrapper_Dealloc(obj);
+}
+
+Py_ssize_t
+PyGccSequenceView_len(PyObject *obj)
+{
+    return ((PyGccSequenceView *)obj)->num_items;
+}
+
+PyObject *
+PyGccSequenceView_item(PyObject *obj, Py_ssize_t i)
+{
+    PyGccSequenceView *view = (PyGccSequenceView *)obj;
+
+    if (i < 0 || i >= view->num_items) {
+        PyErr_SetString(PyExc_IndexError, "index out of range");
+        return NULL;
+    }
+    return view->kind->make_wrapper(view->items[i]);
+}
+
+PyObject *
+PyGccSequenceView_subscript(PyObject *obj, PyObject *key)
+{
+    PyGccSequenceView *view = (PyGccSequenceView *)obj;
+    Py_ssize_t start, stop, step, slicelength, i;
+    PyObject *result;
+
+    if (PyIndex_Check(key)) {
+        i = PyNumber_AsSsize_t(key, PyExc_IndexError);
+        if (i == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+        if (i < 0) {
+            i += view->num_items;
+        }
+        return PyGccSequenceView_item(obj, i);
+    }
+
+    if (!PySlice_Check(key)) {
+        PyErr_Format(PyExc_TypeError,
+                     "indices must be integers or slices, not %s",
+                     Py_TYPE(key)->tp_name);
+        return NULL;
+    }
+
+    /* Slicing gives a list, with wrappers for just the selected items: */
+#if PY_MAJOR_VERSION < 3
+    /* (Python 2's PySlice_GetIndicesEx takes a PySliceObject*) */
+    if (-1 == PySlice_GetIndicesEx((PySliceObject*)key, view->num_items,
+                                   &start, &stop, &step, &slicelength)) {
+        return NULL;
+    }
+#else
+    if (-1 == PySlice_GetIndicesEx(key, view->num_items,
+                                   &start, &stop, &step, &slicelength)) {
+        return NULL;
+    }
+#endif
+    result = PyList_New(slicelength);
+    if (!result) {
+        return NULL;
+    }
+    for (i = 0; i < slicelength; i++) {
+        PyObject *item = view->kind->make_wrapper(view->items[start + i * step]);
+        if (!item) {
+            Py_DECREF(result);
+            return NULL;
+        }
+        PyList_SET_ITEM(result, i, item);
+    }
+    return result;
+}
+
+PyObject *
+PyGccSequenceView_as_list(PyObject *obj)
+{
+    PyGccSequenceView *view = (PyGccSequenceView *)obj;
+    PyObject *result;
+    Py_ssize_t i;
+
+    result = PyList_New(view->num_items);
+    if (!result) {
+        return NULL;
+    }
+    for (i = 0; i < view->num_items; i++) {
+        PyObject *item = view->kind->make_wrapper(view->items[i]);
+        if (!item) {
+            Py_DECREF(result);
+            return NULL;
+        }
+        PyList_SET_ITEM(result, i, item);
+    }
+    return result;
+}
+
+/*
+  Get a new reference to a list for the given object, which must be
+  either a list or a view, or NULL if it's neither (without setting an
+  exception):
+*/
+static PyObject *
+as_list_or_null(PyObject *obj)
+{
+    if (Py_TYPE(obj) == (PyTypeObject*)&PyGccSequenceView_TypeObj) {
+        return PyGccSequenceView_as_list(obj);
+    }
+    if (PyList_Check(obj)) {
+        Py_INCREF(obj);
+        return obj;
+    }
+    return NULL;
+}
+
+/*
+  The remaining operations provide compatibility with the lists that were
+  previously returned, by working on a list of the items:
+*/
+PyObject *
+PyGccSequenceView_add(PyObject *o1, PyObject *o2)
+{
+    PyObject *list1 = NULL;
+    PyObject *list2 = NULL;
+    PyObject *result = NULL;
+
+    list1 = as_list_or_null(o1);
+    if (!list1) {
+        goto not_implemented;
+    }
+    list2 = as_list_or_null(o2);
+    if (!list2) {
+        goto not_implemented;
+    }
+    result = PySequence_Concat(list1, list2);
+    Py_DECREF(list1);
+    Py_DECREF(list2);
+    return result;
+
+ not_implemented:
+    if (PyErr_Occurred()) {
+        Py_XDECREF(list1);
+        return NULL;
+    }
+    Py_XDECREF(list1);
+    Py_INCREF(Py_NotImplemented);
+    return Py_NotImplemented;
+}
+
+PyObject *
+PyGccSequenceView_repr(PyObject *obj)
+{
+    PyObject *list;
+    PyObject *result;
+
+    list = PyGccSequenceView_as_list(obj);
+    if (!list) {
+        return NULL;
+    }
+    result = PyObject_Repr(list);
+    Py_DECREF(list);
+    return result;
+}
+
+PyObject *
+PyGccSequenceView_richcompare(PyObject *o1, PyObject *o2, int op)
+{
+    PyObject *list1 = NULL;
+    PyObject *list2 = NULL;
+    PyObject *result;
+
+    list1 = as_list_or_null(o1);
+    if (!list1) {
+        goto not_implemented;
+    }
+    list2 = as_list_or_null(o2);
+    if (!list2) {
+        goto not_implemented;
+    }
+    result = PyObject_RichCompare(list1, list2, op);
+    Py_DECREF(list1);
+    Py_DECREF(list2);
+    return result;
+
+ not_implemented:
+    if (PyErr_Occurred()) {
+        Py_XDECREF(list1);
+        return NULL;
+    }
+    Py_XDECREF(list1);
+    Py_INCREF(Py_NotImplemented);
+    return Py_NotImplemented;
+}
+
+PyObject *
+PyGccSequenceView_iter(PyObject *obj)
+{
+    struct PyGccSequenceViewIterator *iter;
+
+    iter = PyObject_New(struct PyGccSequenceViewIterator,
+                        &PyGccSequenceViewIterator_TypeObj);
+    if (!iter) {
+        return NULL;
+    }
+    /* The reference to the view keeps the items marked: */
+    Py_INCREF(obj);
+    iter->view = obj;
+    iter->index = 0;
+    return (PyObject*)iter;
+}
+
+PyObject *
+PyGccSequenceViewIterator_iternext(PyObject *obj)
+{
+    struct PyGccSequenceViewIterator *iter = (struct PyGccSequenceViewIterator *)obj;
+    PyGccSequenceView *view = (PyGccSequenceView *)iter->view;
+
+    if (iter->index >= view->num_items) {
+        return NULL;
+    }
+    return view->kind->make_wrapper(view->items[iter->index++]);
+}
+
+void
+PyGccSequenceViewIterator_dealloc(PyObject *obj)
+{
+    struct PyGccSequenceViewIterator *iter = (struct PyGccSequenceViewIterator *)obj;
+
+    Py_DECREF(iter->view);
+    Py_TYPE(obj)->tp_free(obj);
+}
+
+/*
+  PEP-7
+Local variables:
+c-basic-offset: 4
+indent-tabs-mode: nil
+End:
+*/
@@ -187,6 +187,167 @@ PyTypeObject PyGccWrapperMeta_TypeObj  = {
 #endif
 };
 
+/*
+  PyGccWrapperCache: a pointer-keyed hash table, using open addressing with
+  linear probing.
+
+  Slots are either empty (wrapper == NULL), deleted (wrapper == &deleted),
+  or live.  Deleted slots are skipped over when probing for a key, and are
+  discarded when the table is resized.
+*/
+static struct PyGccWrapper deleted;
+
+#define PyGccWrapperCache_MIN_CAPACITY 64
+
+static size_t
+PyGccWrapperCache_hash(void *key)
+{
+    /* The low bits of a pointer are usually zero due to alignment; mix in
+       the higher bits: */
+    size_t h = (size_t)key;
+    return (h >> 3) ^ (h >> 12) ^ (h >> 21);
+}
+
+/*
+  Find the slot holding "key", or NULL if it's not present
+*/
+static struct PyGccWrapperCacheEntry *
+PyGccWrapperCache_find(PyGccWrapperCache *cache, void *key)
+{
+    size_t mask;
+    size_t i;
+
+    if (!cache->capacity) {
+        return NULL;
+    }
+    mask = cache->capacity - 1;
+    for (i = PyGccWrapperCache_hash(key) & mask; ; i = (i + 1) & mask) {
+        struct PyGccWrapperCacheEntry *entry = &cache->entries[i];
+        if (!entry->wrapper) {
+            return NULL;
+        }
+        if (entry->wrapper != &deleted && entry->key == key) {
+            return entry;
+        }
+    }
+}
+
+/*
+  Move all live entries into a new array, large enough for "num_live"
+  entries and room to grow.  Returns 0 on success, or -1 with an exception
+  set.
+*/
+static int
+PyGccWrapperCache_resize(PyGccWrapperCache *cache, size_t num_live)
+{
+    struct PyGccWrapperCacheEntry *old_entries = cache->entries;
+    size_t old_capacity = cache->capacity;
+    struct PyGccWrapperCacheEntry *new_entries;
+    size_t new_capacity = PyGccWrapperCache_MIN_CAPACITY;
+    size_t mask;
+    size_t i;
+
+    /* Keep the table at most half full after resizing: */
+    while (new_capacity < num_live * 4) {
+        new_capacity *= 2;
+    }
+
+    new_entries = PyMem_New(struct PyGccWrapperCacheEntry, new_capacity);
+    if (!new_entries) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    memset(new_entries, 0, new_capacity * sizeof(*new_entries));
+
+    mask = new_capacity - 1;
+    for (i = 0; i < old_capacity; i++) {
+        struct PyGccWrapperCacheEntry *old_entry = &old_entries[i];
+        size_t j;
+        if (!old_entry->wrapper || old_entry->wrapper == &deleted) {
+            continue;
+        }
+        for (j = PyGccWrapperCache_hash(old_entry->key) & mask;
+             new_entries[j].wrapper;
+             j = (j + 1) & mask) {
+        }
+        new_entries[j] = *old_entry;
+    }
+
+    PyMem_Free(old_entries);
+    cache->entries = new_entries;
+    cache->capacity = new_capacity;
+    cache->num_used = cache->num_live;
+    return 0;
+}
+
+PyGccWrapper *
+PyGccWrapperCache_Lookup(PyGccWrapperCache *cache, void *key)
+{
+    struct PyGccWrapperCacheEntry *entry;
+
+    assert(cache);
+
+    entry = PyGccWrapperCache_find(cache, key);
+    if (entry) {
+        return entry->wrapper;
+    }
+    return NULL;
+}
+
+int
+PyGccWrapperCache_Insert(PyGccWrapperCache *cache, void *key,
+                         PyGccWrapper *wrapper)
+{
+    size_t mask;
+    size_t i;
+
+    assert(cache);
+    assert(wrapper);
+    assert(!wrapper->wr_cache);
+    assert(!PyGccWrapperCache_find(cache, key));
+
+    /* Keep the table at most 3/4 full, counting deleted slots: */
+    if ((cache->num_used + 1) * 4 > cache->capacity * 3) {
+        if (PyGccWrapperCache_resize(cache, cache->num_live + 1)) {
+            return -1;
+        }
+    }
+
+    mask = cache->capacity - 1;
+    for (i = PyGccWrapperCache_hash(key) & mask; ; i = (i + 1) & mask) {
+        struct PyGccWrapperCacheEntry *entry = &cache->entries[i];
+        if (!entry->wrapper || entry->wrapper == &deleted) {
+            if (!entry->wrapper) {
+                cache->num_used++;
+            }
+            entry->key = key;
+            entry->wrapper = wrapper;
+            break;
+        }
+    }
+    cache->num_live++;
+
+    wrapper->wr_cache = cache;
+    wrapper->wr_key = key;
+    return 0;
+}
+
+static void
+PyGccWrapperCache_Remove(PyGccWrapperCache *cache, void *key,
+                         PyGccWrapper *wrapper)
+{
+    struct PyGccWrapperCacheEntry *entry;
+
+    entry = PyGccWrapperCache_find(cache, key);
+    assert(entry);
+    assert(entry->wrapper == wrapper);
+    if (entry && entry->wrapper == wrapper) {
+        entry->key = NULL;
+        entry->wrapper = &deleted;
+        cache->num_live--;
+    }
+}
+
 /* Maintain a circular linked list of PyGccWrapper instances: */
 static struct PyGccWrapper sentinel = {
     PyObject_HEAD_INIT(NULL)
@@ -238,6 +399,10 @@ PyGccWrapper_Track(struct PyGccWrapper *obj)
     obj->wr_next = &sentinel;
     sentinel.wr_prev = obj;
 
+    /* Not yet within a PyGccWrapperCache: */
+    obj->wr_cache = NULL;
+    obj->wr_key = NULL;
+
     assert(obj->wr_prev);
     assert(obj->wr_next);
 }
@@ -270,6 +435,13 @@ PyGcc_wrapper_untrack(struct PyGccWrapper *obj)
         obj->wr_prev = NULL;
         obj->wr_next = NULL;
     }
+
+    /* Remove from the PyGccWrapperCache, if it's within one: */
+    if (obj->wr_cache) {
+        PyGccWrapperCache_Remove(obj->wr_cache, obj->wr_key, obj);
+        obj->wr_cache = NULL;
+        obj->wr_key = NULL;
+    }
 }
 
 void
@@ -338,6 +510,9 @@ force_gcc_gc(void)
     ggc_force_collect = true;
     ggc_collect();
     ggc_force_collect = stored;
+
+    /* Memoized strings may refer to nodes that have now been freed: */
+    PyGcc_ClearStrMemos();
 }
 
 PyObject *
@@ -80,6 +80,150 @@ As per IMPL_LIST_MAKER, but for a global iterator that takes no ARG
     }                                 \
     return result;
 
+/*
+  gcc.SequenceView: a read-only sequence of GCC objects, such as the
+  statements within a gcc.BasicBlock.
+
+  Building the view merely records the underlying pointers; the Python
+  wrapper objects are only created as items are accessed, so that
+  scripts that merely test for emptiness, take len(), or stop iterating
+  early don't pay for wrapping every item.  The view marks the items for
+  GCC's garbage collector for as long as it is alive.
+*/
+struct PyGccSequenceViewKind {
+    /* Create a wrapper object for an item: */
+    PyObject *(*make_wrapper)(void *item);
+
+    /* Mark an item (recursing into its fields): */
+    void (*mark)(void *item);
+};
+
+typedef struct PyGccSequenceView {
+    struct PyGccWrapper head;
+    const struct PyGccSequenceViewKind *kind;
+    void **items;
+    Py_ssize_t num_items;
+    Py_ssize_t alloc_items;
+} PyGccSequenceView;
+
+extern PyGccWrapperTypeObject PyGccSequenceView_TypeObj;
+
+PyObject *
+PyGccSequenceView_New(const struct PyGccSequenceViewKind *kind);
+
+/* Add an item to a view, returning true (with an exception set) on error: */
+bool
+PyGccSequenceView_Append(PyObject *view, void *item);
+
+PyObject *
+PyGccSequenceView_as_list(PyObject *view);
+
+void
+PyGcc_WrtpMarkForPyGccSequenceView(PyGccSequenceView *wrapper);
+
+void
+PyGccSequenceView_dealloc(PyObject *obj);
+
+Py_ssize_t
+PyGccSequenceView_len(PyObject *obj);
+
+PyObject *
+PyGccSequenceView_item(PyObject *obj, Py_ssize_t i);
+
+PyObject *
+PyGccSequenceView_subscript(PyObject *obj, PyObject *key);
+
+PyObject *
+PyGccSequenceView_add(PyObject *o1, PyObject *o2);
+
+PyObject *
+PyGccSequenceView_repr(PyObject *obj);
+
+PyObject *
+PyGccSequenceView_richcompare(PyObject *o1, PyObject *o2, int op);
+
+PyObject *
+PyGccSequenceView_iter(PyObject *obj);
+
+struct PyGccSequenceViewIterator {
+    PyObject_HEAD
+    PyObject *view;
+    Py_ssize_t index;
+};
+
+extern PyTypeObject PyGccSequenceViewIterator_TypeObj;
+
+PyObject *
+PyGccSequenceViewIterator_iternext(PyObject *obj);
+
+void
+PyGccSequenceViewIterator_dealloc(PyObject *obj);
+
+/*
+  Define NAME, a struct PyGccSequenceViewKind for items of type KIND (one
+  of the gcc-c-api types), along with NAME_append, a callback for use with
+  a for_each ITERATOR to populate a view
+*/
+#define IMPL_VIEW_KIND(NAME, KIND, MAKE_WRAPPER, MARK)                  \
+  union NAME##_as_ptr {                                                 \
+      KIND item;                                                        \
+      void *ptr;                                                        \
+  };                                                                    \
+  static bool NAME##_append(KIND item, void *user_data)                 \
+  {                                                                     \
+      union NAME##_as_ptr u;                                            \
+      u.item = item;                                                    \
+      return PyGccSequenceView_Append((PyObject*)user_data, u.ptr);     \
+  }                                                                     \
+  static PyObject *NAME##_make_wrapper(void *ptr)                       \
+  {                                                                     \
+      union NAME##_as_ptr u;                                            \
+      u.ptr = ptr;                                                      \
+      return MAKE_WRAPPER(u.item);                                      \
+  }                                                                     \
+  static void NAME##_mark(void *ptr)                                    \
+  {                                                                     \
+      union NAME##_as_ptr u;                                            \
+      u.ptr = ptr;                                                      \
+      MARK(u.item);                                                     \
+  }                                                                     \
+  static const struct PyGccSequenceViewKind NAME = {                    \
+      NAME##_make_wrapper,                                              \
+      NAME##_mark                                                       \
+  };
+
+/*
+  Create the body of a function that builds a gcc.SequenceView of the
+  items visited by a for_each ITERATOR, using VIEWKIND as defined by
+  IMPL_VIEW_KIND
+ */
+#define IMPL_VIEW_MAKER(ITERATOR, ARG, VIEWKIND)        \
+    PyObject *result;                                   \
+    result = PyGccSequenceView_New(&VIEWKIND);          \
+    if (!result) {                                      \
+        return NULL;                                    \
+    }                                                   \
+    if (ITERATOR((ARG), VIEWKIND##_append, result)) {   \
+        Py_DECREF(result);                              \
+        return NULL;                                    \
+    }                                                   \
+    return result;
+
+/*
+As per IMPL_VIEW_MAKER, but for a global iterator that takes no ARG
+ */
+#define IMPL_GLOBAL_VIEW_MAKER(ITERATOR, VIEWKIND)      \
+    PyObject *result;                                   \
+    result = PyGccSequenceView_New(&VIEWKIND);          \
+    if (!result) {                                      \
+        return NULL;                                    \
+    }                                                   \
+    if (ITERATOR(VIEWKIND##_append, result)) {          \
+        Py_DECREF(result);                              \
+        return NULL;                                    \
+    }                                                   \
+    return result;
+
 PyMODINIT_FUNC initoptpass(void);
 
 /* gcc-python-attribute.c: */
@@ -256,6 +400,71 @@ PyGccFunction_hash(struct PyGccFunction * self);
 PyObject *
 PyGccFunction_richcompare(PyObject *o1, PyObject *o2, int op);
 
+PyObject *
+PyGccFunction_snapshot(struct PyGccFunction *self, PyObject *args);
+
+PyObject *
+PyGccFunction_walk_tree(struct PyGccFunction *self, PyObject *args, PyObject *kwargs);
+
+/*
+  gcc.FunctionSnapshot: the result of gcc.Function.snapshot(), holding the
+  blocks and statements of a function as parallel arrays.  Like
+  gcc.SequenceView, it marks the underlying blocks and statements for GCC's
+  garbage collector for as long as it is alive, so that "blocks" and
+  "stmts" can be wrapped on demand.
+*/
+typedef struct PyGccFunctionSnapshot {
+    struct PyGccWrapper head;
+    PyObject *function;
+
+    gcc_cfg_block *blocks;
+    int num_blocks;
+    gcc_gimple *stmts;
+    int num_stmts;
+
+    /* Instances of array.array('i'): */
+    PyObject *block_index;
+    PyObject *succ_offsets;
+    PyObject *succ_dest;
+    PyObject *succ_flags;
+    PyObject *stmt_offsets;
+    PyObject *stmt_kind;
+    PyObject *callee;
+    PyObject *file;
+    PyObject *line;
+    PyObject *column;
+
+    /* Tuples, indexed by stmt_kind, callee and file respectively: */
+    PyObject *kinds;
+    PyObject *callee_names;
+    PyObject *files;
+} PyGccFunctionSnapshot;
+
+/* The bits within gcc.FunctionSnapshot.succ_flags: */
+#define PYGCC_EDGE_TRUE_VALUE   (1 << 0)
+#define PYGCC_EDGE_FALSE_VALUE  (1 << 1)
+#define PYGCC_EDGE_LOOP_EXIT    (1 << 2)
+#define PYGCC_EDGE_CAN_FALLTHRU (1 << 3)
+#define PYGCC_EDGE_COMPLEX      (1 << 4)
+#define PYGCC_EDGE_EH           (1 << 5)
+
+extern PyGccWrapperTypeObject PyGccFunctionSnapshot_TypeObj;
+
+void
+PyGcc_WrtpMarkForPyGccFunctionSnapshot(PyGccFunctionSnapshot *wrapper);
+
+PyObject *
+PyGccFunctionSnapshot_get_field(PyObject *field);
+
+PyObject *
+PyGccFunctionSnapshot_block(struct PyGccFunctionSnapshot *self, PyObject *args);
+
+PyObject *
+PyGccFunctionSnapshot_stmt(struct PyGccFunctionSnapshot *self, PyObject *args);
+
+void
+PyGccFunctionSnapshot_dealloc(PyObject *obj);
+
 PyObject *
 PyGccArrayRef_repr(PyObject *self);
 
@@ -395,6 +604,26 @@ PyGccGimple_richcompare(PyObject *o1, PyObject *o2, int op);
 PyObject *
 PyGccGimple_walk_tree(struct PyGccGimple * self, PyObject *args, PyObject *kwargs);
 
+/*
+  Support for walk_tree methods: create the state of a walk from the
+  arguments to the method, call PyGccWalkTree_Stmt on each statement
+  until it returns true, then get the method's result (and free the state)
+  with PyGccWalkTree_Finish:
+*/
+struct PyGccWalkTree;
+
+struct PyGccWalkTree *
+PyGccWalkTree_New(PyObject *args, PyObject *kwargs);
+
+bool
+PyGccWalkTree_Stmt(struct PyGccWalkTree *walk, gcc_gimple stmt);
+
+PyObject *
+PyGccWalkTree_Finish(struct PyGccWalkTree *walk);
+
+void
+PyGccWalkTree_Free(struct PyGccWalkTree *walk);
+
 PyObject *
 PyGccGimple_get_rhs(struct PyGccGimple *self, void *closure);
 
@@ -472,14 +701,26 @@ struct PyGccPrettyPrinter {
     PyObject_HEAD
     pretty_printer pp;
     FILE *file_ptr;
-    char buf[1024]; /* FIXME */
+
+    /* The text written to file_ptr so far (NUL-terminated), within a
+       buffer that grows as necessary: */
+    char *buf;
+    size_t len;
+    size_t alloc;
 };
 
 extern PyTypeObject PyGccPrettyPrinter_TypeObj;
 
+/*
+  Get a pretty-printer, reusing a pooled one if possible; hand it back
+  with PyGccPrettyPrinter_Release when done, rather than Py_DECREF:
+*/
 PyObject*
 PyGccPrettyPrinter_New(void);
 
+void
+PyGccPrettyPrinter_Release(PyObject *obj);
+
 pretty_printer*
 PyGccPrettyPrinter_as_pp(PyObject *obj);
 
@@ -489,6 +730,26 @@ PyGccPrettyPrinter_as_string(PyObject *obj);
 void
 PyGccPrettyPrinter_dealloc(PyObject *obj);
 
+enum PyGccStrMemoKind {
+    PYGCC_STR_MEMO_TREE,
+    PYGCC_STR_MEMO_TREE_NO_UID,
+    PYGCC_STR_MEMO_GIMPLE,
+    PYGCC_STR_MEMO_GIMPLE_NO_UID,
+    PYGCC_NUM_STR_MEMOS
+};
+
+/* Get a new reference to the memoized str() for the node, or NULL (without
+   an exception set) if there isn't one: */
+PyObject *
+PyGcc_GetMemoizedStr(enum PyGccStrMemoKind kind, const void *node);
+
+void
+PyGcc_MemoizeStr(enum PyGccStrMemoKind kind, const void *node, PyObject *str);
+
+/* Called whenever control passes from GCC to Python: */
+void
+PyGcc_ClearStrMemos(void);
+
 /* gcc-python-rtl.c: */
 #if (GCC_VERSION < 5000)
 PyObject *
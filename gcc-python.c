@@ -260,15 +260,16 @@ PyGcc_get_parameters(PyObject *self, PyObject *args)
 }
 #endif
 
-IMPL_APPENDER(add_var_to_list,
-              gcc_variable,
-              PyGccVariable_New)
+IMPL_VIEW_KIND(variable_view_kind,
+               gcc_variable,
+               PyGccVariable_New,
+               gcc_variable_mark_in_use)
 
 static PyObject *
 PyGcc_get_variables(PyObject *self, PyObject *args)
 {
-    IMPL_GLOBAL_LIST_MAKER(gcc_for_each_variable,
-                           add_var_to_list)
+    IMPL_GLOBAL_VIEW_MAKER(gcc_for_each_variable,
+                           variable_view_kind)
 }
 
 static PyObject *
@@ -463,7 +464,7 @@ static PyMethodDef GccMethods[] = {
 #endif
 
     {"get_variables", PyGcc_get_variables, METH_NOARGS,
-     "Get all variables in this compilation unit as a list of gcc.Variable"},
+     "Get all variables in this compilation unit as a sequence of gcc.Variable"},
 
     {"maybe_get_identifier", PyGcc_maybe_get_identifier, METH_VARARGS,
      "Get the gcc.IdentifierNode with this name, if it exists, otherwise None"},
@@ -482,7 +483,7 @@ static PyMethodDef GccMethods[] = {
      "Get the gcc.Version for this version of GCC"},
 
     {"get_callgraph_nodes", PyGcc_get_callgraph_nodes, METH_VARARGS,
-     "Get a list of all gcc.CallgraphNode instances"},
+     "Get a sequence of all gcc.CallgraphNode instances"},
 
     /* Dump files */
     {"dump", PyGcc_dump, METH_O,
@@ -828,6 +829,7 @@ plugin_init (struct plugin_name_args *plugin_info,
     autogenerated_rtl_init_types(); /* FIXME: error checking! */
     autogenerated_tree_init_types(); /* FIXME: error checking! */
     autogenerated_variable_init_types(); /* FIXME: error checking! */
+    autogenerated_view_init_types(); /* FIXME: error checking! */
 
 
 
@@ -845,6 +847,7 @@ plugin_init (struct plugin_name_args *plugin_info,
     autogenerated_rtl_add_types(PyGcc_globals.module);
     autogenerated_tree_add_types(PyGcc_globals.module);
     autogenerated_variable_add_types(PyGcc_globals.module);
+    autogenerated_view_add_types(PyGcc_globals.module);
 
 
     /* Register at-exit finalization for the plugin: */
@@ -90,8 +90,41 @@ typedef struct PyGccWrapper
      */
      struct PyGccWrapper *wr_prev;
      struct PyGccWrapper *wr_next;
+
+     /*
+       The PyGccWrapperCache (if any) that maps from the wrapped pointer
+       to this object, so that we can remove the entry when this object
+       is deallocated:
+     */
+     struct PyGccWrapperCache *wr_cache;
+     void *wr_key;
 } PyGccWrapper;
 
+/*
+  A pointer-keyed hash table (using open addressing), mapping from the
+  address of a GCC object to the PyGccWrapper (if any) that currently wraps
+  it.
+
+  The table holds borrowed references: wrappers remove themselves from it
+  when they are deallocated, so that the table only contains the wrappers
+  that are still alive.
+
+  A zero-initialized PyGccWrapperCache is a valid empty table.
+*/
+struct PyGccWrapperCacheEntry
+{
+    void *key;
+    PyGccWrapper *wrapper; /* NULL for an empty slot */
+};
+
+typedef struct PyGccWrapperCache
+{
+    struct PyGccWrapperCacheEntry *entries;
+    size_t capacity; /* 0, or a power of two */
+    size_t num_live;
+    size_t num_used; /* live entries, plus deleted ones */
+} PyGccWrapperCache;
+
 /*
   PyTypeObject subclass for PyGccWrapper, adding a GC-marking callback:
  */
@@ -127,6 +160,21 @@ PyGccWrapper_Track(PyGccWrapper *obj);
 extern void
 PyGccWrapper_Dealloc(PyObject *obj);
 
+/*
+  Get the live wrapper for "key" within "cache" as a borrowed reference, or
+  NULL if there isn't one.  This never allocates memory.
+*/
+extern PyGccWrapper *
+PyGccWrapperCache_Lookup(PyGccWrapperCache *cache, void *key);
+
+/*
+  Add "wrapper" to "cache" under "key"; the wrapper will remove itself when
+  it is deallocated.  Returns 0 on success, or -1 with an exception set.
+*/
+extern int
+PyGccWrapperCache_Insert(PyGccWrapperCache *cache, void *key,
+                         PyGccWrapper *wrapper);
+
 extern PyTypeObject PyGccWrapperMeta_TypeObj;
 /*
   Macro DECLARE_SIMPLE_WRAPPER():
@@ -321,12 +369,20 @@ PyGcc_autogenerated_tree_type_for_tree(gcc_tree t, int borrow_ref);
 PyGccWrapperTypeObject*
 PyGcc_autogenerated_tree_type_for_tree_code(enum tree_code code, int borrow_ref);
 
+/* The number of tree codes that have a wrapper type (the valid codes for
+   the above): */
+extern const int PyGcc_autogenerated_num_tree_codes;
+
 extern PyGccWrapperTypeObject PyGccComponentRef_TypeObj;
 
 /* autogenerated-variable.c */
 int autogenerated_variable_init_types(void);
 void autogenerated_variable_add_types(PyObject *m);
 
+/* autogenerated-view.c */
+int autogenerated_view_init_types(void);
+void autogenerated_view_add_types(PyObject *m);
+
 
 PyObject *
 PyGccStringOrNone(const char *str_or_null);
@@ -358,11 +414,11 @@ PyGcc_int_from_double_int(double_int di, bool is_unsigned);
 #endif
 
 PyObject *
-PyGcc_LazilyCreateWrapper(PyObject **cache,
+PyGcc_LazilyCreateWrapper(PyGccWrapperCache *cache,
 				 void *ptr,
 				 PyObject *(*ctor)(void *ptr));
 int
-PyGcc_insert_new_wrapper_into_cache(PyObject **cache,
+PyGcc_insert_new_wrapper_into_cache(PyGccWrapperCache *cache,
                                          void *ptr,
                                          PyObject *obj);
 
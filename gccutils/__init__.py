@@ -15,6 +15,8 @@
 #   along with this program.  If not, see
 #   <http://www.gnu.org/licenses/>.
 
+import functools
+
 import gcc
 
 def sorted_dict_repr(d):
@@ -33,9 +35,78 @@ def get_field_by_name(typeobj, name):
         if field.name == name:
             return field
 
+class GlobalScopeIndex(object):
+    """
+    Dicts mapping from names to the gcc.TypeDecl and gcc.VarDecl instances
+    within the global scope of all of the translation units, so that we don't
+    have to scan through all of the decls on every lookup (a Python.h
+    translation unit has tens of thousands of them)
+    """
+    def __init__(self, units):
+        self.typedefs = {}
+        self.vardecls = {}
+        for u in units:
+            for v in u.block.vars:
+                # The first match wins, as it did with a linear scan:
+                if isinstance(v, gcc.TypeDecl):
+                    self.typedefs.setdefault(v.name, v)
+                elif isinstance(v, gcc.VarDecl):
+                    self.vardecls.setdefault(v.name, v)
+
+_global_scope_index = None
+
+# Caches of the memoize_per_unit functions:
+_per_unit_caches = []
+
+def get_global_scope_index():
+    """
+    Get the GlobalScopeIndex for the current compilation, building it on
+    first use.  Returns None if it can't be built (yet): if we're still
+    parsing, or if we're compiling C++
+    """
+    global _global_scope_index
+    if _global_scope_index is None:
+        units = gcc.get_translation_units()
+        if not units:
+            return None
+        for u in units:
+            if u.language.startswith('GNU C++') or not u.block:
+                return None
+        _global_scope_index = GlobalScopeIndex(units)
+    return _global_scope_index
+
+def memoize_per_unit(fn):
+    """
+    Decorator for functions that look things up within the global scope,
+    caching their results until the end of the translation unit (once the
+    global scope is complete)
+    """
+    cache = {}
+    _per_unit_caches.append(cache)
+    @functools.wraps(fn)
+    def wrapper(*args):
+        if args in cache:
+            return cache[args]
+        result = fn(*args)
+        if get_global_scope_index() is not None:
+            cache[args] = result
+        return result
+    return wrapper
+
+def _on_finish_unit():
+    global _global_scope_index
+    _global_scope_index = None
+    for cache in _per_unit_caches:
+        cache.clear()
+
+gcc.register_callback(gcc.PLUGIN_FINISH_UNIT, _on_finish_unit)
+
 def get_global_typedef(name):
     # Look up a typedef in global scope by name, returning a gcc.TypeDecl,
     # or None if not found
+    index = get_global_scope_index()
+    if index is not None:
+        return index.typedefs.get(name)
     for u in gcc.get_translation_units():
         if u.language.startswith('GNU C++'):
             gns = gcc.get_global_namespace()
@@ -55,6 +126,9 @@ def get_variables_as_dict():
 def get_global_vardecl_by_name(name):
     # Look up a variable in global scope by name, returning a gcc.VarDecl,
     # or None if not found
+    index = get_global_scope_index()
+    if index is not None:
+        return index.vardecls.get(name)
     for u in gcc.get_translation_units():
         if u.language == 'GNU C++':
             gns = gcc.get_global_namespace()
@@ -357,10 +431,10 @@ class CfgPrettyPrinter(DotPrettyPrinter):
         result = '<font face="monospace"><table cellborder="0" border="0" cellspacing="0">\n'
         result += '<tr> <td>BLOCK %i</td> <td></td> </tr>\n' % bb.index
         curloc = None
-        if isinstance(bb.phi_nodes, list):
+        if bb.phi_nodes:
             for stmtidx, phi in enumerate(bb.phi_nodes):
                 result += '<tr><td></td>' + self.stmt_to_html(phi, stmtidx) + '</tr>\n'
-        if isinstance(bb.gimple, list) and bb.gimple != []:
+        if bb.gimple:
             for stmtidx, stmt in enumerate(bb.gimple):
                 if curloc != stmt.loc:
                     curloc = stmt.loc
@@ -32,7 +32,8 @@ class StmtGraph(Graph):
                  'exit_of_bb',
                  'node_for_stmt',
                  '__lastnode',
-                 'supernode_for_stmtnode')
+                 'supernode_for_stmtnode',
+                 '_cyclic_bb_edges')
 
     def __init__(self, fun, split_phi_nodes, omit_complex_edges=False):
         """
@@ -57,6 +58,7 @@ class StmtGraph(Graph):
         self.entry_of_bb = {}
         self.exit_of_bb = {}
         self.node_for_stmt = {}
+        self._cyclic_bb_edges = None
 
         basic_blocks = fun.cfg.basic_blocks
 
@@ -167,6 +169,67 @@ class StmtGraph(Graph):
         bb = self.fun.cfg.get_block_for_label(labeldecl)
         return self.entry_of_bb[bb]
 
+    def get_cyclic_bb_edges(self):
+        """
+        Get a frozenset of (src index, dest index) pairs of gcc.BasicBlock
+        indices, for those edges between basic blocks that lie on a cycle
+        within this graph, and hence can be followed more than once by a
+        path through it
+        """
+        if self._cyclic_bb_edges is not None:
+            return self._cyclic_bb_edges
+
+        # Find the strongly-connected components, using an iterative
+        # version of Tarjan's algorithm; scc_of_node maps from each node
+        # to the root node of its component:
+        index_of_node = {}
+        lowlink = {}
+        scc_of_node = {}
+        stack = []
+        onstack = set()
+        for root in self.nodes:
+            if root in index_of_node:
+                continue
+            index_of_node[root] = lowlink[root] = len(index_of_node)
+            stack.append(root)
+            onstack.add(root)
+            work = [(root, iter(root.succs))]
+            while work:
+                node, succs = work[-1]
+                for edge in succs:
+                    child = edge.dstnode
+                    if child not in index_of_node:
+                        index_of_node[child] = lowlink[child] = len(index_of_node)
+                        stack.append(child)
+                        onstack.add(child)
+                        work.append((child, iter(child.succs)))
+                        break
+                    elif child in onstack:
+                        lowlink[node] = min(lowlink[node], index_of_node[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index_of_node[node]:
+                        while True:
+                            member = stack.pop()
+                            onstack.remove(member)
+                            scc_of_node[member] = node
+                            if member is node:
+                                break
+
+        result = set()
+        for edge in self.edges:
+            src_bb = edge.srcnode.bb
+            dest_bb = edge.dstnode.bb
+            if src_bb is None or dest_bb is None or src_bb == dest_bb:
+                continue
+            if scc_of_node[edge.srcnode] is scc_of_node[edge.dstnode]:
+                result.add((src_bb.index, dest_bb.index))
+        self._cyclic_bb_edges = frozenset(result)
+        return self._cyclic_bb_edges
+
 class StmtNode(Node):
     __slots__ = ('fun', 'bb', 'stmt')
 
@@ -88,11 +88,11 @@ def generate_callgraph_node():
     getsettable.add_gsdef('callees',
                           'PyGccCallgraphNode_get_callees',
                           None,
-                          'The function calls made by this function, as a list of gcc.CallgraphEdge')
+                          'The function calls made by this function, as a sequence of gcc.CallgraphEdge')
     getsettable.add_gsdef('callers',
                           'PyGccCallgraphNode_get_callers',
                           None,
-                          'The places that call this function, as a list of gcc.CallgraphEdge')
+                          'The places that call this function, as a sequence of gcc.CallgraphEdge')
     cu.add_defn(getsettable.c_defn())
 
     # see gcc/cgraph.c: dump_cgraph_node (FILE *f, struct cgraph_node *node)
@@ -93,19 +93,19 @@ def generate_basic_block():
                                    [PyGetSetDef('preds',
                                                 'PyGccBasicBlock_get_preds',
                                                 None,
-                                                'The list of predecessor gcc.Edge instances leading into this block'),
+                                                'The sequence of predecessor gcc.Edge instances leading into this block'),
                                     PyGetSetDef('succs',
                                                 'PyGccBasicBlock_get_succs',
                                                 None,
-                                                'The list of successor gcc.Edge instances leading out of this block'),
+                                                'The sequence of successor gcc.Edge instances leading out of this block'),
                                     PyGetSetDef('gimple',
                                                 'PyGccBasicBlock_get_gimple',
                                                 None,
-                                                'The list of gcc.Gimple instructions, if appropriate for this pass, or None'),
+                                                'The sequence of gcc.Gimple instructions, if appropriate for this pass, or None'),
                                     PyGetSetDef('phi_nodes',
                                                 'PyGccBasicBlock_get_phi_nodes',
                                                 None,
-                                                'The list of gcc.GimplePhi phoney functions, if appropriate for this pass, or None'),
+                                                'The sequence of gcc.GimplePhi phoney functions, if appropriate for this pass, or None'),
                                     PyGetSetDef('rtl',
                                                 'PyGccBasicBlock_get_rtl',
                                                 None,
@@ -146,7 +146,7 @@ def generate_cfg():
                                    [PyGetSetDef('basic_blocks',
                                                 'PyGccCfg_get_basic_blocks',
                                                 None,
-                                                'The list of gcc.BasicBlock instances in this graph'),
+                                                'The sequence of gcc.BasicBlock instances in this graph'),
                                     PyGetSetDef('entry',
                                                 cu.add_simple_getter('PyGccCfg_get_entry',
                                                                      'PyGccCfg',
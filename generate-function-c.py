@@ -83,11 +83,91 @@ def generate_function():
                           tp_richcompare = 'PyGccFunction_richcompare',
                           tp_getset = getsettable.identifier,
                                     )
+    methods = PyMethodTable('PyGccFunction_methods', [])
+    methods.add_method('snapshot',
+                       '(PyCFunction)PyGccFunction_snapshot',
+                       'METH_NOARGS',
+                       "Export the blocks, edges and statements of this function as a gcc.FunctionSnapshot (or None for early passes)")
+    methods.add_method('walk_tree',
+                       '(PyCFunction)PyGccFunction_walk_tree',
+                       'METH_VARARGS | METH_KEYWORDS',
+                       "Visit all gcc.Tree nodes associated with the statements of this function")
+    cu.add_defn(methods.c_defn())
+    pytype.tp_methods = methods.identifier
+
+    cu.add_defn(pytype.c_defn())
+    modinit_preinit += pytype.c_invoke_type_ready()
+    modinit_postinit += pytype.c_invoke_add_to_module()
+
+def generate_function_snapshot():
+    #
+    # Generate the gcc.FunctionSnapshot class:
+    #
+    global modinit_preinit
+    global modinit_postinit
+    getsettable = PyGetSetDefTable('PyGccFunctionSnapshot_getset_table', [],
+                                   identifier_prefix='PyGccFunctionSnapshot',
+                                   typename='struct PyGccFunctionSnapshot')
+    for name, doc in (('function',
+                       'The gcc.Function that this is a snapshot of'),
+                      ('block_index',
+                       'array.array of the index of each block'),
+                      ('succ_offsets',
+                       'array.array of offsets into succ_dest and succ_flags, one per block, plus one at the end'),
+                      ('succ_dest',
+                       'array.array of the position (not the index) of the destination block of each successor edge'),
+                      ('succ_flags',
+                       'array.array of the flags of each successor edge'),
+                      ('stmt_offsets',
+                       'array.array of offsets into the statement arrays, one per block, plus one at the end'),
+                      ('stmt_kind',
+                       'array.array of the position within "kinds" of the class of each statement'),
+                      ('kinds',
+                       'Tuple of the gcc.Gimple subclasses of the statements'),
+                      ('callee',
+                       'array.array of the position within "callee_names" of the name of the function called by each statement, or -1'),
+                      ('callee_names',
+                       'Tuple of the names of the functions called'),
+                      ('file',
+                       'array.array of the position within "files" of the source file of each statement, or -1'),
+                      ('files',
+                       'Tuple of the names of the source files'),
+                      ('line',
+                       'array.array of the source line of each statement, or 0'),
+                      ('column',
+                       'array.array of the source column of each statement, or 0')):
+        getsettable.add_simple_getter(cu,
+                                      name,
+                                      'PyGccFunctionSnapshot_get_field(self->%s)' % name,
+                                      doc)
+    cu.add_defn(getsettable.c_defn())
+
+    methods = PyMethodTable('PyGccFunctionSnapshot_methods', [])
+    methods.add_method('block',
+                       '(PyCFunction)PyGccFunctionSnapshot_block',
+                       'METH_VARARGS',
+                       "Get the gcc.BasicBlock at the given position")
+    methods.add_method('stmt',
+                       '(PyCFunction)PyGccFunctionSnapshot_stmt',
+                       'METH_VARARGS',
+                       "Get the gcc.Gimple at the given position")
+    cu.add_defn(methods.c_defn())
+
+    pytype = PyGccWrapperTypeObject(identifier = 'PyGccFunctionSnapshot_TypeObj',
+                          localname = 'FunctionSnapshot',
+                          tp_name = 'gcc.FunctionSnapshot',
+                          struct_name = 'PyGccFunctionSnapshot',
+                          tp_new = 'NULL',
+                          tp_dealloc = 'PyGccFunctionSnapshot_dealloc',
+                          tp_getset = getsettable.identifier,
+                          tp_methods = methods.identifier,
+                          )
     cu.add_defn(pytype.c_defn())
     modinit_preinit += pytype.c_invoke_type_ready()
     modinit_postinit += pytype.c_invoke_add_to_module()
 
 generate_function()
+generate_function_snapshot()
 
 cu.add_defn("""
 int autogenerated_function_init_types(void)
@@ -651,6 +651,12 @@ def generate_tree_code_classes():
         cu.add_defn('    &PyGcc%s_TypeObj, /* %s */\n' % (tree_type.camel_cased_string(), tree_type.SYM))
     cu.add_defn('};\n\n')
 
+    # (this can be fewer than MAX_TREE_CODES, as tree-types.txt doesn't
+    # list every code, e.g. END_OF_BASE_TREE_CODES):
+    cu.add_defn('/* The number of entries in pytype_for_tree_code */\n')
+    cu.add_defn('const int PyGcc_autogenerated_num_tree_codes =\n'
+                '    sizeof(pytype_for_tree_code) / sizeof(pytype_for_tree_code[0]);\n\n')
+
     cu.add_defn('\n/* Map from PyGccWrapperTypeObject* to GCC tree codes*/\n')
     cu.add_defn('int \n')
     cu.add_defn('PyGcc_tree_type_object_as_tree_code(PyObject *cls, enum tree_code *out)\n')
@@ -671,7 +677,7 @@ PyGcc_autogenerated_tree_type_for_tree_code(enum tree_code code, int borrow_ref)
     PyGccWrapperTypeObject *result;
 
     assert(code >= 0);
-    assert(code < MAX_TREE_CODES);
+    assert(code < PyGcc_autogenerated_num_tree_codes);
 
     result = pytype_for_tree_code[code];
 
@@ -0,0 +1,106 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+from cpybuilder import *
+from wrapperbuilder import PyGccWrapperTypeObject
+
+cu = CompilationUnit()
+cu.add_include('gcc-python.h')
+cu.add_include('gcc-python-wrappers.h')
+cu.add_include('gcc-plugin.h')
+
+modinit_preinit = ''
+modinit_postinit = ''
+
+def generate_sequence_view():
+    #
+    # Generate the gcc.SequenceView class:
+    #
+    global modinit_preinit
+    global modinit_postinit
+
+    sequence_methods = PySequenceMethods('PyGccSequenceView_sequence_methods')
+    sequence_methods.sq_length = 'PyGccSequenceView_len'
+    sequence_methods.sq_item = 'PyGccSequenceView_item'
+    cu.add_defn(sequence_methods.c_defn())
+
+    mapping_methods = PyMappingMethods('PyGccSequenceView_mapping_methods')
+    mapping_methods.mp_length = 'PyGccSequenceView_len'
+    mapping_methods.mp_subscript = 'PyGccSequenceView_subscript'
+    cu.add_defn(mapping_methods.c_defn())
+
+    # (for "view + list", and "list + view"):
+    number_methods = PyNumberMethods('PyGccSequenceView_number_methods')
+    number_methods.nb_add = 'PyGccSequenceView_add'
+    cu.add_defn(number_methods.c_defn())
+
+    pytype = PyGccWrapperTypeObject(identifier = 'PyGccSequenceView_TypeObj',
+                          localname = 'SequenceView',
+                          tp_name = 'gcc.SequenceView',
+                          tp_dealloc = 'PyGccSequenceView_dealloc',
+                          struct_name = 'PyGccSequenceView',
+                          tp_new = 'NULL',
+                          tp_repr = 'PyGccSequenceView_repr',
+                          tp_as_number = '&%s' % number_methods.identifier,
+                          tp_as_sequence = '&%s' % sequence_methods.identifier,
+                          tp_as_mapping = '&%s' % mapping_methods.identifier,
+                          tp_hash = 'PyObject_HashNotImplemented',
+                          tp_richcompare = 'PyGccSequenceView_richcompare',
+                          tp_iter = 'PyGccSequenceView_iter',
+                          )
+    cu.add_defn(pytype.c_defn())
+    modinit_preinit += pytype.c_invoke_type_ready()
+    modinit_postinit += pytype.c_invoke_add_to_module()
+
+    #
+    # Generate the gcc.SequenceViewIterator class:
+    #
+    pytype = PyTypeObject(identifier = 'PyGccSequenceViewIterator_TypeObj',
+                          localname = 'SequenceViewIterator',
+                          tp_name = 'gcc.SequenceViewIterator',
+                          struct_name = 'struct PyGccSequenceViewIterator',
+                          tp_new = 'NULL',
+                          tp_dealloc = 'PyGccSequenceViewIterator_dealloc',
+                          tp_iter = 'PyObject_SelfIter',
+                          tp_iternext = 'PyGccSequenceViewIterator_iternext',
+                          )
+    cu.add_defn(pytype.c_defn())
+    modinit_preinit += pytype.c_invoke_type_ready()
+    modinit_postinit += pytype.c_invoke_add_to_module()
+
+generate_sequence_view()
+
+cu.add_defn("""
+int autogenerated_view_init_types(void)
+{
+""" + modinit_preinit + """
+    return 1;
+
+error:
+    return 0;
+}
+""")
+
+cu.add_defn("""
+void autogenerated_view_add_types(PyObject *m)
+{
+""" + modinit_postinit + """
+}
+""")
+
+
+
+print(cu.as_str())
@@ -399,3 +399,36 @@ class PyArgParseFmt(ParsedFormatString):
             raise MismatchedParentheses(fmt_string)
 
         return result
+
+# If "PY_SSIZE_T_CLEAN" is defined before #include <Python.h>, then
+# the preprocessor is actually turning these into "_SizeT"-suffixed
+# variants, which handle some format codes differently
+
+# FIXME: should we report the name as seen by the compiler?
+# It doesn't appear in the CPython API docs
+register_callsite_checker('PyArg_ParseTuple',
+                          FormatStringChecker(PyArgParseFmt,
+                                              'PyArg_ParseTuple',
+                                              1, 2, False))
+register_callsite_checker('_PyArg_ParseTuple_SizeT',
+                          FormatStringChecker(PyArgParseFmt,
+                                              'PyArg_ParseTuple',
+                                              1, 2, True))
+register_callsite_checker('PyArg_Parse',
+                          FormatStringChecker(PyArgParseFmt,
+                                              'PyArg_Parse',
+                                              1, 2, False))
+register_callsite_checker('_PyArg_Parse_SizeT',
+                          FormatStringChecker(PyArgParseFmt,
+                                              'PyArg_Parse',
+                                              1, 2, True))
+register_callsite_checker('PyArg_ParseTupleAndKeywords',
+                          FormatStringChecker(PyArgParseFmt,
+                                              'PyArg_ParseTupleAndKeywords',
+                                              2, 4, False,
+                                              keywords_idx=3))
+register_callsite_checker('_PyArg_ParseTupleAndKeywords_SizeT',
+                          FormatStringChecker(PyArgParseFmt,
+                                              'PyArg_ParseTupleAndKeywords',
+                                              2, 4, True,
+                                              keywords_idx=3))
@@ -104,6 +104,8 @@ class AnyPyObjectPtr(AwkwardType):
     """
     For use when we expect PyObject*, or any subclass
     """
+    has_callsite_state = False
+
     def is_compatible(self, actual_type, actual_arg):
         # We expect a pointer to a PyObject*, or any subclass:
         from libcpychecker.refcounts import type_is_pyobjptr_subclass
@@ -282,3 +284,12 @@ class PyBuildValueFmt(ParsedFormatString):
         #pprint(result.args)
         
         return result
+
+register_callsite_checker('Py_BuildValue',
+                          FormatStringChecker(PyBuildValueFmt,
+                                              'Py_BuildValue',
+                                              0, 1, False))
+register_callsite_checker('Py_BuildValue_SizeT',
+                          FormatStringChecker(PyBuildValueFmt,
+                                              'Py_BuildValue',
+                                              0, 1, True))
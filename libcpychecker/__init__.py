@@ -16,17 +16,29 @@
 #   <http://www.gnu.org/licenses/>.
 
 from __future__ import print_function
+import os
 import sys
 import gcc
 from libcpychecker.formatstrings import check_pyargs
 from libcpychecker.utils import log
-from libcpychecker.refcounts import check_refcounts, get_traces
 from libcpychecker.attributes import register_our_attributes
-from libcpychecker.initializers import check_initializers
 from libcpychecker.types import get_PyObject
 if hasattr(gcc, 'PLUGIN_FINISH_DECL'):
     from libcpychecker.compat import on_finish_decl
 
+# Every compilation starts a fresh interpreter, so only the modules needed
+# for the options in use are imported.  In particular, the refcount checker
+# (and the HTML reports that it can write) are only imported once it's
+# enabled, so these wrappers import it when they're first called:
+
+def check_refcounts(*args, **kwargs):
+    from libcpychecker.refcounts import check_refcounts
+    return check_refcounts(*args, **kwargs)
+
+def get_traces(*args, **kwargs):
+    from libcpychecker.refcounts import get_traces
+    return get_traces(*args, **kwargs)
+
 class CpyCheckerGimplePass(gcc.GimplePass):
     """
     The custom pass that implements the per-function part of
@@ -41,6 +53,15 @@ class CpyCheckerGimplePass(gcc.GimplePass):
                  only_on_python_code=True,
                  maxtrans=256,
                  dump_json=False,
+                 merge_states=False,
+                 cache_dir=None,
+                 jobs=1,
+                 function_summaries=False,
+                 max_cpu_secs=None,
+                 max_states=None,
+                 max_bytes=None,
+                 stats_json=False,
+                 reports='html',
                  verbose=False):
         gcc.GimplePass.__init__(self, 'cpychecker-gimple')
         self.dump_traces = dump_traces
@@ -60,10 +81,51 @@ class CpyCheckerGimplePass(gcc.GimplePass):
             self.verify_refcounting = False
         else:
             self.verify_refcounting = verify_refcounting
+        if self.verify_refcounting:
+            # Import the refcount checker now, rather than within each of
+            # the child processes when checking functions in parallel:
+            import libcpychecker.refcounts
         self.show_possible_null_derefs = show_possible_null_derefs
         self.only_on_python_code = only_on_python_code
         self.maxtrans = maxtrans
         self.dump_json = dump_json
+        self.merge_states = merge_states
+        self.cache_dir = cache_dir
+        self.function_summaries = function_summaries
+        self.max_cpu_secs = max_cpu_secs
+        self.max_states = max_states
+        self.max_bytes = max_bytes
+
+        # Optionally record the time taken to check each function, to be
+        # written out by CpyCheckerIpaPass:
+        if stats_json:
+            from libcpychecker.instrumentation import TranslationUnitStats
+            self.tu_stats = TranslationUnitStats()
+        else:
+            self.tu_stats = None
+
+        # Optionally gather the problems found in every function into one
+        # bundle, to be written out at the end of the translation unit:
+        self.reports = reports
+        self.tu_reports = None
+        if self.verify_refcounting:
+            from libcpychecker.reports import TranslationUnitReports, \
+                policy_writes_json
+            if policy_writes_json(reports):
+                self.tu_reports = TranslationUnitReports()
+
+        # Optionally check functions in parallel, in child processes (the
+        # traces can only be shown or dumped, and the timings recorded,
+        # from within this process):
+        self.pool = None
+        if jobs != 1 and self.verify_refcounting:
+            from libcpychecker.parallel import FunctionPool, \
+                get_default_num_jobs
+            if jobs == 0:
+                jobs = get_default_num_jobs()
+            if (jobs > 1 and hasattr(os, 'fork')
+                and not (dump_traces or show_traces or stats_json)):
+                self.pool = FunctionPool(jobs, on_result=self._on_pool_result)
 
     def execute(self, fun):
         if fun:
@@ -95,10 +157,32 @@ class CpyCheckerGimplePass(gcc.GimplePass):
                     self._check_refcounts(fun)
 
     def _check_refcounts(self, fun):
+        if self.pool:
+            # The diagnostics are emitted by CpyCheckerIpaPass:
+            self.pool.submit(fun, self._check_refcounts_with_sink)
+        else:
+            self._check_refcounts_with_sink(fun, None)
+
+    def _check_refcounts_with_sink(self, fun, result_sink):
+        from libcpychecker.refcounts import check_refcounts
         check_refcounts(fun, self.dump_traces, self.show_traces,
                         self.show_possible_null_derefs,
                         maxtrans=self.maxtrans,
-                        dump_json=self.dump_json)
+                        dump_json=self.dump_json,
+                        merge_states=self.merge_states,
+                        cache_dir=self.cache_dir,
+                        result_sink=result_sink,
+                        function_summaries=self.function_summaries,
+                        max_cpu_secs=self.max_cpu_secs,
+                        max_states=self.max_states,
+                        max_bytes=self.max_bytes,
+                        tu_stats=self.tu_stats,
+                        reports=self.reports,
+                        tu_reports=self.tu_reports)
+
+    def _on_pool_result(self, result):
+        if self.tu_reports and result.record:
+            self.tu_reports.add(result.record)
 
 
 class CpyCheckerIpaPass(gcc.SimpleIpaPass):
@@ -106,11 +190,20 @@ class CpyCheckerIpaPass(gcc.SimpleIpaPass):
     The custom pass that implements the whole-program part of
     our extra compile-time checks
     """
-    def __init__(self):
+    def __init__(self, pool=None, tu_stats=None):
         gcc.SimpleIpaPass.__init__(self, 'cpychecker-ipa')
+        self.pool = pool
+        self.tu_stats = tu_stats
 
     def execute(self):
+        if self.pool:
+            # Every function has been through CpyCheckerGimplePass by now,
+            # and their bodies are still available:
+            self.pool.join()
+        from libcpychecker.initializers import check_initializers
         check_initializers()
+        if self.tu_stats:
+            self.tu_stats.write_json()
 
 def main(**kwargs):
     # Register our custom attributes:
@@ -119,8 +212,13 @@ def main(**kwargs):
 
     # Hook for GCC 4.7 and later:
     if hasattr(gcc, 'PLUGIN_FINISH_DECL'):
+        # Only call into Python for the declarations that on_finish_decl
+        # is interested in:
         gcc.register_callback(gcc.PLUGIN_FINISH_DECL,
-                              on_finish_decl)
+                              on_finish_decl,
+                              filter_types=gcc.VarDecl,
+                              filter_prefixes='PyExc_',
+                              filter_suffixes='_Type')
 
     # Register our GCC passes:
     gimple_ps = CpyCheckerGimplePass(**kwargs)
@@ -131,5 +229,12 @@ def main(**kwargs):
         # SSA version:
         gimple_ps.register_after('ssa')
 
-    ipa_ps = CpyCheckerIpaPass()
+    ipa_ps = CpyCheckerIpaPass(gimple_ps.pool, gimple_ps.tu_stats)
     ipa_ps.register_before('*free_lang_data')
+
+    # Write out the bundle of reports once every function has been checked
+    # (and CpyCheckerIpaPass has gathered the results of any child
+    # processes):
+    if gimple_ps.tu_reports is not None:
+        gcc.register_callback(gcc.PLUGIN_FINISH_UNIT,
+                              gimple_ps.tu_reports.write_bundle)
@@ -19,16 +19,25 @@ import gcc
 import gccutils
 import re
 import sys
+import weakref
 from io import StringIO
 
 from gccutils import get_src_for_loc, get_nonnull_arguments, check_isinstance
 from gccutils.graph.stmtgraph import StmtGraph, StmtNode
 
 from collections import OrderedDict
-from libcpychecker.utils import log, logging_enabled
+from libcpychecker.deltamap import DeltaMap
+from libcpychecker import utils
+from libcpychecker.utils import log
 from libcpychecker.types import *
 from libcpychecker.diagnostics import location_as_json, type_as_json
 
+try:
+    from time import process_time
+except ImportError:
+    # Python 2:
+    from time import clock as process_time
+
 debug_comparisons = 0
 
 numeric_types = (int, float)
@@ -213,6 +222,16 @@ class AbstractValue(object):
         # Empty for the base class
         return dict()
 
+    def merge_key(self):
+        """
+        Get a hashable key for this value, for use when merging equivalent
+        States at join points.  Values that only differ in where they came
+        from (self.loc) have equal keys.  Values created by a SplitValue are
+        treated differently when dereferenced, so they have different keys.
+        """
+        # Subclasses with additional state should extend this:
+        return (self.__class__, self.gcctype, hasattr(self, 'fromsplit'))
+
     def is_null_ptr(self):
         """
         Is this AbstractValue *definitely* a NULL pointer?
@@ -231,7 +250,8 @@ class AbstractValue(object):
 
         from libcpychecker.refcounts import type_is_pyobjptr_subclass
         if type_is_pyobjptr_subclass(returntype):
-            log('Invocation of function pointer returning PyObject * (or subclass)')
+            if utils.logging_enabled:
+                log('Invocation of function pointer returning PyObject * (or subclass)')
             # Assume that all such functions either:
             #   - return a new reference, or
             #   - return NULL and set an exception (e.g. MemoryError)
@@ -360,7 +380,8 @@ def eval_binop(exprcode, a, b, rhsvalue):
     Evaluate a gcc exprcode on a pair of Python values (as opposed to
     AbstractValue instances)
     """
-    log('eval_binop(%s, %s, %s)', exprcode, a, b)
+    if utils.logging_enabled:
+        log('eval_binop(%s, %s, %s)', exprcode, a, b)
     assert isinstance(a, numeric_types)
     assert isinstance(b, numeric_types)
     assert isinstance(rhsvalue, AbstractValue)
@@ -406,7 +427,8 @@ def eval_binop(exprcode, a, b, rhsvalue):
         err = sys.exc_info()[1]
         isdefinite = not hasattr(rhsvalue, 'fromsplit')
         raise PredictedArithmeticError(err, rhsvalue, isdefinite)
-    log('result: %s', result)
+    if utils.logging_enabled:
+        log('result: %s', result)
     assert isinstance(result, numeric_types)
     return result
 
@@ -450,6 +472,9 @@ class ConcreteValue(AbstractValue):
     def json_fields(self, state):
         return dict(value=self.value)
 
+    def merge_key(self):
+        return AbstractValue.merge_key(self) + (self.value, )
+
     def is_null_ptr(self):
         if isinstance(self.gcctype, gcc.PointerType):
             return self.value == 0
@@ -511,7 +536,8 @@ class ConcreteValue(AbstractValue):
 
     @dump_comparison
     def eval_comparison(self, opname, rhs, rhsdesc):
-        log('ConcreteValue.eval_comparison(%s, %s%s)', self, opname, rhs)
+        if utils.logging_enabled:
+            log('ConcreteValue.eval_comparison(%s, %s%s)', self, opname, rhs)
         if isinstance(rhs, ConcreteValue):
             return raw_comparison(self.value, opname, rhs.value)
         elif isinstance(rhs, WithinRange):
@@ -751,6 +777,9 @@ class WithinRange(AbstractValue):
         return dict(minvalue=self.minvalue,
                     maxvalue=self.maxvalue)
 
+    def merge_key(self):
+        return AbstractValue.merge_key(self) + (self.minvalue, self.maxvalue)
+
     def eval_unary_op(self, exprcode, gcctype, loc):
         if exprcode == gcc.AbsExpr:
             values = [abs(val)
@@ -821,7 +850,8 @@ class WithinRange(AbstractValue):
 
     @dump_comparison
     def eval_comparison(self, opname, rhs, rhsdesc):
-        log('WithinRange.eval_comparison(%s, %s%s)', self, opname, rhs)
+        if utils.logging_enabled:
+            log('WithinRange.eval_comparison(%s, %s%s)', self, opname, rhs)
 
         # If it's the *same* value, it's equal to itself:
         if opname == 'eq':
@@ -916,16 +946,22 @@ class PointerToRegion(AbstractValue):
     def json_fields(self, state):
         return dict(target=self.region.as_json())
 
+    def merge_key(self):
+        return AbstractValue.merge_key(self) + (self.region.merge_key(), )
+
     def eval_comparison(self, opname, rhs, rhsdesc):
-        log('PointerToRegion.eval_comparison:(%s, %s%s)', self, opname, rhs)
+        if utils.logging_enabled:
+            log('PointerToRegion.eval_comparison:(%s, %s%s)', self, opname, rhs)
 
         if opname == 'eq':
             if isinstance(rhs, ConcreteValue) and rhs.value == 0:
-                log('ptr to region vs 0: %s is definitely not equal to %s', self, rhs)
+                if utils.logging_enabled:
+                    log('ptr to region vs 0: %s is definitely not equal to %s', self, rhs)
                 return False
 
             if isinstance(rhs, PointerToRegion):
-                log('comparing regions: %s %s', self, rhs)
+                if utils.logging_enabled:
+                    log('comparing regions: %s %s', self, rhs)
                 return self.region == rhs.region
 
             # We don't know:
@@ -1149,6 +1185,16 @@ class Region(object):
             return self.parent.is_on_stack()
         return False
 
+    def merge_key(self):
+        """
+        Get a hashable key identifying this region, so that regions created
+        independently along different paths (e.g. for the same variable) can
+        be matched up when merging States
+        """
+        if self.parent:
+            return (self.__class__, self.name, self.parent.merge_key())
+        return (self.__class__, self.name)
+
 class RegionForGlobal(Region):
     """
     Represents the area of memory (e.g. in .data or .bss section)
@@ -1167,6 +1213,9 @@ class RegionForGlobal(Region):
     def as_json(self):
         return str(self.vardecl)
 
+    def merge_key(self):
+        return (self.__class__, self.vardecl)
+
 class RegionOnStack(Region):
     def __repr__(self):
         return 'RegionOnStack(%r)' % self.name
@@ -1184,6 +1233,9 @@ class RegionForLocal(RegionOnStack):
     def as_json(self):
         return str(self.vardecl)
 
+    def merge_key(self):
+        return (self.__class__, self.vardecl)
+
 class RegionForStaticLocal(RegionForGlobal):
     # "static" locals work more like globals.  In particular, they're not on
     # the stack
@@ -1206,6 +1258,9 @@ class RegionOnHeap(Region):
     def __str__(self):
         return '%s allocated at %s' % (self.name, self.alloc_stmt.loc)
 
+    def merge_key(self):
+        return (self.__class__, self.name, self.alloc_stmt)
+
 
 class RegionForStringConstant(Region):
     """
@@ -1258,10 +1313,12 @@ class SplitValue(Exception):
                    '\n'.join([repr(alt) for alt in self.altvalues])))
 
     def split(self, state):
-        log('creating states for split of %s into %s', self.value, self.altvalues)
+        if utils.logging_enabled:
+            log('creating states for split of %s into %s', self.value, self.altvalues)
         result = []
         for altvalue, desc in zip(self.altvalues, self.descriptions):
-            log(' creating state for split where %s is %s', self.value, altvalue)
+            if utils.logging_enabled:
+                log(' creating state for split where %s is %s', self.value, altvalue)
             altvalue.fromsplit = True
 
             newstate = state.copy()
@@ -1269,7 +1326,8 @@ class SplitValue(Exception):
             for r in newstate.value_for_region:
                 # Replace instances of the value itself:
                 if newstate.value_for_region[r] is self.value:
-                    log('  replacing value for region %s with %s', r, altvalue)
+                    if utils.logging_enabled:
+                        log('  replacing value for region %s with %s', r, altvalue)
                     newstate.value_for_region[r] = altvalue
             result.append(Transition(state,
                                      newstate,
@@ -1299,6 +1357,29 @@ class Facet(object):
         # Concrete subclasses should implement this.
         raise NotImplementedError
 
+    def merge_key(self):
+        """
+        Get a hashable key for this facet, for use when merging equivalent
+        States.  Subclasses should override this; the default never compares
+        equal to another facet, and thus disables merging.
+        """
+        return self
+
+# Mapping from gcc.FunctionDecl to libcpychecker.summaries.FunctionSummary,
+# for the callees of the function being analyzed whose calls are modelled
+# using their summaries, or None:
+_callee_summaries = None
+
+def set_callee_summaries(summaries):
+    """
+    Set the mapping from gcc.FunctionDecl to FunctionSummary to be used at
+    call sites (or None), returning the previous value
+    """
+    global _callee_summaries
+    old = _callee_summaries
+    _callee_summaries = summaries
+    return old
+
 class State(object):
     """
     A Location with memory state, and zero or more additional "facets" of
@@ -1340,18 +1421,18 @@ class State(object):
         self.facets = facets
 
         # Mapping from VarDecl.name to Region:
-        if region_for_var:
-            check_isinstance(region_for_var, OrderedDict)
+        if region_for_var is not None:
+            check_isinstance(region_for_var, DeltaMap)
             self.region_for_var = region_for_var
         else:
-            self.region_for_var = OrderedDict()
+            self.region_for_var = DeltaMap()
 
         # Mapping from Region to AbstractValue:
-        if value_for_region:
-            check_isinstance(value_for_region, OrderedDict)
+        if value_for_region is not None:
+            check_isinstance(value_for_region, DeltaMap)
             self.value_for_region = value_for_region
         else:
-            self.value_for_region = OrderedDict()
+            self.value_for_region = DeltaMap()
 
         self.return_rvalue = return_rvalue
         self.has_returned = has_returned
@@ -1394,7 +1475,7 @@ class State(object):
         return result
 
     def log(self, logger):
-        if not logging_enabled:
+        if not utils.logging_enabled:
             return
         # Display data in tabular form:
         logger('%s', self.as_str_table())
@@ -1409,6 +1490,9 @@ class State(object):
             logger('%s', self.stmtnode.get_stmt().loc)
 
     def copy(self):
+        # The DeltaMap instances share their contents with the copies,
+        # so this is cheap; only the regions that are subsequently changed
+        # in either State use additional memory
         s_new = State(self.stmtgraph,
                       self.stmtnode,
                       self.lastgccloc,
@@ -1426,21 +1510,95 @@ class State(object):
             setattr(s_new, key, f_new)
         return s_new
 
+    def merge_key(self):
+        """
+        Get a hashable key for this State, such that two States with equal
+        keys will behave identically from here onwards, and thus only one of
+        them needs to be explored further, provided that the Traces leading
+        to them have followed the same edges within loops (see
+        Trace.merge_key)
+        """
+        def key_for_var(k):
+            if isinstance(k, Region):
+                return k.merge_key()
+            return k
+        vars = frozenset((key_for_var(k), r.merge_key())
+                         for k, r in self.region_for_var.items())
+        values = frozenset((r.merge_key(), v.merge_key())
+                           for r, v in self.value_for_region.items())
+        facets = tuple(getattr(self, key).merge_key()
+                       for key in sorted(self.facets))
+        if self.return_rvalue:
+            return_key = self.return_rvalue.merge_key()
+        else:
+            return_key = None
+        return (self.stmtnode, vars, values, return_key,
+                self.has_returned, self.not_returning,
+                hasattr(self, 'fromsplit'), facets)
+
+    # Rough sizes in bytes of a State (with its facets and the Transition
+    # leading to it), and of each entry that it changes in its mappings, for
+    # use by Limits:
+    APPROX_STATE_BYTES = 1024
+    APPROX_ENTRY_BYTES = 256
+
+    def get_approx_size(self):
+        """
+        Estimate how many bytes this State adds to the memory held by the
+        analysis, given that it shares the entries of its mappings that it
+        hasn't changed with the State it was copied from
+        """
+        num_changes = (len(self.region_for_var.changed_items())
+                       + len(self.value_for_region.changed_items()))
+        return self.APPROX_STATE_BYTES + num_changes * self.APPROX_ENTRY_BYTES
+
+    def widen(self, s_prev):
+        """
+        Replace any ranges of integer values that were set by the transition
+        from s_prev to this State with the full range of their type, so that
+        States that only differ in such values have equal merge keys.
+
+        The ranges within a State created by a SplitValue determine which
+        way the split goes, so they are left alone, and widened in the State
+        that follows it instead.
+
+        This loses precision, so it is only used once an analysis has
+        exceeded its budgets (see Limits)
+        """
+        if hasattr(self, 'fromsplit'):
+            return
+        regions = [region
+                   for region, value in self.value_for_region.changed_items()]
+        if hasattr(s_prev, 'fromsplit'):
+            regions += [region
+                        for region, value
+                        in s_prev.value_for_region.changed_items()]
+        for region in regions:
+            value = self.value_for_region[region]
+            if (isinstance(value, WithinRange)
+                and isinstance(value.gcctype, gcc.IntegerType)):
+                self.value_for_region[region] = \
+                    UnknownValue.make(value.gcctype, value.loc)
+
     def verify(self):
         """
         Perform self-tests to ensure sanity of this State
+
+        Only the values set since the State was copied are checked: the
+        rest were checked when they were set, in earlier States
         """
-        for k in self.value_for_region:
+        for k, v in self.value_for_region.changed_items():
             check_isinstance(k, Region)
-            if not isinstance(self.value_for_region[k], AbstractValue):
+            if not isinstance(v, AbstractValue):
                 raise TypeError('value for region %r is not an AbstractValue: %r'
-                                % (k, self.value_for_region[k]))
+                                % (k, v))
 
     def eval_lvalue(self, expr, loc):
         """
         Return the Region for the given expression
         """
-        log('eval_lvalue: %r %s', expr, expr)
+        if utils.logging_enabled:
+            log('eval_lvalue: %r %s', expr, expr)
         if loc:
             check_isinstance(loc, gcc.Location)
         if isinstance(expr, gcc.SsaName):
@@ -1465,14 +1623,16 @@ class State(object):
         elif isinstance(expr, gcc.MemRef):
             # Write through a pointer:
             dest_ptr = self.eval_rvalue(expr.operand, loc)
-            log('dest_ptr: %r', dest_ptr)
+            if utils.logging_enabled:
+                log('dest_ptr: %r', dest_ptr)
             self.raise_any_null_ptr_deref(expr, dest_ptr)
             if isinstance(dest_ptr, UnknownValue):
                 # Split into null/non-null pointers:
                 self.raise_split_value(dest_ptr)
             check_isinstance(dest_ptr, PointerToRegion)
             dest_region = dest_ptr.region
-            log('dest_region: %r', dest_region)
+            if utils.logging_enabled:
+                log('dest_region: %r', dest_region)
             return dest_region
         raise NotImplementedError('eval_lvalue: %r %s' % (expr, expr))
 
@@ -1481,7 +1641,8 @@ class State(object):
         Return the value for the given expression, as an AbstractValue
         FIXME: also as a Region?
         """
-        log('eval_rvalue: %r %s', expr, expr)
+        if utils.logging_enabled:
+            log('eval_rvalue: %r %s', expr, expr)
         if loc:
             check_isinstance(loc, gcc.Location)
 
@@ -1512,17 +1673,21 @@ class State(object):
             #check_isinstance(expr.field, gcc.FieldDecl)
             region = self.get_field_region(expr, loc)#.target, expr.field.name)
             check_isinstance(region, Region)
-            log('got field region for %s: %r', expr, region)
+            if utils.logging_enabled:
+                log('got field region for %s: %r', expr, region)
             try:
                 value = self.get_store(region, expr.type, loc)
-                log('got value: %r', value)
+                if utils.logging_enabled:
+                    log('got value: %r', value)
             except MissingValue:
                 value = UnknownValue.make(expr.type, loc)
-                log('no value; using: %r', value)
+                if utils.logging_enabled:
+                    log('no value; using: %r', value)
             check_isinstance(value, AbstractValue)
             return value
         if isinstance(expr, gcc.AddrExpr):
-            log('expr.operand: %r', expr.operand)
+            if utils.logging_enabled:
+                log('expr.operand: %r', expr.operand)
             lvalue = self.eval_lvalue(expr.operand, loc)
             check_isinstance(lvalue, Region)
             if isinstance(expr.operand.type, gcc.ArrayType):
@@ -1531,18 +1696,21 @@ class State(object):
             else:
                 return PointerToRegion(expr.type, loc, lvalue)
         if isinstance(expr, gcc.ArrayRef):
-            log('expr.array: %r', expr.array)
-            log('expr.index: %r', expr.index)
+            if utils.logging_enabled:
+                log('expr.array: %r', expr.array)
+                log('expr.index: %r', expr.index)
             lvalue = self.eval_lvalue(expr, loc)
             check_isinstance(lvalue, Region)
             rvalue = self.get_store(lvalue, expr.type, loc)
             check_isinstance(rvalue, AbstractValue)
             return rvalue
         if isinstance(expr, gcc.MemRef):
-            log('expr.operand: %r', expr.operand)
+            if utils.logging_enabled:
+                log('expr.operand: %r', expr.operand)
             opvalue = self.eval_rvalue(expr.operand, loc)
             check_isinstance(opvalue, AbstractValue)
-            log('opvalue: %r', opvalue)
+            if utils.logging_enabled:
+                log('opvalue: %r', opvalue)
             self.raise_any_null_ptr_deref(expr, opvalue)
             if isinstance(opvalue, UnknownValue):
                 # Split into null/non-null pointers:
@@ -1560,14 +1728,17 @@ class State(object):
         return UnknownValue.make(expr.type, loc) # FIXME
 
     def assign(self, lhs, rhs, loc):
-        log('assign(%r, %r)', lhs, rhs)
-        log('assign(%s, %s)', lhs, rhs)
+        if utils.logging_enabled:
+            log('assign(%r, %r)', lhs, rhs)
+            log('assign(%s, %s)', lhs, rhs)
         if loc:
             check_isinstance(loc, gcc.Location)
         dest_region = self.eval_lvalue(lhs, loc)
-        log('dest_region: %s %r', dest_region, dest_region)
+        if utils.logging_enabled:
+            log('dest_region: %s %r', dest_region, dest_region)
         value = self.eval_rvalue(rhs, loc)
-        log('value: %s %r', value, value)
+        if utils.logging_enabled:
+            log('value: %s %r', value, value)
         check_isinstance(value, AbstractValue)
         check_isinstance(dest_region, Region)
         self.value_for_region[dest_region] = value
@@ -1576,7 +1747,8 @@ class State(object):
         check_isinstance(var, (gcc.VarDecl, gcc.ParmDecl, gcc.ResultDecl, gcc.FunctionDecl))
         if var not in self.region_for_var:
             # Presumably a reference to a global variable:
-            log('adding region for global var: %r', var)
+            if utils.logging_enabled:
+                log('adding region for global var: %r', var)
             region = RegionForGlobal(var)
             # it is its own region:
             self.region_for_var[var] = region
@@ -1590,19 +1762,23 @@ class State(object):
         return self.region_for_var[var]
 
     def element_region(self, ar, loc):
-        log('element_region: %s', ar)
+        if utils.logging_enabled:
+            log('element_region: %s', ar)
         check_isinstance(ar, gcc.ArrayRef)
         if loc:
             check_isinstance(loc, gcc.Location)
 
-        log('  ar.array: %r', ar.array)
-        log('  ar.index: %r', ar.index)
+        if utils.logging_enabled:
+            log('  ar.array: %r', ar.array)
+            log('  ar.index: %r', ar.index)
         parent = self.eval_lvalue(ar.array, loc)
         check_isinstance(parent, Region)
-        log('  parent: %r', parent)
+        if utils.logging_enabled:
+            log('  parent: %r', parent)
         index = self.eval_rvalue(ar.index, loc)
         check_isinstance(index, AbstractValue)
-        log('  index: %r', index)
+        if utils.logging_enabled:
+            log('  index: %r', index)
         if isinstance(index, ConcreteValue):
             index = index.value
         return self._array_region(parent, index)
@@ -1610,23 +1786,27 @@ class State(object):
     def pointer_plus_region(self, stmt):
         # Cope with treating pointers as arrays.
         # The constant appears to be in bytes, rather than as units of the type
-        log('pointer_add_region')
+        if utils.logging_enabled:
+            log('pointer_add_region')
         assert stmt.exprcode == gcc.PointerPlusExpr
         rhs = stmt.rhs
         a = self.eval_rvalue(rhs[0], stmt.loc)
         b = self.eval_rvalue(rhs[1], stmt.loc)
-        log('a: %r', a)
-        log('b: %r', b)
+        if utils.logging_enabled:
+            log('a: %r', a)
+            log('b: %r', b)
         if isinstance(a, PointerToRegion) and isinstance(b, ConcreteValue):
             parent = a.region
-            log('%s', rhs[0].type)
-            log('%s', rhs[0].type.dereference)
+            if utils.logging_enabled:
+                log('%s', rhs[0].type)
+                log('%s', rhs[0].type.dereference)
             t = rhs[0].type.dereference
             if isinstance(t, gcc.VoidType):
                 index = b.value
             else:
                 sizeof = t.sizeof
-                log('%s', sizeof)
+                if utils.logging_enabled:
+                    log('%s', sizeof)
                 index = b.value // sizeof
             # Offset of zero? just reuse the existing pointer's region:
             if index == 0:
@@ -1641,15 +1821,18 @@ class State(object):
 
     def _array_region(self, parent, index):
         # Used by element_region, and pointer_add_region
-        log('_array_region(%s, %s)', parent, index)
+        if utils.logging_enabled:
+            log('_array_region(%s, %s)', parent, index)
         check_isinstance(parent, Region)
         check_isinstance(index, (integer_types, UnknownValue, ConcreteValue, WithinRange))
         if isinstance(index, ConcreteValue):
             index = index.value
         if index in parent.fields:
-            log('reusing')
+            if utils.logging_enabled:
+                log('reusing')
             return parent.fields[index]
-        log('not reusing')
+        if utils.logging_enabled:
+            log('not reusing')
         region = ArrayElementRegion('%s[%s]' % (parent.name, index), parent, index)
         parent.fields[index] = region
         # it is its own region:
@@ -1661,17 +1844,20 @@ class State(object):
         if loc:
             check_isinstance(loc, gcc.Location)
         #cr.debug()
-        log('target: %r %s ', cr.target, cr.target)
-        log('field: %r', cr.field)
+        if utils.logging_enabled:
+            log('target: %r %s ', cr.target, cr.target)
+            log('field: %r', cr.field)
         if isinstance(cr.target, gcc.MemRef):
             ptr = self.eval_rvalue(cr.target.operand, loc) # FIXME
-            log('ptr: %r', ptr)
+            if utils.logging_enabled:
+                log('ptr: %r', ptr)
             self.raise_any_null_ptr_deref(cr, ptr)
             if isinstance(ptr, UnknownValue):
                 # It could be NULL; it could be non-NULL
                 # Split the analysis
                 # Non-NULL pointer:
-                log('splitting %s into non-NULL/NULL pointers', cr)
+                if utils.logging_enabled:
+                    log('splitting %s into non-NULL/NULL pointers', cr)
                 self.raise_split_value(ptr)
             check_isinstance(ptr, PointerToRegion)
             return self.make_field_region(ptr.region, cr.field.name)
@@ -1680,7 +1866,8 @@ class State(object):
         return self.make_field_region(target_region, cr.field.name)
 
     def string_constant_region(self, expr, loc):
-        log('string_constant_region: %s', expr)
+        if utils.logging_enabled:
+            log('string_constant_region: %s', expr)
         check_isinstance(expr, gcc.StringCst)
         if loc:
             check_isinstance(loc, gcc.Location)
@@ -1700,7 +1887,8 @@ class State(object):
             # "unknown" value:
             if isinstance(region, RegionForGlobal):
                 newval = UnknownValue.make(region.vardecl.type, region.vardecl.location)
-                log('setting up %s for %s', newval, region.vardecl)
+                if utils.logging_enabled:
+                    log('setting up %s for %s', newval, region.vardecl)
                 self.value_for_region[region] = newval
                 return newval
 
@@ -1741,7 +1929,8 @@ class State(object):
 
     def _get_store_recursive(self, region, gcctype, loc):
         check_isinstance(region, Region)
-        log('_get_store_recursive(%s, %s, %s)', region, gcctype, loc)
+        if utils.logging_enabled:
+            log('_get_store_recursive(%s, %s, %s)', region, gcctype, loc)
         if region in self.value_for_region:
             return self.value_for_region[region]
 
@@ -1780,11 +1969,14 @@ class State(object):
         if field:
             # (field can be None for C++ destructors)
             check_isinstance(field, str)
-        log('make_field_region(%r, %r)', target, field)
+        if utils.logging_enabled:
+            log('make_field_region(%r, %r)', target, field)
         if field in target.fields:
-            log('reusing')
+            if utils.logging_enabled:
+                log('reusing')
             return target.fields[field]
-        log('not reusing')
+        if utils.logging_enabled:
+            log('not reusing')
         region = Region('%s.%s' % (target.name, field), target)
         target.fields[field] = region
         # it is its own region:
@@ -1795,7 +1987,8 @@ class State(object):
     def get_value_of_field_by_varname(self, varname, field):
         # Lookup varname.field
         # For use in writing selftests
-        log('get_value_of_field_by_varname(%r, %r)', varname, field)
+        if utils.logging_enabled:
+            log('get_value_of_field_by_varname(%r, %r)', varname, field)
         check_isinstance(varname, str)
         check_isinstance(field, str)
         for k in self.region_for_var:
@@ -1815,7 +2008,8 @@ class State(object):
 
         You may want to use read_field_by_name() instead
         """
-        log('get_value_of_field_by_region(%r, %r)', region, field)
+        if utils.logging_enabled:
+            log('get_value_of_field_by_region(%r, %r)', region, field)
         check_isinstance(region, Region)
         check_isinstance(field, str)
         if field in region.fields:
@@ -1831,7 +2025,8 @@ class State(object):
         UnknownValue so that subsequent reads of the field receive the
         *same* unknown value
         """
-        log('read_field_by_name(%r, %r)', region, fieldname)
+        if utils.logging_enabled:
+            log('read_field_by_name(%r, %r)', region, fieldname)
         check_isinstance(stmt, gcc.Gimple)
         if gcctype:
             check_isinstance(gcctype, gcc.Type)
@@ -1870,7 +2065,8 @@ class State(object):
         return self.value_for_region[v_ptr.region]
 
     def init_for_function(self, fun):
-        log('State.init_for_function(%r)', fun)
+        if utils.logging_enabled:
+            log('State.init_for_function(%r)', fun)
         self.fun = fun
         root_region = Region('root', None)
         stack = RegionOnStack('stack for %s' % fun.decl.name, root_region)
@@ -1919,7 +2115,8 @@ class State(object):
         Return a Transition to a state at the next location, with the RHS
         assigned to the LHS, if LHS is not None
         """
-        log('mktrans_assignment(%r, %r, %r)', lhs, rhs, desc)
+        if utils.logging_enabled:
+            log('mktrans_assignment(%r, %r, %r)', lhs, rhs, desc)
         if desc:
             check_isinstance(desc, str)
         new = self.use_next_stmt_node()
@@ -1960,7 +2157,8 @@ class State(object):
         # don't allow this.  Use the end of the function for this case.
         stmt = self.stmtnode.get_stmt()
         if stmt:
-            log('%s' % self.stmtnode.get_stmt().loc)
+            if utils.logging_enabled:
+                log('%s' % self.stmtnode.get_stmt().loc)
             # grrr... not all statements have a non-NULL location
             gccloc = self.stmtnode.get_stmt().loc
             if gccloc is None:
@@ -2053,12 +2251,14 @@ class State(object):
                 newstate = self.copy()
                 newstate.stmtnode = succedge.dstnode
                 result.append(Transition(self, newstate, ''))
-            log('result: %s', result)
+            if utils.logging_enabled:
+                log('result: %s', result)
             return result
 
     def _get_transitions_for_stmt(self, stmt):
-        log('_get_transitions_for_stmt: %r %s', stmt, stmt)
-        log('dir(stmt): %s', dir(stmt))
+        if utils.logging_enabled:
+            log('_get_transitions_for_stmt: %r %s', stmt, stmt)
+            log('dir(stmt): %s', dir(stmt))
         if stmt.loc:
             gcc.set_location(stmt.loc)
         if isinstance(stmt, gcc.GimpleCall):
@@ -2174,13 +2374,16 @@ class State(object):
                 for arg in stmt.args]
 
     def _get_transitions_for_GimpleCall(self, stmt):
-        log('stmt.lhs: %s %r', stmt.lhs, stmt.lhs)
-        log('stmt.fn: %s %r', stmt.fn, stmt.fn)
-        log('dir(stmt.fn): %s', dir(stmt.fn))
+        if utils.logging_enabled:
+            log('stmt.lhs: %s %r', stmt.lhs, stmt.lhs)
+            log('stmt.fn: %s %r', stmt.fn, stmt.fn)
+            log('dir(stmt.fn): %s', dir(stmt.fn))
         if hasattr(stmt.fn, 'operand'):
-            log('stmt.fn.operand: %s', stmt.fn.operand)
+            if utils.logging_enabled:
+                log('stmt.fn.operand: %s', stmt.fn.operand)
         returntype = stmt.fn.type.dereference.type
-        log('returntype: %s', returntype)
+        if utils.logging_enabled:
+            log('returntype: %s', returntype)
 
         if stmt.noreturn:
             # The function being called does not return e.g. "exit(0);"
@@ -2191,7 +2394,8 @@ class State(object):
         if isinstance(stmt.fn, (gcc.VarDecl, gcc.ParmDecl, gcc.SsaName)):
             # Calling through a function pointer:
             val = self.eval_rvalue(stmt.fn, stmt.loc)
-            log('val: %s',  val)
+            if utils.logging_enabled:
+                log('val: %s',  val)
             check_isinstance(val, AbstractValue)
             return val.get_transitions_for_function_call(self, stmt)
 
@@ -2210,8 +2414,9 @@ class State(object):
                     raise PassingPointerToDeallocatedMemory(i, 'function', stmt, rvalue)
 
         if isinstance(stmt.fn.operand, gcc.FunctionDecl):
-            log('dir(stmt.fn.operand): %s', dir(stmt.fn.operand))
-            log('stmt.fn.operand.name: %r', stmt.fn.operand.name)
+            if utils.logging_enabled:
+                log('dir(stmt.fn.operand): %s', dir(stmt.fn.operand))
+                log('stmt.fn.operand.name: %r', stmt.fn.operand.name)
             fnname = stmt.fn.operand.name
 
             # Hand off to impl_* methods of facets, where these methods exist
@@ -2246,11 +2451,21 @@ class State(object):
             # Unknown function returning (PyObject*):
             from libcpychecker.refcounts import type_is_pyobjptr_subclass
             if type_is_pyobjptr_subclass(stmt.fn.operand.type.type):
-                log('Invocation of unknown function returning PyObject * (or subclass): %r' % fnname)
+                if utils.logging_enabled:
+                    log('Invocation of unknown function returning PyObject * (or subclass): %r' % fnname)
 
                 fnmeta = FnMeta(name=fnname)
 
-                # Assume that all such functions either:
+                # If it's a static helper that we can summarize, use what
+                # its body actually does:
+                if _callee_summaries:
+                    summary = _callee_summaries.get(stmt.fn.operand)
+                    if summary:
+                        return self.apply_fncall_side_effects(
+                            summary.get_transitions(self, stmt, fnmeta),
+                            stmt)
+
+                # Otherwise, assume that all such functions either:
                 #   - return a new reference, or
                 #   - return NULL and set an exception (e.g. MemoryError)
                 from libcpychecker.attributes import fnnames_returning_borrowed_refs
@@ -2276,16 +2491,19 @@ class State(object):
                 return [self.mktrans_assignment(stmt.lhs, stmt.args[0], None)]
 
             # Unknown function of other type:
-            log('Invocation of unknown function: %r', fnname)
+            if utils.logging_enabled:
+                log('Invocation of unknown function: %r', fnname)
             return self.apply_fncall_side_effects(
                 [self.mktrans_assignment(stmt.lhs,
                                          UnknownValue.make(returntype, stmt.loc),
                                          None)],
                 stmt)
 
-        log('stmt.args: %s %r', stmt.args, stmt.args)
+        if utils.logging_enabled:
+            log('stmt.args: %s %r', stmt.args, stmt.args)
         for i, arg in enumerate(stmt.args):
-            log('args[%i]: %s %r', i, arg, arg)
+            if utils.logging_enabled:
+                log('args[%i]: %s %r', i, arg, arg)
 
     def get_function_name(self, stmt):
         """
@@ -2405,17 +2623,20 @@ class State(object):
                 desc = 'taking False path'
             return Transition(self, nextstate, desc)
 
-        log('stmt.exprcode: %s', stmt.exprcode)
-        log('stmt.exprtype: %s', stmt.exprtype)
-        log('stmt.lhs: %r %s', stmt.lhs, stmt.lhs)
-        log('stmt.rhs: %r %s', stmt.rhs, stmt.rhs)
+        if utils.logging_enabled:
+            log('stmt.exprcode: %s', stmt.exprcode)
+            log('stmt.exprtype: %s', stmt.exprtype)
+            log('stmt.lhs: %r %s', stmt.lhs, stmt.lhs)
+            log('stmt.rhs: %r %s', stmt.rhs, stmt.rhs)
         boolval = self.eval_condition(stmt, stmt.lhs, stmt.exprcode, stmt.rhs)
         if boolval is True:
-            log('taking True edge')
+            if utils.logging_enabled:
+                log('taking True edge')
             nextstate = make_transition_for_true(stmt, False)
             return [nextstate]
         elif boolval is False:
-            log('taking False edge')
+            if utils.logging_enabled:
+                log('taking False edge')
             nextstate = make_transition_for_false(stmt, False)
             return [nextstate]
         else:
@@ -2428,7 +2649,8 @@ class State(object):
         """
         Evaluate a comparison, returning one of True, False, or None
         """
-        log('eval_condition: %s %s %s ', expr_lhs, exprcode, expr_rhs)
+        if utils.logging_enabled:
+            log('eval_condition: %s %s %s ', expr_lhs, exprcode, expr_rhs)
         check_isinstance(expr_lhs, gcc.Tree)
         check_isinstance(exprcode, type) # it's a type, rather than an instance
         check_isinstance(expr_rhs, gcc.Tree)
@@ -2478,10 +2700,12 @@ class State(object):
             # Split the ptr variable immediately into NULL and non-NULL
             # versions, so that we can evaluate the true and false branch with
             # explicitly data
-            log('splitting %s into non-NULL/NULL pointers', expr_lhs)
+            if utils.logging_enabled:
+                log('splitting %s into non-NULL/NULL pointers', expr_lhs)
             self.raise_split_value(lhs, stmt.loc)
 
-        log('unable to compare %r with %r', lhs, rhs)
+        if utils.logging_enabled:
+            log('unable to compare %r with %r', lhs, rhs)
         #raise NotImplementedError("Don't know how to do %s comparison of %s with %s"
         #                          % (exprcode, lhs, rhs))
         return UnknownValue(stmt.lhs.type, stmt.loc)
@@ -2490,12 +2714,14 @@ class State(object):
         rhs = stmt.rhs
         a = self.eval_rvalue(rhs[0], stmt.loc)
         b = self.eval_rvalue(rhs[1], stmt.loc)
-        log('a: %r', a)
-        log('b: %r', b)
+        if utils.logging_enabled:
+            log('a: %r', a)
+            log('b: %r', b)
         return a, b
 
     def eval_rhs(self, stmt):
-        log('eval_rhs(%s): %s', stmt, stmt.rhs)
+        if utils.logging_enabled:
+            log('eval_rhs(%s): %s', stmt, stmt.rhs)
         rhs = stmt.rhs
         # Handle arithmetic and boolean expressions:
         if stmt.exprcode in (gcc.PlusExpr, gcc.MinusExpr,  gcc.MultExpr, gcc.TruncDivExpr,
@@ -2573,13 +2799,15 @@ class State(object):
                                       % (stmt.exprcode, stmt.exprcode, stmt.loc))
 
     def _get_transitions_for_GimpleAssign(self, stmt):
-        log('stmt.lhs: %r %s', stmt.lhs, stmt.lhs)
-        log('stmt.rhs: %r %s', stmt.rhs, stmt.rhs)
-        log('stmt: %r %s', stmt, stmt)
-        log('stmt.exprcode: %r', stmt.exprcode)
+        if utils.logging_enabled:
+            log('stmt.lhs: %r %s', stmt.lhs, stmt.lhs)
+            log('stmt.rhs: %r %s', stmt.rhs, stmt.rhs)
+            log('stmt: %r %s', stmt, stmt)
+            log('stmt.exprcode: %r', stmt.exprcode)
 
         value = self.eval_rhs(stmt)
-        log('value from eval_rhs: %r', value)
+        if utils.logging_enabled:
+            log('value from eval_rhs: %r', value)
         check_isinstance(value, AbstractValue)
 
         if isinstance(value, DeallocatedMemory):
@@ -2593,14 +2821,16 @@ class State(object):
     def _get_transitions_for_GimpleReturn(self, stmt):
         #log('stmt.lhs: %r %s', stmt.lhs, stmt.lhs)
         #log('stmt.rhs: %r %s', stmt.rhs, stmt.rhs)
-        log('stmt: %r %s', stmt, stmt)
-        log('stmt.retval: %r', stmt.retval)
+        if utils.logging_enabled:
+            log('stmt: %r %s', stmt, stmt)
+            log('stmt.retval: %r', stmt.retval)
 
         nextstate = self.copy()
 
         if stmt.retval:
             rvalue = self.eval_rvalue(stmt.retval, stmt.loc)
-            log('rvalue from eval_rvalue: %r', rvalue)
+            if utils.logging_enabled:
+                log('rvalue from eval_rvalue: %r', rvalue)
             nextstate.return_rvalue = rvalue
         nextstate.has_returned = True
         return [Transition(self, nextstate, 'returning')]
@@ -2613,12 +2843,15 @@ class State(object):
                 # FIXME: for now, treat all labels as possible:
                 result.append(label)
             return result
-        log('stmt.indexvar: %r', stmt.indexvar)
-        log('stmt.labels: %r', stmt.labels)
+        if utils.logging_enabled:
+            log('stmt.indexvar: %r', stmt.indexvar)
+            log('stmt.labels: %r', stmt.labels)
         indexval = self.eval_rvalue(stmt.indexvar, stmt.loc)
-        log('indexval: %r', indexval)
+        if utils.logging_enabled:
+            log('indexval: %r', indexval)
         labels = get_labels_for_rvalue(self, stmt, indexval)
-        log('labels: %r', labels)
+        if utils.logging_enabled:
+            log('labels: %r', labels)
         result = []
         for label in labels:
             newstate = self.copy()
@@ -2639,7 +2872,8 @@ class State(object):
         return result
 
     def _get_transitions_for_GimpleAsm(self, stmt):
-        log('stmt: %r %s', stmt, stmt)
+        if utils.logging_enabled:
+            log('stmt: %r %s', stmt, stmt)
 
         if stmt.string == '':
             # Empty fragment of inline assembler:
@@ -2696,25 +2930,61 @@ class Transition(object):
         logger('dest:')
         self.dest.log(logger)
 
+class TraceCell(object):
+    """
+    An immutable cell within the linked list of Transitions that make up a
+    Trace, allowing prefixes to be shared between Traces
+    """
+    __slots__ = ('transition', 'prev', 'length', 'loop_edges')
+
+    def __init__(self, transition, prev):
+        self.transition = transition
+        self.prev = prev
+        if prev:
+            self.length = prev.length + 1
+            loop_edges = prev.loop_edges
+        else:
+            self.length = 1
+            loop_edges = frozenset()
+
+        # A frozenset of the edges between basic blocks (as pairs of
+        # indices) that lie on a cycle and that have been followed so far.
+        # Other edges can't be followed twice, so this is all that
+        # Trace.has_looped depends on from the earlier transitions:
+        src_bb = transition.src.stmtnode.bb
+        dest_bb = transition.dest.stmtnode.bb
+        if src_bb is not None and dest_bb is not None and src_bb != dest_bb:
+            edge = (src_bb.index, dest_bb.index)
+            if (edge not in loop_edges
+                and edge in transition.dest.stmtgraph.get_cyclic_bb_edges()):
+                loop_edges = loop_edges | frozenset([edge])
+        self.loop_edges = loop_edges
+
+    def iter_transitions_backwards(self):
+        cell = self
+        while cell:
+            yield cell.transition
+            cell = cell.prev
+
 class Trace(object):
-    __slots__ = ('states', 'transitions', 'err', 'paths_taken')
+    __slots__ = ('_tail', '_transitions', 'err')
 
-    """A sequence of States and Transitions"""
+    """
+    A sequence of States and Transitions
+
+    The Transitions are stored as a chain of TraceCell instances, shared
+    with any copies of the Trace, so that copying and adding are O(1).  The
+    "states", "transitions" and "paths_taken" lists are built on demand.
+    """
     def __init__(self):
-        self.states = []
-        self.transitions = []
+        self._tail = None
+        self._transitions = None
         self.err = None
 
-        # A list of (src gcc.StmtNode, dest gcc.StmtNode) pairs
-        self.paths_taken = []
-
     def add(self, transition):
         check_isinstance(transition, Transition)
-        self.states.append(transition.dest)
-        self.transitions.append(transition)
-        if transition.src.stmtnode.bb != transition.dest.stmtnode.bb:
-            self.paths_taken.append( (transition.src.stmtnode.bb,
-                                      transition.dest.stmtnode.bb) )
+        self._tail = TraceCell(transition, self._tail)
+        self._transitions = None
         return self
 
     def add_error(self, err):
@@ -2722,13 +2992,58 @@ class Trace(object):
 
     def copy(self):
         t = Trace()
-        t.states = self.states[:]
-        t.transitions = self.transitions[:]
+        t._tail = self._tail
+        t._transitions = self._transitions
         t.err = self.err # FIXME: should this be a copy?
-        t.paths_taken = self.paths_taken[:]
         return t
 
+    @property
+    def transitions(self):
+        if self._transitions is None:
+            if self._tail:
+                self._transitions = list(self._tail.iter_transitions_backwards())
+                self._transitions.reverse()
+            else:
+                self._transitions = []
+        return self._transitions
+
+    @property
+    def states(self):
+        return [t.dest for t in self.transitions]
+
+    @property
+    def paths_taken(self):
+        # A list of (src gcc.BasicBlock, dest gcc.BasicBlock) pairs
+        return [(t.src.stmtnode.bb, t.dest.stmtnode.bb)
+                for t in self.transitions
+                if t.src.stmtnode.bb != t.dest.stmtnode.bb]
+
+    def __len__(self):
+        if self._tail:
+            return self._tail.length
+        return 0
+
+    def get_last_state(self):
+        return self._tail.transition.dest
+
+    def merge_key(self):
+        """
+        Get a hashable key for the end of this Trace, such that two Traces
+        with equal keys have identical futures: their final States have
+        equal merge keys, and has_looped will stop them at the same points
+        """
+        return (self.get_last_state().merge_key(), self._tail.loop_edges)
+
+    def get_prev_state(self):
+        """
+        Get the penultimate state, or None
+        """
+        if self._tail.prev:
+            return self._tail.prev.transition.dest
+
     def log(self, logger, name):
+        if not utils.logging_enabled:
+            return
         logger('%s:' % name)
         for i, state in enumerate(self.states):
             logger('%i:' % i)
@@ -2737,16 +3052,16 @@ class Trace(object):
             logger('  Trace ended with error: %s' % self.err)
 
     def get_last_stmt(self):
-        return self.states[-1].stmtnode.get_stmt()
+        return self.get_last_state().stmtnode.get_stmt()
 
     def return_value(self):
-        return self.states[-1].return_rvalue
+        return self.get_last_state().return_rvalue
 
     def has_looped(self):
         """
         Is the tail transition a path we've followed before?
         """
-        endstate = self.states[-1]
+        endstate = self.get_last_state()
         if hasattr(endstate, 'fromsplit'):
             # We have a state that was created from a SplitValue.  It will have
             # the same location as the state before it (before the split).
@@ -2757,7 +3072,7 @@ class Trace(object):
             # repeated location:
             return False
 
-        endtransition = self.transitions[-1]
+        endtransition = self._tail.transition
         if 0:
             gcc.inform(endstate.get_gcc_loc(endstate.fun),
                        ('paths_taken: %s'
@@ -2769,8 +3084,13 @@ class Trace(object):
         src_bb = endtransition.src.stmtnode.bb
         dest_bb = endtransition.dest.stmtnode.bb
         if src_bb != dest_bb:
-            if (src_bb, dest_bb) in self.paths_taken[0:-1]:
-                return True
+            # Walk backwards through the earlier transitions, without
+            # building the list of paths taken:
+            if self._tail.prev:
+                for t in self._tail.prev.iter_transitions_backwards():
+                    if (t.src.stmtnode.bb == src_bb
+                        and t.dest.stmtnode.bb == dest_bb):
+                        return True
 
     def get_all_var_region_pairs(self):
         """
@@ -2918,11 +3238,48 @@ class TooComplicated(Exception):
 class Limits:
     """
     Resource limits, to avoid an analysis going out of control
+
+    Exceeding maxtrans aborts the analysis (with a TooComplicated exception).
+
+    There are also optional budgets on the CPU time taken, the number of
+    States held by the analysis, and the approximate number of bytes that
+    they use.  Exceeding one of these instead switches the analysis into a
+    cheaper, less precise mode for the rest of the function: ranges of
+    integer values in new States are widened (see State.widen), and States
+    that are equivalent to one already seen at the same point are merged
+    (as in iter_traces_by_worklist).  The "degraded" attribute then
+    describes which budget was exceeded.
     """
-    def __init__(self, maxtrans):
+    def __init__(self, maxtrans, max_cpu_secs=None, max_states=None,
+                 max_bytes=None):
         self.maxtrans = maxtrans
         self.trans_seen = 0
 
+        self.max_cpu_secs = max_cpu_secs
+        self.max_states = max_states
+        self.max_bytes = max_bytes
+        self.start_cpusecs = process_time()
+
+        # The number of States created by transitions that are still alive
+        # (e.g. not on a path that was abandoned or merged away), and their
+        # approximate size in bytes; only tracked if there's a budget on
+        # them:
+        self.live_states = 0
+        self.live_bytes = 0
+        # Mapping from a weakref.ref to each such State to its size:
+        self._live = {}
+
+        # Counters for instrumentation (see libcpychecker.instrumentation):
+        self.splits = 0
+        self.states_merged = 0
+
+        # None, or a str describing the budget that was exceeded:
+        self.degraded = None
+
+        # Mapping from StmtNode to the set of merge keys of Traces ending
+        # there since the analysis was degraded:
+        self.seen = {}
+
     def on_transition(self, transition, result):
         """
         result is a list of all *complete* traces so far
@@ -2934,6 +3291,87 @@ class Limits:
         if self.trans_seen > self.maxtrans:
             raise TooComplicated(result)
 
+        if self.max_states is not None or self.max_bytes is not None:
+            self._track(transition.dest)
+
+        if self.degraded:
+            transition.dest.widen(transition.src)
+        else:
+            self.degraded = self.check_budgets()
+            if self.degraded and utils.logging_enabled:
+                log('degrading analysis: %s', self.degraded)
+
+    def _track(self, state):
+        ref = weakref.ref(state, self._on_release)
+        if ref in self._live:
+            return
+        if self.max_bytes is not None:
+            size = state.get_approx_size()
+        else:
+            size = 0
+        self._live[ref] = size
+        self.live_states += 1
+        self.live_bytes += size
+
+    def _on_release(self, ref):
+        # Called when a State that we're tracking is garbage-collected:
+        self.live_states -= 1
+        self.live_bytes -= self._live.pop(ref)
+
+    def check_budgets(self):
+        """
+        Get a description of the first budget that has been exceeded, or None
+        """
+        if self.max_states is not None:
+            if self.live_states > self.max_states:
+                return ('exceeded the budget of %i states'
+                        % self.max_states)
+        if self.max_bytes is not None:
+            if self.live_bytes > self.max_bytes:
+                return ('exceeded the budget of %i bytes of states'
+                        % self.max_bytes)
+        if self.max_cpu_secs is not None:
+            cpusecs = process_time() - self.start_cpusecs
+            if cpusecs > self.max_cpu_secs:
+                return ('exceeded the budget of %gs of CPU time'
+                        % self.max_cpu_secs)
+
+    def should_explore(self, trace):
+        """
+        Once the analysis has been degraded, is the given Trace distinct
+        from all of those already seen ending at the same point?
+        """
+        if not self.degraded:
+            return True
+        key = trace.merge_key()
+        keys = self.seen.setdefault(trace.get_last_state().stmtnode, set())
+        if key in keys:
+            self.states_merged += 1
+            return False
+        keys.add(key)
+        return True
+
+def make_initial_state(stmtgraph, facets):
+    """
+    Construct the State at the entry to the function, with an instance of
+    each of the given Facet classes
+    """
+    fun = stmtgraph.fun
+    curstate = State(stmtgraph,
+                     stmtgraph.get_entry_nodes()[0],
+                     None,
+                     facets,
+                     None, None, None)
+    #Resources())
+    curstate.init_for_function(fun)
+    for key in facets:
+        facet_cls = facets[key]
+        f_new = facet_cls(curstate, fun=fun)
+        setattr(curstate, key, f_new)
+        f_new.init_for_function(fun)
+    curstate.verify()
+    return curstate
+
 def iter_traces(stmtgraph, facets, prefix=None, limits=None, depth=0):
     """
     Traverse the tree of traces of program state, returning a list
@@ -2948,24 +3386,14 @@ def iter_traces(stmtgraph, facets, prefix=None, limits=None, depth=0):
     tree.
     """
     fun = stmtgraph.fun
-    log('iter_traces(%r, %r, %r)', fun, facets, prefix)
+    if utils.logging_enabled:
+        log('iter_traces(%r, %r, %r)', fun, facets, prefix)
     if prefix is None:
         prefix = Trace()
-        curstate = State(stmtgraph,
-                         stmtgraph.get_entry_nodes()[0],
-                         None,
-                         facets,
-                         None, None, None)
-        #Resources())
-        curstate.init_for_function(fun)
-        for key in facets:
-            facet_cls = facets[key]
-            f_new = facet_cls(curstate, fun=fun)
-            setattr(curstate, key, f_new)
-            f_new.init_for_function(fun)
+        curstate = make_initial_state(stmtgraph, facets)
     else:
         check_isinstance(prefix, Trace)
-        curstate = prefix.states[-1]
+        curstate = prefix.get_last_state()
 
         if curstate.has_returned:
             # This state has returned a value (and hence terminated):
@@ -2978,7 +3406,8 @@ def iter_traces(stmtgraph, facets, prefix=None, limits=None, depth=0):
 
         # Stop interpreting when you see a loop, to ensure termination:
         if prefix.has_looped():
-            log('loop detected; stopping iteration')
+            if utils.logging_enabled:
+                log('loop detected; stopping iteration')
             if 0:
                 gcc.inform(curstate.get_gcc_loc(fun),
                            'loop detected; stopping iteration')
@@ -2986,13 +3415,14 @@ def iter_traces(stmtgraph, facets, prefix=None, limits=None, depth=0):
             return []
 
     # We need the prevstate in order to handle Phi nodes
-    if len(prefix.states) > 1:
-        prevstate = prefix.states[-2]
+    if len(prefix) > 1:
+        prevstate = prefix.get_prev_state()
     else:
         prevstate = None
 
-    prefix.log(log, 'PREFIX')
-    log('  %s:%s', fun.decl.name, curstate.stmtnode)
+    if utils.logging_enabled:
+        prefix.log(log, 'PREFIX')
+        log('  %s:%s', fun.decl.name, curstate.stmtnode)
     try:
         transitions = curstate.get_transitions()
         check_isinstance(transitions, list)
@@ -3002,7 +3432,8 @@ def iter_traces(stmtgraph, facets, prefix=None, limits=None, depth=0):
         err.loc = prefix.get_last_stmt().loc
         trace_with_err = prefix.copy()
         trace_with_err.add_error(err)
-        trace_with_err.log(log, 'FINISHED TRACE WITH ERROR: %s' % err)
+        if utils.logging_enabled:
+            trace_with_err.log(log, 'FINISHED TRACE WITH ERROR: %s' % err)
         return [trace_with_err]
     except SplitValue:
         # Split the state up, splitting into parallel worlds with different
@@ -3011,8 +3442,11 @@ def iter_traces(stmtgraph, facets, prefix=None, limits=None, depth=0):
         err = sys.exc_info()[1]
         transitions = err.split(curstate)
         check_isinstance(transitions, list)
+        if limits:
+            limits.splits += 1
 
-    log('transitions: %s', transitions)
+    if utils.logging_enabled:
+        log('transitions: %s', transitions)
 
     if len(transitions) > 0:
         result = []
@@ -3020,11 +3454,15 @@ def iter_traces(stmtgraph, facets, prefix=None, limits=None, depth=0):
             check_isinstance(transition, Transition)
             transition.dest.verify()
 
+            newprefix = prefix.copy().add(transition)
+
             # Potentially raise a TooComplicated exception:
             if limits:
                 limits.on_transition(transition, result)
-
-            newprefix = prefix.copy().add(transition)
+                if not limits.should_explore(newprefix):
+                    if utils.logging_enabled:
+                        log('merging equivalent state at %s', transition.dest.stmtnode)
+                    continue
 
             # Recurse
             # This gives us a depth-first traversal of the state tree
@@ -3040,9 +3478,126 @@ def iter_traces(stmtgraph, facets, prefix=None, limits=None, depth=0):
         return result
     else:
         # We're at a terminating state:
-        prefix.log(log, 'FINISHED TRACE')
+        if utils.logging_enabled:
+            prefix.log(log, 'FINISHED TRACE')
         return [prefix]
 
+def iter_traces_by_worklist(stmtgraph, facets, limits=None):
+    """
+    Alternative to iter_traces, returning a list of Trace instances.
+
+    Rather than enumerating every path through the function, this keeps a
+    worklist of (prefix Trace, State) pairs, and records the merge_key() of
+    every Trace ending at each StmtNode.  If a new State is equivalent to one
+    that's already been seen at the same StmtNode (e.g. at the join point
+    after an if/else that leaves the same values), and the Traces leading
+    to both have followed the same edges within loops, its future would be
+    identical, so it is dropped, with the already-seen State being used
+    to represent both paths.
+
+    Hence the number of States explored grows with the number of distinct
+    States at each program point, rather than with the number of paths.
+    Each of the Trace instances returned is still a real path through the
+    function, but paths that only differ before a merge point are only
+    reported once.
+
+    The worklist is processed in LIFO order, so that the traces are found in
+    the same order as the depth-first traversal of iter_traces.
+    """
+    fun = stmtgraph.fun
+    if utils.logging_enabled:
+        log('iter_traces_by_worklist(%r, %r)', fun, facets)
+
+    result = []
+
+    # Mapping from StmtNode to the set of merge keys of Traces ending there:
+    seen = {}
+    num_merged = 0
+
+    initial = make_initial_state(stmtgraph, facets)
+    seen[initial.stmtnode] = set([(initial.merge_key(), frozenset())])
+    worklist = [(Trace(), initial)]
+
+    while worklist:
+        prefix, curstate = worklist.pop()
+
+        if len(prefix):
+            if curstate.has_returned or curstate.not_returning:
+                # This trace has terminated:
+                result.append(prefix)
+                continue
+
+            # Stop interpreting when you see a loop, to ensure termination:
+            if prefix.has_looped():
+                if utils.logging_enabled:
+                    log('loop detected; stopping iteration')
+                continue
+
+        if utils.logging_enabled:
+            prefix.log(log, 'PREFIX')
+            log('  %s:%s', fun.decl.name, curstate.stmtnode)
+        try:
+            transitions = curstate.get_transitions()
+            check_isinstance(transitions, list)
+        except PredictedError:
+            # We're at a terminating state:
+            err = sys.exc_info()[1]
+            err.loc = prefix.get_last_stmt().loc
+            trace_with_err = prefix.copy()
+            trace_with_err.add_error(err)
+            if utils.logging_enabled:
+                trace_with_err.log(log, 'FINISHED TRACE WITH ERROR: %s' % err)
+            result.append(trace_with_err)
+            continue
+        except SplitValue:
+            err = sys.exc_info()[1]
+            transitions = err.split(curstate)
+            check_isinstance(transitions, list)
+            if limits:
+                limits.splits += 1
+
+        if utils.logging_enabled:
+            log('transitions: %s', transitions)
+
+        if not transitions:
+            # We're at a terminating state:
+            if utils.logging_enabled:
+                prefix.log(log, 'FINISHED TRACE')
+            result.append(prefix)
+            continue
+
+        newitems = []
+        for transition in transitions:
+            check_isinstance(transition, Transition)
+            transition.dest.verify()
+
+            # Potentially raise a TooComplicated exception:
+            if limits:
+                limits.on_transition(transition, result)
+
+            newprefix = prefix.copy().add(transition)
+            key = newprefix.merge_key()
+            keys = seen.setdefault(transition.dest.stmtnode, set())
+            if key in keys:
+                if utils.logging_enabled:
+                    log('merging equivalent state at %s', transition.dest.stmtnode)
+                num_merged += 1
+                continue
+            keys.add(key)
+
+            newitems.append((newprefix, transition.dest))
+
+        # Push in reverse order, so that the first transition is processed
+        # first:
+        worklist += reversed(newitems)
+
+    if utils.logging_enabled:
+        log('iter_traces_by_worklist: %i traces, %i states merged',
+            len(result), num_merged)
+    if limits:
+        limits.states_merged += num_merged
+    return result
+
 class StateGraph:
     """
     A graph of states, representing the various routes through a function,
@@ -19,7 +19,8 @@
 # Only partial coverage so var
 import gcc
 
-from absinterp import AbstractValue, ConcreteValue, InvalidlyNullParameter
+from libcpychecker.absinterp import AbstractValue, ConcreteValue, \
+    InvalidlyNullParameter
 
 class InternalCheckerError(Exception):
     pass
@@ -38,8 +39,15 @@ c_stdio_functions = [
 
 class NonNullFilePtr(AbstractValue):
     def __init__(self, stmt):
+        AbstractValue.__init__(self,
+                               stmt.lhs.type if stmt.lhs else None,
+                               stmt.loc)
         self.stmt = stmt
 
+    def merge_key(self):
+        # FILE* from different calls are different resources:
+        return AbstractValue.merge_key(self) + (self.stmt, )
+
     def __str__(self):
         return 'non-NULL (FILE*) acquired at %s' % self.stmt
 
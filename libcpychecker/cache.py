@@ -0,0 +1,310 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Persistent, content-addressed cache of the results of the refcount checker.
+
+Each entry is keyed by a hash of everything that the analysis of a function
+depends on: its gimple, control flow and source locations, the source text
+that the diagnostics quote, the types of its declarations and callees, the
+CPython typedefs, the custom attributes, the checker's own source code, and
+the checker's options.  On a hit, the saved GCC diagnostics are re-emitted
+and the saved report files are written out again, without interpreting the
+function.
+"""
+
+import hashlib
+import json
+import linecache
+import os
+import tempfile
+
+import gcc
+from gccutils import get_global_typedef, get_nonnull_arguments, \
+    check_isinstance
+
+# Bump this when changing the format of cache entries:
+CACHE_FORMAT_VERSION = 3
+
+# The suffix of the filename of the HTML report for a function.  The
+# diagnostic announcing this report gives its filename, which depends on
+# the current build, so it isn't saved; it's generated afresh each time the
+# report is written out (see CachedResult.emit_diagnostics):
+HTML_REPORT_SUFFIX = '-refcount-errors.html'
+
+# The typedefs whose layout the refcount checker relies on:
+relevant_typedefs = ('PyObject', 'PyVarObject', 'PyTypeObject', 'Py_ssize_t',
+                     'PyStringObject', 'PyBytesObject', 'PyUnicodeObject')
+
+_checker_version = None
+
+def get_checker_version():
+    """
+    Get a hash of the source code of the checker itself, so that editing
+    the checker invalidates all of the cache entries that it generated
+    """
+    global _checker_version
+    if _checker_version is None:
+        h = hashlib.sha1()
+        h.update(str(CACHE_FORMAT_VERSION).encode('utf-8'))
+        topdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for pkg in ('gccutils', 'libcpychecker', 'libcpychecker_html'):
+            pkgdir = os.path.join(topdir, pkg)
+            for dirpath, dirnames, filenames in sorted(os.walk(pkgdir)):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith('.py'):
+                        path = os.path.join(dirpath, filename)
+                        h.update(os.path.relpath(path, topdir).encode('utf-8'))
+                        with open(path, 'rb') as f:
+                            h.update(f.read())
+        _checker_version = h.hexdigest()
+    return _checker_version
+
+def get_report_filename(fnname, suffix):
+    return '%s.%s%s' % (gcc.get_dump_base_name(), fnname, suffix)
+
+def get_html_report_message(fnname):
+    return ('graphical error report for function %r written out to %r'
+            % (fnname, get_report_filename(fnname, HTML_REPORT_SUFFIX)))
+
+def location_as_tuple(loc):
+    if loc:
+        return (loc.file, loc.line, loc.column)
+
+def get_locations_for_function(fun):
+    """
+    Get a dict mapping (file, line, column) tuples to gcc.Location instances
+    for all of the locations within the given function that diagnostics can
+    refer to
+    """
+    check_isinstance(fun, gcc.Function)
+    result = {}
+    def add(loc):
+        if loc:
+            result[location_as_tuple(loc)] = loc
+    add(fun.start)
+    add(fun.end)
+    add(fun.decl.location)
+    for parm in fun.decl.arguments:
+        add(parm.location)
+    for local in fun.local_decls:
+        add(local.location)
+    for bb in fun.cfg.basic_blocks:
+        for stmts in (bb.phi_nodes, bb.gimple):
+            if stmts:
+                for stmt in stmts:
+                    add(stmt.loc)
+    return result
+
+def _get_typedef_layout(name):
+    typedecl = get_global_typedef(name)
+    if not typedecl:
+        return None
+    t = typedecl.type
+    if isinstance(t, (gcc.RecordType, gcc.UnionType)):
+        return [(field.name, str(field.type)) for field in t.fields]
+    return str(t)
+
+def _get_attribute_tables():
+    from libcpychecker.attributes import fnnames_returning_borrowed_refs, \
+        stolen_refs_by_fnname, fnnames_setting_exception, \
+        fnnames_setting_exception_on_negative_result
+    return (sorted(fnnames_returning_borrowed_refs),
+            sorted((k, sorted(v)) for k, v in stolen_refs_by_fnname.items()),
+            sorted(fnnames_setting_exception),
+            sorted(fnnames_setting_exception_on_negative_result))
+
+def get_function_fingerprint(fun):
+    """
+    Get a list of strings capturing everything about the given function
+    that the result of the refcount checker depends on
+    """
+    check_isinstance(fun, gcc.Function)
+    from libcpychecker.refcounts import function_is_tp_iternext_callback
+    result = ['function: %s %s' % (fun.decl.name, fun.decl.type),
+              'file: %s' % fun.start.file,
+              'tp_iternext: %s' % bool(function_is_tp_iternext_callback(fun))]
+
+    # The source text of the function, which is quoted by the diagnostics
+    # and rendered within the HTML reports:
+    for line in range(fun.decl.location.line - 1, fun.end.line + 2):
+        result.append('src: %s' % linecache.getline(fun.start.file, line))
+
+    for parm in fun.decl.arguments:
+        result.append('parm: %s %s %s'
+                      % (parm.name, parm.type, location_as_tuple(parm.location)))
+    for local in fun.local_decls:
+        result.append('local: %s %s %s %s'
+                      % (local.name, local.type, local.static,
+                         location_as_tuple(local.location)))
+
+    for bb in fun.cfg.basic_blocks:
+        result.append('bb %i: %s' % (bb.index,
+                                     [(e.dest.index, e.true_value,
+                                       e.false_value, e.complex)
+                                      for e in bb.succs]))
+        for stmts in (bb.phi_nodes, bb.gimple):
+            if not stmts:
+                continue
+            for stmt in stmts:
+                result.append('  %s %s %s' % (stmt.__class__.__name__,
+                                              location_as_tuple(stmt.loc),
+                                              stmt))
+                if stmt.loc and stmt.loc.file != fun.start.file:
+                    result.append('  src: %s'
+                                  % linecache.getline(stmt.loc.file,
+                                                      stmt.loc.line))
+                if isinstance(stmt, gcc.GimpleCall) and stmt.fndecl:
+                    fntype = stmt.fndecl.type
+                    result.append('  callee: %s %s %s'
+                                  % (stmt.fndecl.name, fntype,
+                                     sorted(get_nonnull_arguments(fntype))))
+
+    for name in relevant_typedefs:
+        result.append('typedef %s: %s' % (name, _get_typedef_layout(name)))
+    result.append('attributes: %s' % (_get_attribute_tables(), ))
+    return result
+
+class CachedResult:
+    """
+    The saved outcome of running the refcount checker on one function:
+    the GCC diagnostics that it emitted, the contents of the report files
+    it wrote out (keyed by the suffix of their filenames), and the JSON form
+    of its reports for the per-translation-unit bundle, if any (see
+    libcpychecker.reports)
+    """
+    def __init__(self, diagnostics, files, record=None):
+        # list of (kind, (file, line, column), msg) triples, where kind is
+        # one of 'warning', 'inform', 'error', 'permerror':
+        self.diagnostics = diagnostics
+        self.files = files
+        self.record = record
+
+    def to_json(self):
+        return dict(diagnostics=self.diagnostics,
+                    files=self.files,
+                    record=self.record)
+
+    @classmethod
+    def from_json(cls, js):
+        return CachedResult([(kind, tuple(loc), msg)
+                             for kind, loc, msg in js['diagnostics']],
+                            js['files'],
+                            js['record'])
+
+    def can_replay(self, fun):
+        locations = get_locations_for_function(fun)
+        for kind, loc, msg in self.diagnostics:
+            if loc not in locations:
+                return False
+        return True
+
+    def replay(self, fun):
+        """
+        Re-emit the saved diagnostics, and write out the saved files
+        """
+        self.emit_diagnostics(fun, get_locations_for_function(fun))
+        self.write_files(fun.decl.name)
+
+    def emit_diagnostics(self, fun, locations):
+        """
+        Emit the saved diagnostics, given a dict as returned by
+        get_locations_for_function, followed by the announcement of the
+        HTML report (if any)
+        """
+        for kind, loc, msg in self.diagnostics:
+            if kind == 'warning':
+                gcc.warning(locations[loc], msg)
+            elif kind == 'error':
+                gcc.error(locations[loc], msg)
+            elif kind == 'permerror':
+                gcc.permerror(locations[loc], msg)
+            else:
+                gcc.inform(locations[loc], msg)
+        if HTML_REPORT_SUFFIX in self.files:
+            gcc.inform(fun.start, get_html_report_message(fun.decl.name))
+
+    def write_files(self, fnname):
+        for suffix, content in sorted(self.files.items()):
+            with open(get_report_filename(fnname, suffix), 'w') as f:
+                f.write(content)
+
+class RefcountCache:
+    """
+    An on-disk cache of CachedResult instances, stored as JSON files within
+    a directory (which can be shared between builds)
+    """
+    def __init__(self, cachedir):
+        self.cachedir = cachedir
+
+    def get_key(self, fun, options):
+        """
+        Get the key for the given gcc.Function, when checked with the given
+        dict of options
+        """
+        check_isinstance(options, dict)
+        h = hashlib.sha1()
+        h.update(get_checker_version().encode('utf-8'))
+        h.update(repr(sorted(options.items())).encode('utf-8'))
+        for line in get_function_fingerprint(fun):
+            h.update(line.encode('utf-8'))
+            h.update(b'\n')
+        return h.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.cachedir, key[:2], '%s.json' % key)
+
+    def lookup(self, fun, key):
+        """
+        Look for a usable CachedResult for the given key, returning None if
+        there isn't one
+        """
+        try:
+            with open(self.get_path(key)) as f:
+                result = CachedResult.from_json(json.load(f))
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+        if not result.can_replay(fun):
+            return None
+        return result
+
+    def store(self, fun, key, result):
+        """
+        Save the CachedResult under the given key, unless it refers to
+        locations that we wouldn't be able to find again
+        """
+        check_isinstance(result, CachedResult)
+        if not result.can_replay(fun):
+            return
+        path = self.get_path(key)
+        dirname = os.path.dirname(path)
+        try:
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                # (it may have been created by a concurrent compilation)
+                if not os.path.isdir(dirname):
+                    raise
+            # Write to a temporary file and rename it into place, so that
+            # concurrent compilations never see a partially-written entry:
+            fd, tmppath = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(result.to_json(), f)
+            os.rename(tmppath, path)
+        except (IOError, OSError):
+            # The cache is merely an optimization:
+            pass
@@ -0,0 +1,241 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+A mapping with O(1) copies, for use by the State store.
+
+Every State.copy() used to duplicate the whole of region_for_var and
+value_for_region, even though each transition typically only changes a
+handful of entries.  A DeltaMap instead records its own changes in a small
+dict layered on top of a chain of frozen layers that it shares with the
+maps that it was copied from (or to).  Copying freezes the changes made so
+far into a new shared layer, and gives both maps a new empty dict for
+subsequent changes, so neither can observe the other's changes.
+
+To bound the cost of lookups, a new layer absorbs its parent whenever the
+parent is no more than twice its size.  Hence the sizes of the layers more
+than double going up a chain, so a chain of layers holding n entries has
+at most log2(n) + 1 layers, and each entry is only copied O(log n) times
+(rather than the whole mapping being copied on every State.copy()).
+
+Iteration follows the same order as an OrderedDict would: keys are
+yielded in order of first insertion, and a key that is deleted and then
+set again moves to the end.
+"""
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    # Python 2:
+    from collections import MutableMapping
+from itertools import count
+
+# Every newly-inserted key gets a sequence number, giving the iteration
+# order:
+_seqnums = count()
+
+# Marker within a layer for a key that has been deleted:
+_DELETED = object()
+
+def _get_maxseq(entries, parent):
+    # Get the largest sequence number within entries and its parent layers,
+    # or -1 if there are none
+    result = -1
+    if parent:
+        result = parent.maxseq
+    for entry in entries.values():
+        if entry is not _DELETED and entry[0] > result:
+            result = entry[0]
+    return result
+
+def _get_new_items(entries, base_maxseq):
+    # Get a list of the (key, (seqnum, value)) pairs within entries for
+    # the keys that were inserted (rather than updated) on top of a base
+    # whose largest sequence number is base_maxseq, in order of insertion
+    result = [(key, entry)
+              for key, entry in entries.items()
+              if entry is not _DELETED and entry[0] > base_maxseq]
+    result.sort(key=lambda item: item[1][0])
+    return result
+
+def _merge_entries(base, entries, new_items):
+    # Generate the (key, (seqnum, value)) pairs of the live entries of
+    # entries on top of base (an iterable of such pairs, in order), in
+    # order, given the result of _get_new_items
+    for key, entry in base:
+        mine = entries.get(key)
+        if mine is None:
+            yield key, entry
+        elif mine is not _DELETED and mine[0] == entry[0]:
+            # Updated, keeping its position:
+            yield key, mine
+        # (otherwise it was deleted, and perhaps inserted again)
+    for item in new_items:
+        yield item
+
+class _Layer(object):
+    """
+    A frozen set of changes, on top of an optional parent _Layer
+    """
+    __slots__ = ('entries', 'parent', 'maxseq', '_new_items')
+
+    def __init__(self, entries, parent):
+        # dict, mapping from key to either a (seqnum, value) pair, or
+        # _DELETED:
+        self.entries = entries
+        self.parent = parent
+        self.maxseq = _get_maxseq(entries, parent)
+        # The result of _get_new_items, built on demand:
+        self._new_items = None
+
+    def iter_entries(self):
+        if self.parent:
+            base = self.parent.iter_entries()
+            base_maxseq = self.parent.maxseq
+        else:
+            base = ()
+            base_maxseq = -1
+        if self._new_items is None:
+            self._new_items = _get_new_items(self.entries, base_maxseq)
+        return _merge_entries(base, self.entries, self._new_items)
+
+def _push_layer(entries, parent):
+    """
+    Get a new _Layer holding the given changes on top of parent, absorbing
+    any parent layers that are no more than twice the size of the changes
+    """
+    while parent and len(parent.entries) <= 2 * len(entries):
+        merged = dict(parent.entries)
+        merged.update(entries)
+        entries = merged
+        parent = parent.parent
+    if not parent:
+        # There's nothing for the deletions to hide:
+        entries = dict((key, entry)
+                       for key, entry in entries.items()
+                       if entry is not _DELETED)
+    return _Layer(entries, parent)
+
+class DeltaMap(MutableMapping):
+    __slots__ = ('_layer', '_entries', '_len')
+
+    def __init__(self, items=None):
+        self._layer = None
+        self._entries = {}
+        self._len = 0
+        if items:
+            self.update(items)
+
+    def _lookup(self, key):
+        # Get the (seqnum, value) pair for the key, or None
+        entry = self._entries.get(key)
+        if entry is None:
+            layer = self._layer
+            while layer:
+                entry = layer.entries.get(key)
+                if entry is not None:
+                    break
+                layer = layer.parent
+        if entry is _DELETED:
+            return None
+        return entry
+
+    def _iter_entries(self):
+        # Generate the (key, (seqnum, value)) pairs of the live entries, in
+        # order, without needing to sort any more than the keys inserted
+        # since the last copy
+        if self._layer:
+            base = self._layer.iter_entries()
+            base_maxseq = self._layer.maxseq
+        else:
+            base = ()
+            base_maxseq = -1
+        return _merge_entries(base, self._entries,
+                              _get_new_items(self._entries, base_maxseq))
+
+    def _flatten(self):
+        # Get a dict of all live entries
+        return dict(self._iter_entries())
+
+    def __getitem__(self, key):
+        entry = self._lookup(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry[1]
+
+    def get(self, key, default=None):
+        entry = self._lookup(key)
+        if entry is None:
+            return default
+        return entry[1]
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def __setitem__(self, key, value):
+        entry = self._lookup(key)
+        if entry is None:
+            self._entries[key] = (next(_seqnums), value)
+            self._len += 1
+        else:
+            # Updating an existing key preserves its position:
+            self._entries[key] = (entry[0], value)
+
+    def __delitem__(self, key):
+        if self._lookup(key) is None:
+            raise KeyError(key)
+        if self._layer:
+            self._entries[key] = _DELETED
+        else:
+            del self._entries[key]
+        self._len -= 1
+
+    def __iter__(self):
+        # Take a snapshot, so that values can be updated during iteration:
+        return iter([key for key, entry in self._iter_entries()])
+
+    def items(self):
+        return [(key, entry[1]) for key, entry in self._iter_entries()]
+
+    def values(self):
+        return [entry[1] for key, entry in self._iter_entries()]
+
+    def __len__(self):
+        return self._len
+
+    def changed_items(self):
+        """
+        Get a list of the (key, value) pairs that have been set since this
+        map was last copied (or created)
+        """
+        return [(key, entry[1])
+                for key, entry in self._entries.items()
+                if entry is not _DELETED]
+
+    def copy(self):
+        """
+        Get a new DeltaMap with the same contents, sharing them with this one
+        """
+        if self._entries:
+            self._layer = _push_layer(self._entries, self._layer)
+            self._entries = {}
+        result = DeltaMap()
+        result._layer = self._layer
+        result._len = self._len
+        return result
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.items())
@@ -102,6 +102,27 @@ class Reporter:
     def __init__(self):
         self.reports = []
         self._got_warnings = False
+        # GCC diagnostics that aren't part of any Report, flushed before
+        # those of the reports:
+        self._saved_diagnostics = [] # list of SavedDiagnostic
+        # If the analysis exceeded its budgets and was degraded, a str
+        # describing why (see absinterp.Limits), or None:
+        self.degraded = None
+
+    def add_inform(self, loc, msg):
+        # Add a gcc.inform() about the function as a whole to the buffer of
+        # GCC diagnostics
+        self._saved_diagnostics.append(SavedInform(loc, msg))
+
+    def add_warning(self, loc, msg):
+        # Add a gcc.warning() that isn't part of any Report (such as one
+        # about the arguments of a call, issued whilst interpreting it) to
+        # the buffer of GCC diagnostics.  The same statement can be
+        # interpreted along many paths, so each one is only added once:
+        for d in self._saved_diagnostics:
+            if d.kind == 'warning' and d.loc == loc and d.msg == msg:
+                return
+        self._saved_diagnostics.append(SavedWarning(loc, msg))
 
     def make_warning(self, fun, loc, msg):
         assert isinstance(fun, gcc.Function)
@@ -164,15 +185,18 @@ class Reporter:
         Try to organize Report instances into equivalence classes, and only
         keep the first Report within each class
         """
-        for report in self.reports[:]:
-            # The report might have been removed during the iteration:
-            if report.is_duplicate:
-                continue
-            for candidate in self.reports[:]:
-                if report != candidate and not report.is_duplicate:
-                    if candidate.is_duplicate_of(report):
-                        report.add_duplicate(candidate)
-                        self.reports.remove(candidate)
+        # Group the reports in a single pass, by their equivalence keys:
+        first_report_by_key = {}
+        survivors = []
+        for report in self.reports:
+            key = report.get_equivalence_key()
+            first = first_report_by_key.get(key)
+            if first is None:
+                first_report_by_key[key] = report
+                survivors.append(report)
+            else:
+                first.add_duplicate(report)
+        self.reports[:] = survivors
 
         # Add a note to each report that survived about any duplicates:
         for report in self.reports:
@@ -181,7 +205,19 @@ class Reporter:
                                 ('found %i similar trace(s) to this'
                                  % len(report.duplicates)))
 
+    def get_saved_diagnostics(self):
+        """
+        Get the list of SavedDiagnostic instances that flush() emits, in
+        the order in which it emits them
+        """
+        result = list(self._saved_diagnostics)
+        for r in self.reports:
+            result += r._saved_diagnostics
+        return result
+
     def flush(self):
+        for d in self._saved_diagnostics:
+            d.flush()
         for r in self.reports:
             r.flush()
 
@@ -197,10 +233,14 @@ class SavedDiagnostic:
         self.msg = msg
 
 class SavedWarning(SavedDiagnostic):
+    kind = 'warning'
+
     def flush(self):
         gcc.warning(self.loc, self.msg)
 
 class SavedInform(SavedDiagnostic):
+    kind = 'inform'
+
     def flush(self):
         gcc.inform(self.loc, self.msg)
 
@@ -253,20 +293,19 @@ class Report:
     def get_annotator_for_trace(self, trace):
         return self._annotators.get(trace)
 
-    def is_duplicate_of(self, other):
-        check_isinstance(other, Report)
-
+    def get_equivalence_key(self):
+        """
+        Get a hashable value such that two reports are duplicates of each
+        other if and only if they have equal keys
+        """
         # Simplistic equivalence classes for now:
         # the same function, source location, and message; everything
         # else can be different
-        if self.fun != other.fun:
-            return False
-        if self.loc != other.loc:
-            return False
-        if self.msg != other.msg:
-            return False
-
-        return True
+        return (self.fun, self.loc, self.msg)
+
+    def is_duplicate_of(self, other):
+        check_isinstance(other, Report)
+        return self.get_equivalence_key() == other.get_equivalence_key()
 
     def add_duplicate(self, other):
         assert not self.is_duplicate
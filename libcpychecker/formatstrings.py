@@ -16,6 +16,7 @@
 #   <http://www.gnu.org/licenses/>.
 
 import sys
+from collections import OrderedDict
 
 from gccutils import get_src_for_loc, get_global_typedef
 
@@ -120,6 +121,11 @@ class AwkwardType:
     Base class for expected types within a format unit that need special
     handling (e.g. for "O!" and "O&")
     """
+    # Does is_compatible() record information about the callsite (e.g. the
+    # PyTypeObject passed for "O!")?  If so, the parsed format string can't
+    # be shared between callsites:
+    has_callsite_state = True
+
     def is_compatible(self, actual_type, actual_arg):
         raise NotImplementedError
 
@@ -133,11 +139,73 @@ class ParsedFormatString:
     def __init__(self, fmt_string):
         self.fmt_string = fmt_string
         self.args = []
+        self._exp_types = None
 
     def __repr__(self):
         return ('%s(fmt_string=%r, args=%r)'
                 % (self.__class__.__name__, self.fmt_string, self.args))
 
+    def get_exp_types(self):
+        """
+        Get the result of iter_exp_types() as a list, computing it once
+        """
+        if self._exp_types is None:
+            self._exp_types = list(self.iter_exp_types())
+        return self._exp_types
+
+    def can_be_shared(self):
+        """
+        Can this instance be safely reused for other callsites?
+        """
+        for (arg, exp_type) in self.get_exp_types():
+            if isinstance(exp_type, AwkwardType):
+                if exp_type.has_callsite_state:
+                    return False
+        return True
+
+# Real-world code uses a small set of format strings ("O", "|O", "s#", ...)
+# at many callsites, and the refcount checker visits each callsite once per
+# trace, so we keep a bounded cache of the results of parsing them, shared
+# by both checkers.  It maps from (fmt_string, with_size_t, parser) to either
+# a ParsedFormatString or the FormatStringWarning raised when parsing it.
+MAX_CACHED_FORMAT_STRINGS = 1024
+_parsed_format_strings = OrderedDict()
+
+def parse_format_string(parser, fmt_string, with_size_t):
+    """
+    Parse fmt_string using the given ParsedFormatString subclass, reusing
+    an earlier result where possible.
+
+    Raises a FormatStringWarning if the string can't be parsed
+    """
+    key = (fmt_string, with_size_t, parser)
+    result = _parsed_format_strings.get(key)
+    if result is not None:
+        # Mark it as the most recently used:
+        del _parsed_format_strings[key]
+        _parsed_format_strings[key] = result
+    else:
+        try:
+            result = parser.from_string(fmt_string, with_size_t)
+        except FormatStringWarning:
+            result = sys.exc_info()[1]
+        if isinstance(result, FormatStringWarning) or result.can_be_shared():
+            _parsed_format_strings[key] = result
+            if len(_parsed_format_strings) > MAX_CACHED_FORMAT_STRINGS:
+                _parsed_format_strings.popitem(last=False)
+    if isinstance(result, FormatStringWarning):
+        # Don't let the tracebacks of earlier raises of a cached warning
+        # accumulate (on Python 3):
+        result.__traceback__ = None
+        raise result
+    return result
+
+def _on_finish_unit():
+    # The expected types are only meaningful within one translation unit:
+    _parsed_format_strings.clear()
+
+gcc.register_callback(gcc.PLUGIN_FINISH_UNIT, _on_finish_unit)
+
 class WrongNumberOfVars(ParsedFormatStringWarning):
     def __init__(self, funcname, fmt, varargs):
         ParsedFormatStringWarning.__init__(self, funcname, fmt)
@@ -319,163 +387,166 @@ def compatible_type(exp_type, actual_type, actualarg=None):
 
     return False
 
-def check_pyargs(fun):
-    from libcpychecker.PyArg_ParseTuple import PyArgParseFmt
-    from libcpychecker.Py_BuildValue import PyBuildValueFmt
-
-    def get_format_string(stmt, format_idx):
-        fmt_code = stmt.args[format_idx]
-        # We can only cope with the easy case, when it's a AddrExpr(StringCst())
-        # i.e. a reference to a string constant, i.e. a string literal in the C
-        # source:
-        if isinstance(fmt_code, gcc.AddrExpr):
-            operand = fmt_code.operand
-            if isinstance(operand, gcc.StringCst):
-                return operand.constant
-
-    def check_keyword_array(stmt, idx):
-        keywords = stmt.args[idx]
-        if isinstance(keywords, gcc.AddrExpr):
-            operand = keywords.operand
-            if isinstance(operand, gcc.VarDecl):
-                # Caveat: "initial" will only be set up on the VarDecl of a
-                # global variable, or a "static" variable in function scope;
-                # for other local variables we appear to need to track the
-                # gimple statements to get the value at the callsite
-                initial = operand.initial
-                if isinstance(initial, gcc.Constructor):
-                    elements = [None] * len(initial.elements)
-                    for elt in initial.elements:
-                        (num, contents) = elt
-                        elt_idx = num.constant
-                        if isinstance(contents, gcc.NopExpr):
-                            contents = contents.operand
-                        if isinstance(contents, gcc.AddrExpr):
-                            contents = contents.operand
-                            if isinstance(contents, gcc.StringCst):
-                                elements[elt_idx] = contents.constant
-                        elif isinstance(contents, gcc.IntegerCst):
+def get_format_string(stmt, format_idx):
+    fmt_code = stmt.args[format_idx]
+    # We can only cope with the easy case, when it's a AddrExpr(StringCst())
+    # i.e. a reference to a string constant, i.e. a string literal in the C
+    # source:
+    if isinstance(fmt_code, gcc.AddrExpr):
+        operand = fmt_code.operand
+        if isinstance(operand, gcc.StringCst):
+            return operand.constant
+
+def check_keyword_array(stmt, idx):
+    keywords = stmt.args[idx]
+    if isinstance(keywords, gcc.AddrExpr):
+        operand = keywords.operand
+        if isinstance(operand, gcc.VarDecl):
+            # Caveat: "initial" will only be set up on the VarDecl of a
+            # global variable, or a "static" variable in function scope;
+            # for other local variables we appear to need to track the
+            # gimple statements to get the value at the callsite
+            initial = operand.initial
+            if isinstance(initial, gcc.Constructor):
+                elements = [None] * len(initial.elements)
+                for elt in initial.elements:
+                    (num, contents) = elt
+                    elt_idx = num.constant
+                    if isinstance(contents, gcc.NopExpr):
+                        contents = contents.operand
+                    if isinstance(contents, gcc.AddrExpr):
+                        contents = contents.operand
+                        if isinstance(contents, gcc.StringCst):
                             elements[elt_idx] = contents.constant
-                    if elements[-1] != 0:
-                        gcc.warning(stmt.loc, 'keywords to PyArg_ParseTupleAndKeywords are not NULL-terminated')
-                    i = 0
-                    for elt in elements[0:-1]:
-                        if not elt:
-                            gcc.warning(stmt.loc, 'keyword argument %d missing in PyArg_ParseTupleAndKeywords call' % i)
-                        i = i + 1
-
-    def check_callsite(stmt, parser, funcname, format_idx, varargs_idx, with_size_t):
-        log('got call at %s', stmt.loc)
-        log(get_src_for_loc(stmt.loc))
-        # log('stmt: %r %s', (stmt, stmt))
-        # log('args: %r', stmt.args)
-        # for arg in stmt.args:
-        #    # log('  arg: %s %r', (arg, arg))
-            
-
-        # We expect the following args:
-        #   args[0]: PyObject *input_tuple
-        #   args[1]: char * format
-        #   args[2...]: output pointers
-
-        if len(stmt.args) >= format_idx:
-            fmt_string = get_format_string(stmt, format_idx)
-            if fmt_string:
-                log('fmt_string: %r', fmt_string)
-
-                loc = stmt.loc
-
-                # Figure out expected types, based on the format string...
-                try:
-                    fmt = parser.from_string(fmt_string, with_size_t)
-                except FormatStringWarning:
-                    err = sys.exc_info()[1]
-                    err.emit_as_warning(stmt.loc)
-                    return
-                log('fmt: %r', fmt.args)
-
-                exp_types = list(fmt.iter_exp_types())
-                log('exp_types: %r', exp_types)
-
-                # ...then compare them against the actual types:
-                varargs = stmt.args[varargs_idx:]
-                # log('varargs: %r', varargs)
-                if len(varargs) < len(exp_types):
-                    NotEnoughVars(funcname, fmt, varargs).emit_as_warning(loc)
-                    return
-
-                if len(varargs) > len(exp_types):
-                    TooManyVars(funcname, fmt, varargs).emit_as_warning(loc)
-                    return
-
-                for index, ((exp_arg, exp_type), vararg) in enumerate(zip(exp_types, varargs)):
-                    if not compatible_type(exp_type, vararg.type, actualarg=vararg):
-                        err = MismatchingType(funcname, fmt,
-                                              index + varargs_idx + 1,
-                                              exp_arg.code, exp_type, vararg)
-                        if hasattr(vararg, 'location'):
-                            loc = vararg.location
-                        else:
-                            loc = stmt.loc
-                        err.emit_as_warning(loc)
-
-    def maybe_check_callsite(stmt):
-        if stmt.fndecl:
-            # If "PY_SSIZE_T_CLEAN" is defined before #include <Python.h>, then
-            # the preprocessor is actually turning these into "_SizeT"-suffixed
-            # variants, which handle some format codes differently
-
-            # FIXME: should we report the name as seen by the compiler?
-            # It doesn't appear in the CPython API docs
-
-            if stmt.fndecl.name == 'PyArg_ParseTuple':
-                check_callsite(stmt,
-                               PyArgParseFmt,
-                               'PyArg_ParseTuple',
-                               1, 2, False)
-            elif stmt.fndecl.name == '_PyArg_ParseTuple_SizeT':
-                check_callsite(stmt,
-                               PyArgParseFmt,
-                               'PyArg_ParseTuple',
-                               1, 2, True)
-            elif stmt.fndecl.name == 'PyArg_Parse':
-                check_callsite(stmt,
-                               PyArgParseFmt,
-                               'PyArg_Parse',
-                               1, 2, False)
-            elif stmt.fndecl.name == '_PyArg_Parse_SizeT':
-                check_callsite(stmt,
-                               PyArgParseFmt,
-                               'PyArg_Parse',
-                               1, 2, True)
-            elif stmt.fndecl.name == 'PyArg_ParseTupleAndKeywords':
-                check_keyword_array(stmt, 3)
-                check_callsite(stmt,
-                               PyArgParseFmt,
-                               'PyArg_ParseTupleAndKeywords',
-                               2, 4, False)
-            elif stmt.fndecl.name == '_PyArg_ParseTupleAndKeywords_SizeT':
-                check_keyword_array(stmt, 3)
-                check_callsite(stmt,
-                               PyArgParseFmt,
-                               'PyArg_ParseTupleAndKeywords',
-                               2, 4, True)
-            elif stmt.fndecl.name == 'Py_BuildValue':
-                check_callsite(stmt,
-                               PyBuildValueFmt,
-                               'Py_BuildValue',
-                               0, 1, False)
-            elif stmt.fndecl.name == 'Py_BuildValue_SizeT':
-                check_callsite(stmt,
-                               PyBuildValueFmt,
-                               'Py_BuildValue',
-                               0, 1, True)
+                    elif isinstance(contents, gcc.IntegerCst):
+                        elements[elt_idx] = contents.constant
+                if elements[-1] != 0:
+                    gcc.warning(stmt.loc, 'keywords to PyArg_ParseTupleAndKeywords are not NULL-terminated')
+                i = 0
+                for elt in elements[0:-1]:
+                    if not elt:
+                        gcc.warning(stmt.loc, 'keyword argument %d missing in PyArg_ParseTupleAndKeywords call' % i)
+                    i = i + 1
+
+def check_callsite(stmt, parser, funcname, format_idx, varargs_idx, with_size_t):
+    log('got call at %s', stmt.loc)
+    log(get_src_for_loc(stmt.loc))
+    # log('stmt: %r %s', (stmt, stmt))
+    # log('args: %r', stmt.args)
+    # for arg in stmt.args:
+    #    # log('  arg: %s %r', (arg, arg))
+
+
+    # We expect the following args:
+    #   args[0]: PyObject *input_tuple
+    #   args[1]: char * format
+    #   args[2...]: output pointers
+
+    if len(stmt.args) >= format_idx:
+        fmt_string = get_format_string(stmt, format_idx)
+        if fmt_string:
+            log('fmt_string: %r', fmt_string)
+
+            loc = stmt.loc
+
+            # Figure out expected types, based on the format string...
+            try:
+                fmt = parse_format_string(parser, fmt_string, with_size_t)
+            except FormatStringWarning:
+                err = sys.exc_info()[1]
+                err.emit_as_warning(stmt.loc)
+                return
+            log('fmt: %r', fmt.args)
+
+            exp_types = fmt.get_exp_types()
+            log('exp_types: %r', exp_types)
+
+            # ...then compare them against the actual types:
+            varargs = stmt.args[varargs_idx:]
+            # log('varargs: %r', varargs)
+            if len(varargs) < len(exp_types):
+                NotEnoughVars(funcname, fmt, varargs).emit_as_warning(loc)
+                return
+
+            if len(varargs) > len(exp_types):
+                TooManyVars(funcname, fmt, varargs).emit_as_warning(loc)
+                return
+
+            for index, ((exp_arg, exp_type), vararg) in enumerate(zip(exp_types, varargs)):
+                if not compatible_type(exp_type, vararg.type, actualarg=vararg):
+                    err = MismatchingType(funcname, fmt,
+                                          index + varargs_idx + 1,
+                                          exp_arg.code, exp_type, vararg)
+                    if hasattr(vararg, 'location'):
+                        loc = vararg.location
+                    else:
+                        loc = stmt.loc
+                    err.emit_as_warning(loc)
+
+class FormatStringChecker:
+    """
+    Callsite checker for a function taking a format string and varargs
+    (PyArg_ParseTuple and friends), for use with register_callsite_checker
+    """
+    def __init__(self, parser, funcname, format_idx, varargs_idx, with_size_t,
+                 keywords_idx=None):
+        self.parser = parser
+        # The name to use in warnings:
+        self.funcname = funcname
+        self.format_idx = format_idx
+        self.varargs_idx = varargs_idx
+        self.with_size_t = with_size_t
+        # The index of the array of keywords, if any:
+        self.keywords_idx = keywords_idx
+
+    def __call__(self, stmt):
+        if self.keywords_idx is not None:
+            check_keyword_array(stmt, self.keywords_idx)
+        check_callsite(stmt, self.parser, self.funcname,
+                       self.format_idx, self.varargs_idx, self.with_size_t)
+
+    def __repr__(self):
+        return ('%s(%s, %r, %r, %r, %r, keywords_idx=%r)'
+                % (self.__class__.__name__, self.parser.__name__,
+                   self.funcname, self.format_idx, self.varargs_idx,
+                   self.with_size_t, self.keywords_idx))
+
+# Mapping from the name of a function to a callable taking a gcc.GimpleCall,
+# which checks the arguments of a call to that function:
+_callsite_checkers = {}
+
+def register_callsite_checker(fnname, checker):
+    """
+    Arrange for check_pyargs to call checker(stmt) for every call to the
+    function with the given name
+    """
+    _callsite_checkers[fnname] = checker
 
+def get_callsite_checker(fnname):
+    return _callsite_checkers.get(fnname)
+
+def iter_relevant_calls(fun):
+    """
+    Yield the (gcc.GimpleCall, checker) pairs for those calls within the
+    function for which a checker has been registered, in the order of the
+    function's blocks and statements (and hence of the warnings)
+    """
     if fun.cfg:
         for bb in fun.cfg.basic_blocks:
-            if isinstance(bb.gimple, list):
+            if bb.gimple:
                 for stmt in bb.gimple:
-                    if stmt.loc:
-                        gcc.set_location(stmt.loc)
-                    if isinstance(stmt, gcc.GimpleCall):
-                        maybe_check_callsite(stmt)
+                    if isinstance(stmt, gcc.GimpleCall) and stmt.fndecl:
+                        checker = _callsite_checkers.get(stmt.fndecl.name)
+                        if checker:
+                            yield stmt, checker
+
+def check_pyargs(fun):
+    # Importing these modules registers the checkers for the functions that
+    # they handle:
+    import libcpychecker.PyArg_ParseTuple
+    import libcpychecker.Py_BuildValue
+
+    for stmt, checker in iter_relevant_calls(fun):
+        if stmt.loc:
+            gcc.set_location(stmt.loc)
+        checker(stmt)
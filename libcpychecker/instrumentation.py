@@ -0,0 +1,128 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Instrumentation of the refcount checker: how long each phase of checking
+each function took, and how much work it did (transitions, states, traces,
+reports etc), so that the slowest functions across a build can be found.
+
+The statistics for each translation unit can be written out as JSON, to a
+file named after the dump base name, e.g. "foo.c.cpychecker-stats.json"
+"""
+
+import json
+from collections import OrderedDict
+
+try:
+    from time import process_time
+except ImportError:
+    # Python 2:
+    from time import clock as process_time
+
+import gcc
+from gccutils import check_isinstance
+
+class FunctionStats:
+    """
+    The CPU time spent in each phase of checking one function, together with
+    counters of the work done
+    """
+    def __init__(self, fun):
+        check_isinstance(fun, gcc.Function)
+        self.name = fun.decl.name
+        self.file = fun.start.file
+        self.line = fun.start.line
+
+        # Mapping from phase name to CPU seconds, in the order in which the
+        # phases were first entered:
+        self.phases = OrderedDict()
+
+        # Mapping from counter name to int:
+        self.counters = OrderedDict()
+
+        self._phase = None
+        self._phase_start = None
+
+    def start_phase(self, name):
+        """
+        Start timing the named phase, ending the current one (if any)
+        """
+        check_isinstance(name, str)
+        self.end_phase()
+        self._phase = name
+        self._phase_start = process_time()
+
+    def end_phase(self):
+        if self._phase:
+            elapsed = process_time() - self._phase_start
+            self.phases[self._phase] = \
+                self.phases.get(self._phase, 0.0) + elapsed
+            self._phase = None
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def get_total_time(self):
+        return sum(self.phases.values())
+
+    def to_json(self):
+        return OrderedDict([('function', self.name),
+                            ('file', self.file),
+                            ('line', self.line),
+                            ('total_secs', self.get_total_time()),
+                            ('phases', self.phases),
+                            ('counters', self.counters)])
+
+class TranslationUnitStats:
+    """
+    The FunctionStats for every function checked within one translation unit
+    """
+    def __init__(self):
+        self.functions = []
+
+    def add(self, stats):
+        check_isinstance(stats, FunctionStats)
+        self.functions.append(stats)
+
+    def get_totals(self):
+        """
+        Sum the times of each phase and the counters across all functions
+        """
+        phases = OrderedDict()
+        counters = OrderedDict()
+        for stats in self.functions:
+            for name, secs in stats.phases.items():
+                phases[name] = phases.get(name, 0.0) + secs
+            for name, value in stats.counters.items():
+                counters[name] = counters.get(name, 0) + value
+        return OrderedDict([('total_secs', sum(phases.values())),
+                            ('phases', phases),
+                            ('counters', counters)])
+
+    def to_json(self):
+        return OrderedDict([('dump_base_name', gcc.get_dump_base_name()),
+                            ('totals', self.get_totals()),
+                            ('functions', [stats.to_json()
+                                           for stats in self.functions])])
+
+    def write_json(self):
+        """
+        Write out the JSON for this translation unit, returning the filename
+        """
+        filename = '%s.cpychecker-stats.json' % gcc.get_dump_base_name()
+        with open(filename, 'w') as f:
+            json.dump(self.to_json(), f, indent=4)
+        return filename
@@ -0,0 +1,250 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+"""
+Running the refcount checker on several functions in parallel.
+
+The checker's work on each function is independent of its work on every
+other function, and dominates the compile time of translation units with
+many functions.  A FunctionPool runs each function's analysis in a child
+process forked from the compiler at the point where the function is
+reached.  The fork gives the child a private copy-on-write snapshot of the
+compiler's state (the function's gimple, its types, and so on), without
+having to serialize any of it.
+
+Each child writes out its report files directly, and sends the GCC
+diagnostics that it would have emitted back to the compiler process as a
+CachedResult (see libcpychecker.cache).  Any diagnostics that the child
+emits directly (rather than via the result) are captured and sent back
+too, so that nothing is written to the child's stderr, and so that every
+diagnostic counts towards the compiler's totals (e.g. for -Werror).  These
+are emitted by join(), ordered by the location of each function in the
+source, so that the output doesn't depend on which child finished first.
+Any function whose child failed, or whose diagnostics can't be mapped back
+onto its locations, is simply checked again within the compiler process.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+import gcc
+from gccutils import check_isinstance
+from libcpychecker.cache import CachedResult, get_locations_for_function, \
+    location_as_tuple
+from libcpychecker.utils import log
+
+def get_default_num_jobs():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    import multiprocessing
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+class Job:
+    """
+    The analysis of one function, within a child process
+    """
+    def __init__(self, index, fun, checkfn, pid, path):
+        self.index = index
+        self.fun = fun
+        self.checkfn = checkfn
+        self.pid = pid
+        self.path = path
+
+        # The outcome of the child (once it has exited): either a
+        # CachedResult, or a string giving the reason why it failed:
+        self.result = None
+        self.error = None
+
+    def get_sort_key(self):
+        return (location_as_tuple(self.fun.start), self.index)
+
+    def on_exit(self, status):
+        """
+        Gather the outcome of the child, given its exit status
+        """
+        if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+            try:
+                with open(self.path) as f:
+                    js = json.load(f)
+                self.result = CachedResult.from_json(js)
+            except (IOError, OSError, ValueError, KeyError, TypeError):
+                self.error = traceback.format_exc()
+        else:
+            try:
+                with open(self.path) as f:
+                    self.error = f.read()
+            except (IOError, OSError):
+                self.error = 'exit status %i' % status
+
+class CapturedDiagnostics:
+    """
+    Within a child process, replace the GCC diagnostic functions with ones
+    that record each diagnostic, for adding to the CachedResult that is
+    sent back to the compiler process
+    """
+    KINDS = ('warning', 'inform', 'error', 'permerror')
+
+    def __init__(self):
+        # list of (kind, (file, line, column), msg) triples:
+        self.diagnostics = []
+        self._saved = {}
+
+    def __enter__(self):
+        for kind in self.KINDS:
+            self._saved[kind] = getattr(gcc, kind)
+            setattr(gcc, kind, self._make_recorder(kind))
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        for kind in self.KINDS:
+            setattr(gcc, kind, self._saved[kind])
+
+    def _make_recorder(self, kind):
+        def record(location, message, option=None):
+            if option is not None:
+                # The option controlling a warning can't be sent back, so
+                # the function will have to be checked again within the
+                # compiler process:
+                raise ValueError('unable to capture %s controlled by %s: %s'
+                                 % (kind, option, message))
+            self.diagnostics.append((kind, location_as_tuple(location),
+                                     message))
+            return True
+        return record
+
+class FunctionPool:
+    """
+    Runs the analysis of functions in child processes, at most num_jobs at
+    a time
+    """
+    def __init__(self, num_jobs, on_result=None):
+        check_isinstance(num_jobs, int)
+        assert num_jobs > 1
+        self.num_jobs = num_jobs
+        # Optional callable, to be passed the CachedResult of each function
+        # whose diagnostics were emitted by join():
+        self.on_result = on_result
+        self.running = [] # list of Job, in the order started
+        self.finished = [] # list of Job
+        self.tmpdir = None
+        self.num_submitted = 0
+
+    def submit(self, fun, checkfn):
+        """
+        Call checkfn(fun, result_sink) in a child process.  checkfn must pass
+        a CachedResult to result_sink, rather than emitting any GCC
+        diagnostics itself.
+        """
+        check_isinstance(fun, gcc.Function)
+        while len(self.running) >= self.num_jobs:
+            self._wait_for_any()
+
+        if not self.tmpdir:
+            self.tmpdir = tempfile.mkdtemp(prefix='cpychecker-')
+        path = os.path.join(self.tmpdir, '%i.json' % self.num_submitted)
+
+        # Don't let the child inherit any buffered output:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if pid == 0:
+            # Child process: never return into the compiler
+            status = 1
+            try:
+                try:
+                    results = []
+                    with CapturedDiagnostics() as captured:
+                        checkfn(fun, results.append)
+                    assert len(results) == 1
+                    result = results[0]
+                    # Any diagnostics emitted directly were emitted before
+                    # those passed back in the result would have been:
+                    result.diagnostics = (captured.diagnostics
+                                          + result.diagnostics)
+                    with open(path, 'w') as f:
+                        json.dump(result.to_json(), f)
+                    status = 0
+                except:
+                    with open(path, 'w') as f:
+                        f.write(traceback.format_exc())
+            finally:
+                os._exit(status)
+
+        self.running.append(Job(self.num_submitted, fun, checkfn, pid, path))
+        self.num_submitted += 1
+
+    # How long to sleep between polls of the running children, in seconds:
+    POLL_INTERVAL = 0.005
+
+    def _wait_for_any(self):
+        """
+        Wait for whichever running child exits first
+
+        Only our own children are waited for: other code within the
+        compiler process may have children of its own, and need their exit
+        statuses
+        """
+        while True:
+            for i, job in enumerate(self.running):
+                pid, status = os.waitpid(job.pid, os.WNOHANG)
+                if pid:
+                    del self.running[i]
+                    self._on_exit(job, status)
+                    return
+            time.sleep(self.POLL_INTERVAL)
+
+    def _on_exit(self, job, status):
+        job.on_exit(status)
+        self.finished.append(job)
+
+    def join(self):
+        """
+        Wait for all of the children, emitting the GCC diagnostics of each
+        function in source order (whilst the functions are still available
+        to be checked again if necessary)
+        """
+        while self.running:
+            job = self.running.pop(0)
+            pid, status = os.waitpid(job.pid, 0)
+            self._on_exit(job, status)
+        jobs = sorted(self.finished, key=Job.get_sort_key)
+        self.finished = []
+        for job in jobs:
+            if job.result and job.result.can_replay(job.fun):
+                job.result.emit_diagnostics(
+                    job.fun, get_locations_for_function(job.fun))
+                if self.on_result:
+                    self.on_result(job.result)
+                continue
+            if job.error:
+                log('child process for %s failed: %s',
+                    job.fun.decl.name, job.error)
+            # Fall back to checking the function within this process, which
+            # will also raise any exception that the child saw:
+            job.checkfn(job.fun, None)
+        if self.tmpdir:
+            shutil.rmtree(self.tmpdir)
+            self.tmpdir = None
@@ -30,6 +30,7 @@ from libcpychecker.attributes import fnnames_returning_borrowed_refs, \
     stolen_refs_by_fnname, fnnames_setting_exception, \
     fnnames_setting_exception_on_negative_result
 from libcpychecker.diagnostics import Reporter, Annotator, Note
+from libcpychecker.formatstrings import parse_format_string
 from libcpychecker.PyArg_ParseTuple import PyArgParseFmt, FormatStringWarning,\
     TypeCheckCheckerType, TypeCheckResultType, \
     ConverterCallbackType, ConverterResultType
@@ -37,8 +38,27 @@ from libcpychecker.Py_BuildValue import PyBuildValueFmt, ObjectFormatUnit, \
     CodeSO, CodeN
 from libcpychecker.types import is_py3k, is_debug_build, get_PyObjectPtr, \
     get_Py_ssize_t
+from libcpychecker import utils
 from libcpychecker.utils import log
+from libcpychecker.cache import RefcountCache, CachedResult, \
+    location_as_tuple, get_report_filename, get_html_report_message, \
+    HTML_REPORT_SUFFIX
 from libcpychecker import compat
+from libcpychecker import summaries
+from libcpychecker.instrumentation import FunctionStats
+from libcpychecker.reports import policy_writes_json, policy_writes_html
+
+# The Reporter of the function being analyzed by impl_check_refcounts, if
+# any.  Warnings issued whilst interpreting a statement are added to it, so
+# that they're emitted (and cached, and passed back from child processes)
+# along with the rest of the function's diagnostics:
+interpretation_reporter = None
+
+def warn_during_interpretation(loc, msg):
+    if interpretation_reporter:
+        interpretation_reporter.add_warning(loc, msg)
+    else:
+        gcc.warning(loc, msg)
 
 def stmt_is_assignment_to_count(stmt):
     if hasattr(stmt, 'lhs'):
@@ -371,6 +391,14 @@ class RefcountValue(AbstractValue):
         return dict(actual_ob_refcnt=actual,
                     expected_ob_refcnt=expected)
 
+    def merge_key(self):
+        if self.r_obj:
+            r_obj_key = self.r_obj.merge_key()
+        else:
+            r_obj_key = None
+        return (AbstractValue.merge_key(self)
+                + (r_obj_key, self.relvalue, self.external.merge_key()))
+
     def eval_binop(self, exprcode, rhs, rhsdesc, gcctype, loc):
         if isinstance(rhs, ConcreteValue):
             if exprcode == gcc.PlusExpr:
@@ -388,7 +416,8 @@ class RefcountValue(AbstractValue):
         """
         if opname == 'eq':
             if isinstance(rhs, ConcreteValue):
-                log('comparing refcount value %s with concrete value: %s', self, rhs)
+                if utils.logging_enabled:
+                    log('comparing refcount value %s with concrete value: %s', self, rhs)
                 # The actual value of ob_refcnt >= lhs.relvalue
                 if self.get_min_value() > rhs.value:
                     # (Equality is thus not possible for this case)
@@ -396,25 +425,29 @@ class RefcountValue(AbstractValue):
 
         elif opname == 'le':
             if isinstance(rhs, ConcreteValue):
-                log('comparing refcount value %s with concrete value: %s', self, rhs)
+                if utils.logging_enabled:
+                    log('comparing refcount value %s with concrete value: %s', self, rhs)
                 if self.get_min_value() > rhs.value:
                     return False
 
         elif opname == 'lt':
             if isinstance(rhs, ConcreteValue):
-                log('comparing refcount value %s with concrete value: %s', self, rhs)
+                if utils.logging_enabled:
+                    log('comparing refcount value %s with concrete value: %s', self, rhs)
                 if self.get_min_value() >= rhs.value:
                     return False
 
         elif opname == 'ge':
             if isinstance(rhs, ConcreteValue):
-                log('comparing refcount value %s with concrete value: %s', self, rhs)
+                if utils.logging_enabled:
+                    log('comparing refcount value %s with concrete value: %s', self, rhs)
                 if self.get_min_value() >= rhs.value:
                     return True
 
         elif opname == 'gt':
             if isinstance(rhs, ConcreteValue):
-                log('comparing refcount value %s with concrete value: %s', self, rhs)
+                if utils.logging_enabled:
+                    log('comparing refcount value %s with concrete value: %s', self, rhs)
                 if self.get_min_value() > rhs.value:
                     return True
 
@@ -440,7 +473,8 @@ class GenericTpDealloc(AbstractValue):
             check_isinstance(value, PointerToRegion)
             region = value.region
             check_isinstance(region, Region)
-            log('generic tp_dealloc called for %s', region)
+            if utils.logging_enabled:
+                log('generic tp_dealloc called for %s', region)
 
             # Get the description of the region before trashing it:
             desc = 'calling tp_dealloc on %s' % region
@@ -508,8 +542,12 @@ class CPython(Facet):
                         self.has_gil)
         return f_new
 
+    def merge_key(self):
+        return (self.exception_rvalue.merge_key(), self.has_gil)
+
     def init_for_function(self, fun):
-        log('CPython.init_for_function(%r)', fun)
+        if utils.logging_enabled:
+            log('CPython.init_for_function(%r)', fun)
 
         # Initialize PyObject* arguments to sane values
         # (assume that they're non-NULL)
@@ -518,7 +556,8 @@ class CPython(Facet):
             region = self.state.eval_lvalue(parm, None)
             if type_is_pyobjptr_subclass(parm.type):
                 # We have a PyObject* (or a derived class)
-                log('got python obj arg: %r', region)
+                if utils.logging_enabled:
+                    log('got python obj arg: %r', region)
                 # Assume it's a non-NULL ptr:
                 objregion = RegionForLocal(parm, None)
                 self.state.region_for_var[objregion] = objregion
@@ -565,13 +604,15 @@ class CPython(Facet):
         check_isinstance(ob_refcnt, Region)
         oldvalue = self.state.get_store(ob_refcnt, None, loc) # FIXME: gcctype
         check_isinstance(oldvalue, AbstractValue)
-        log('oldvalue: %r', oldvalue)
+        if utils.logging_enabled:
+            log('oldvalue: %r', oldvalue)
         # If we never had a ob_refcnt, treat it as a borrowed reference:
         if isinstance(oldvalue, UnknownValue):
             oldvalue = RefcountValue.borrowed_ref(loc, pyobjectptr.region)
         check_isinstance(oldvalue, RefcountValue)
         newvalue = fn(oldvalue)
-        log('newvalue: %r', newvalue)
+        if utils.logging_enabled:
+            log('newvalue: %r', newvalue)
         self.state.value_for_region[ob_refcnt] = newvalue
         return newvalue
 
@@ -920,7 +961,8 @@ class CPython(Facet):
             check_isinstance(self.state.region_for_var[var], Region)
             r_obj = self.state.region_for_var[var]
 
-            log('considering ob_refcnt of %r', r_obj)
+            if utils.logging_enabled:
+                log('considering ob_refcnt of %r', r_obj)
             check_isinstance(r_obj, Region)
 
             # Consider those for which we know something about an "ob_refcnt"
@@ -1106,7 +1148,7 @@ class CPython(Facet):
             return UnknownValue.make(exptype.dereference, stmt.loc)
 
         def _handle_successful_parse(fmt):
-            exptypes = fmt.iter_exp_types()
+            exptypes = fmt.get_exp_types()
             for v_vararg, (unit, exptype) in zip(v_varargs, exptypes):
                 if 0:
                     print('v_vararg: %r' % v_vararg)
@@ -1121,7 +1163,8 @@ class CPython(Facet):
         fmt_string = v_fmt.as_string_constant()
         if fmt_string:
             try:
-                fmt = PyArgParseFmt.from_string(fmt_string, with_size_t)
+                fmt = parse_format_string(PyArgParseFmt, fmt_string,
+                                          with_size_t)
                 _handle_successful_parse(fmt)
             except FormatStringWarning:
                 pass
@@ -1311,7 +1354,7 @@ class CPython(Facet):
             """
             Returns a boolean: is success of the function possible?
             """
-            exptypes = fmt.iter_exp_types()
+            exptypes = fmt.get_exp_types()
             for v_vararg, (unit, exptype) in zip(v_varargs, exptypes):
                 if 0:
                     print('v_vararg: %r' % v_vararg)
@@ -1338,7 +1381,8 @@ class CPython(Facet):
         fmt_string = v_fmt.as_string_constant()
         if fmt_string:
             try:
-                fmt = PyBuildValueFmt.from_string(fmt_string, with_size_t)
+                fmt = parse_format_string(PyBuildValueFmt, fmt_string,
+                                          with_size_t)
                 if not _handle_successful_parse(fmt):
                     return [t_failure]
             except FormatStringWarning:
@@ -2639,7 +2683,7 @@ class CPython(Facet):
             """
             Returns a boolean: is success of the function possible?
             """
-            exptypes = fmt.iter_exp_types()
+            exptypes = fmt.get_exp_types()
             for v_vararg, (unit, exptype) in zip(fncall.varargs, exptypes):
                 if 0:
                     print('v_vararg: %r' % v_vararg)
@@ -2664,7 +2708,8 @@ class CPython(Facet):
         fmt_string = fncall.args[fmtargidx].as_string_constant()
         if fmt_string:
             try:
-                fmt = PyBuildValueFmt.from_string(fmt_string, with_size_t)
+                fmt = parse_format_string(PyBuildValueFmt, fmt_string,
+                                          with_size_t)
                 if not _handle_successful_parse(fmt):
                     on_success.is_possible = False
             except FormatStringWarning:
@@ -2739,15 +2784,17 @@ class CPython(Facet):
                 loc = v_arg.loc
                 if not loc:
                     loc = stmt.loc
-                gcc.warning(loc,
-                            ('argument %i had type %s but was expecting a PyObject* (or subclass)'
-                             % (i + base_idx + 1, v_arg.gcctype)))
+                warn_during_interpretation(
+                    loc,
+                    ('argument %i had type %s but was expecting a PyObject* (or subclass)'
+                     % (i + base_idx + 1, v_arg.gcctype)))
 
         # check NULL-termination:
         if not args or not args[-1].is_null_ptr():
-            gcc.warning(stmt.loc,
-                        ('arguments to %s were not NULL-terminated'
-                         % fnmeta.name))
+            warn_during_interpretation(
+                stmt.loc,
+                ('arguments to %s were not NULL-terminated'
+                 % fnmeta.name))
 
     def impl_PyObject_CallFunctionObjArgs(self, stmt, v_callable, *args):
         fnmeta = FnMeta(name='PyObject_CallFunctionObjArgs',
@@ -3972,8 +4019,9 @@ class RefcountAnnotator(Annotator):
         dest_refcnt = transition.dest.get_value_of_field_by_region(self.region,
                                                                    'ob_refcnt')
         if src_refcnt != dest_refcnt:
-            log('src_refcnt: %r', src_refcnt)
-            log('dest_refcnt: %r', dest_refcnt)
+            if utils.logging_enabled:
+                log('src_refcnt: %r', src_refcnt)
+                log('dest_refcnt: %r', dest_refcnt)
             result.append(Note(loc,
                                ('ob_refcnt is now %s' % dest_refcnt)))
 
@@ -4108,7 +4156,8 @@ def check_refcount_for_one_object(r_obj, v_ob_refcnt, v_return,
     exp_refs += [ref.name
                  for ref in endstate.get_persistent_refs_for_region(r_obj)]
     exp_refcnt = len(exp_refs)
-    log('exp_refs: %r', exp_refs)
+    if utils.logging_enabled:
+        log('exp_refs: %r', exp_refs)
 
     if fun.decl.name in stolen_refs_by_fnname:
         # Then this function is marked as stealing references to one or
@@ -4207,7 +4256,13 @@ def make_stmt_graph(fun):
 
 def impl_check_refcounts(fun, dump_traces=False,
                          show_possible_null_derefs=False,
-                         maxtrans=256):
+                         maxtrans=256,
+                         merge_states=False,
+                         function_summaries=False,
+                         max_cpu_secs=None,
+                         max_states=None,
+                         max_bytes=None,
+                         stats=None):
     """
     Inner implementation of the refcount checker, checking the refcounting
     behavior of a function, returning a Reporter instance.
@@ -4219,10 +4274,27 @@ def impl_check_refcounts(fun, dump_traces=False,
 
     dump_traces: bool: if True, dump information about the traces through
     the function to stdout (for self tests)
+
+    merge_states: bool: if True, use iter_traces_by_worklist, merging
+    equivalent states at join points, rather than enumerating every path
+
+    function_summaries: bool: if True, model calls to static helper
+    functions returning PyObject* using summaries of their bodies (see
+    libcpychecker.summaries)
+
+    max_cpu_secs, max_states, max_bytes: optional budgets on the CPU time
+    taken, the number of states held, and their approximate size in
+    bytes; once one is exceeded, the analysis switches to a cheaper,
+    less precise mode for the rest of the function (see absinterp.Limits)
+
+    stats: a FunctionStats: if set, the time taken by each phase and the
+    work done are recorded there (see libcpychecker.instrumentation)
     """
     # Abstract interpretation:
     # Walk the CFG, gathering the information we're interested in
 
+    global interpretation_reporter
+
     check_isinstance(fun, gcc.Function)
 
     # Generate a mapping from facet names to facet classes, so that we know
@@ -4234,23 +4306,73 @@ def impl_check_refcounts(fun, dump_traces=False,
     if get_PyObject():
         facets['cpython'] = CPython
 
-    limits=Limits(maxtrans=maxtrans)
+    # Summarize any helper functions that are called, before starting the
+    # clock on this function's budgets:
+    if function_summaries:
+        if stats:
+            stats.start_phase('summaries')
+        summaries.maxtrans = maxtrans
+        callee_summaries = summaries.get_callee_summary_table(fun)
+    else:
+        callee_summaries = None
 
+    limits=Limits(maxtrans=maxtrans,
+                  max_cpu_secs=max_cpu_secs,
+                  max_states=max_states,
+                  max_bytes=max_bytes)
+
+    if stats:
+        stats.start_phase('stmtgraph')
     stmtgraph = make_stmt_graph(fun)
     if 0:
         dot = stmtgraph.to_dot('foo')
         from gccutils import invoke_dot
         invoke_dot(dot)
 
+    if merge_states:
+        engine = iter_traces_by_worklist
+    else:
+        engine = iter_traces
+
+    rep = Reporter()
+
+    if stats:
+        stats.start_phase('traces')
+    old_summaries = set_callee_summaries(callee_summaries)
+    old_reporter = interpretation_reporter
+    interpretation_reporter = rep
+    incomplete = False
     try:
-        traces = iter_traces(stmtgraph,
-                             facets,
-                             limits=limits)
+        traces = engine(stmtgraph,
+                        facets,
+                        limits=limits)
     except TooComplicated:
         err = sys.exc_info()[1]
-        gcc.inform(fun.start,
-                   'this function is too complicated for the reference-count checker to fully analyze: not all paths were analyzed')
+        incomplete = True
         traces = err.complete_traces
+    finally:
+        set_callee_summaries(old_summaries)
+        interpretation_reporter = old_reporter
+
+    if incomplete or limits.degraded:
+        reasons = []
+        if limits.degraded:
+            reasons.append('%s after %i transitions, so later paths were approximated'
+                           % (limits.degraded, limits.trans_seen))
+        if incomplete:
+            reasons.append('not all paths were analyzed')
+        rep.add_inform(fun.start,
+                       'this function is too complicated for the reference-count checker to fully analyze: %s'
+                       % '; '.join(reasons))
+        rep.degraded = limits.degraded
+
+    if stats:
+        stats.count('transitions', limits.trans_seen)
+        stats.count('states', limits.trans_seen - limits.states_merged)
+        stats.count('states_merged', limits.states_merged)
+        stats.count('splits', limits.splits)
+        stats.count('traces', len(traces))
+        stats.start_phase('checking')
 
     if dump_traces:
         traces = list(traces)
@@ -4273,15 +4395,15 @@ def impl_check_refcounts(fun, dump_traces=False,
                    ('graphical debug report for function %r written out to %r'
                     % (fun.decl.name, filename)))
 
-    rep = Reporter()
-
     # Iterate through all traces, adding reports to the Reporter:
     for i, trace in enumerate(traces):
-        trace.log(log, 'TRACE %i' % i)
+        if utils.logging_enabled:
+            trace.log(log, 'TRACE %i' % i)
         if trace.err:
             # This trace bails early with a fatal error; it probably doesn't
             # have a return value
-            log('trace.err: %s %r', trace.err, trace.err)
+            if utils.logging_enabled:
+                log('trace.err: %s %r', trace.err, trace.err)
 
             # Unless explicitly enabled, don't report on NULL pointer
             # dereferences that are only possible, not definite: it may be
@@ -4305,7 +4427,8 @@ def impl_check_refcounts(fun, dump_traces=False,
             continue
         # Otherwise, the trace proceeds normally
         v_return = trace.return_value()
-        log('trace.return_value(): %s', trace.return_value())
+        if utils.logging_enabled:
+            log('trace.return_value(): %s', trace.return_value())
 
         # Ideally, we should "own" exactly one reference, and it should be
         # the return value.  Anything else is an error (and there are other
@@ -4313,10 +4436,11 @@ def impl_check_refcounts(fun, dump_traces=False,
 
         # Locate all PyObject that we touched
         endstate = trace.states[-1]
-        endstate.log(log)
-        log('return_value: %r', v_return)
-        log('endstate.region_for_var: %r', endstate.region_for_var)
-        log('endstate.value_for_region: %r', endstate.value_for_region)
+        if utils.logging_enabled:
+            endstate.log(log)
+            log('return_value: %r', v_return)
+            log('endstate.region_for_var: %r', endstate.region_for_var)
+            log('endstate.value_for_region: %r', endstate.value_for_region)
 
         if endstate.not_returning:
             # We have a function that calls exit() or abort() or similar
@@ -4347,6 +4471,10 @@ def impl_check_refcounts(fun, dump_traces=False,
 
     # (all traces analysed)
 
+    if stats:
+        stats.count('reports', len(rep.reports))
+        stats.end_phase()
+
     return rep
 
 
@@ -4354,7 +4482,17 @@ def check_refcounts(fun, dump_traces=False, show_traces=False,
                     show_possible_null_derefs=False,
                     show_timings=False,
                     maxtrans=256,
-                    dump_json=False):
+                    dump_json=False,
+                    merge_states=False,
+                    cache_dir=None,
+                    result_sink=None,
+                    function_summaries=False,
+                    max_cpu_secs=None,
+                    max_states=None,
+                    max_bytes=None,
+                    tu_stats=None,
+                    reports='html',
+                    tu_reports=None):
     """
     The top-level function of the refcount checker, checking the refcounting
     behavior of a function
@@ -4367,17 +4505,89 @@ def check_refcounts(fun, dump_traces=False, show_traces=False,
     show_traces: bool: if True, display a diagram of the state transition graph
 
     show_timings: bool: if True, add timing information to stderr
+
+    cache_dir: str: if set, the path of a directory holding a persistent
+    cache of results (see libcpychecker.cache).  If an equivalent function
+    has been checked before, its diagnostics and report files are replayed
+    from there, and None is returned rather than a Reporter
+
+    result_sink: callable: if set, the GCC diagnostics aren't emitted;
+    instead, the CachedResult describing them (and the report files, which
+    are still written out) is passed to result_sink, so that the caller can
+    emit them later (see libcpychecker.parallel)
+
+    function_summaries: bool: if True, model calls to static helper
+    functions using summaries of their bodies (see libcpychecker.summaries)
+
+    max_cpu_secs, max_states, max_bytes: optional budgets for the analysis
+    of the function (see impl_check_refcounts); if one is exceeded, the HTML
+    reports aren't written out
+
+    tu_stats: a TranslationUnitStats: if set, a FunctionStats recording the
+    time taken by each phase of checking the function is added to it
+
+    reports: str: which reports to produce if there are any problems (one of
+    libcpychecker.reports.REPORT_POLICIES): 'html' writes out the HTML
+    reports for the function, 'json' adds the JSON form of its reports to
+    tu_reports (instead of writing it out for dump_json), 'all' does both,
+    and 'none' neither
+
+    tu_reports: a TranslationUnitReports, for use by the 'json' and 'all'
+    policies (when result_sink is set, the JSON is instead passed back
+    within the CachedResult)
     """
 
-    log('check_refcounts(%r, %r, %r)', fun, dump_traces, show_traces)
+    if utils.logging_enabled:
+        log('check_refcounts(%r, %r, %r)', fun, dump_traces, show_traces)
 
     # show_timings = 1
 
+    if show_timings or tu_stats:
+        stats = FunctionStats(fun)
+        if tu_stats:
+            tu_stats.add(stats)
+    else:
+        stats = None
+
     if show_timings:
-        import time
-        start_cpusecs = time.clock()
         gcc.inform(fun.start, 'Analyzing reference-counting within %s' % fun.decl.name)
 
+    cache = None
+    # (with a CPU time budget, the result depends on how quickly the analysis
+    # runs, so it can't be reused)
+    if cache_dir and not (dump_traces or show_traces
+                          or max_cpu_secs is not None):
+        if stats:
+            stats.start_phase('cache')
+        cache = RefcountCache(cache_dir)
+        options = dict(show_possible_null_derefs=show_possible_null_derefs,
+                       maxtrans=maxtrans,
+                       dump_json=dump_json,
+                       merge_states=merge_states,
+                       max_states=max_states,
+                       max_bytes=max_bytes,
+                       reports=reports)
+        if function_summaries:
+            # The result also depends on the bodies of the callees:
+            summaries.maxtrans = maxtrans
+            options['callee_summaries'] = summaries.get_callee_summaries(fun)
+        cache_key = cache.get_key(fun, options)
+        cached = cache.lookup(fun, cache_key)
+        if cached:
+            if utils.logging_enabled:
+                log('replaying cached result %s for %s', cache_key, fun.decl.name)
+            if result_sink:
+                cached.write_files(fun.decl.name)
+                result_sink(cached)
+            else:
+                cached.replay(fun)
+                if tu_reports and cached.record:
+                    tu_reports.add(cached.record)
+            if stats:
+                stats.count('cache_hits')
+                stats.end_phase()
+            return None
+
     if show_traces:
         from libcpychecker.visualizations import StateGraphPrettyPrinter
         sg = StateGraph(fun, log, MyState)
@@ -4390,49 +4600,88 @@ def check_refcounts(fun, dump_traces=False, show_traces=False,
     rep = impl_check_refcounts(fun,
                                dump_traces,
                                show_possible_null_derefs,
-                               maxtrans)
+                               maxtrans,
+                               merge_states,
+                               function_summaries,
+                               max_cpu_secs,
+                               max_states,
+                               max_bytes,
+                               stats)
 
     # Organize the Report instances into equivalence classes, simplifying
     # the list of reports:
+    if stats:
+        stats.start_phase('dedup')
     rep.remove_duplicates()
+    if stats:
+        stats.count('unique_reports', len(rep.reports))
+        stats.start_phase('output')
 
     # Flush the reporter's messages, which will actually emit gcc errors and
     # warnings (if any), for those Report instances that survived
     # de-duplication
-    rep.flush()
+    if not result_sink:
+        rep.flush()
 
+    # The diagnostics emitted, and the contents of the files written out
+    # (keyed by the suffix of their filename), for use by the cache:
+    diagnostics = [(d.kind, location_as_tuple(d.loc), d.msg)
+                   for d in rep.get_saved_diagnostics()]
+    files = {}
+
+    def write_report_file(suffix, content):
+        filename = get_report_filename(fun.decl.name, suffix)
+        with open(filename, 'w') as f:
+            f.write(content)
+        files[suffix] = content
+        return filename
+
+    # The JSON form of the reports, for the per-translation-unit bundle:
+    record = None
     if rep.got_warnings():
-        if dump_json:
+        if policy_writes_json(reports):
+            # (this goes into the bundle rather than its own file, even with
+            # dump_json)
+            record = rep.to_json(fun)
+        elif dump_json:
             # JSON output:
-            filename = ('%s.%s.json'
-                    % (gcc.get_dump_base_name(), fun.decl.name))
-            rep.dump_json(fun, filename)
+            from json import dumps
+            write_report_file('.json',
+                              dumps(rep.to_json(fun), sort_keys=True, indent=4))
+
+    # If the analysis was degraded for exceeding its budgets, don't spend
+    # any more time on rendering its traces:
+    if (rep.got_warnings() and not rep.degraded
+        and policy_writes_html(reports)):
+        write_report_file(HTML_REPORT_SUFFIX, rep.to_html(fun))
+        # (this isn't saved in the diagnostics, since the filename depends
+        # on the build; CachedResult.emit_diagnostics generates it afresh)
+        if not result_sink:
+            gcc.inform(fun.start, get_html_report_message(fun.decl.name))
 
-        filename = ('%s.%s-refcount-errors.html'
-                    % (gcc.get_dump_base_name(), fun.decl.name))
-        rep.dump_html(fun, filename)
-        gcc.inform(fun.start,
-                   ('graphical error report for function %r written out to %r'
-                    % (fun.decl.name, filename)))
+        from libcpychecker_html.make_html import HtmlPage
+        data = record or rep.to_json(fun)
+        with open(fun.start.file) as srcfile:
+            write_report_file('-refcount-errors.v2.html',
+                              str(HtmlPage(srcfile, data)))
 
-        filename_v2 = ('%s.%s-refcount-errors.v2.html'
-                       % (gcc.get_dump_base_name(), fun.decl.name))
+    result = CachedResult(diagnostics, files, record)
+    if cache:
+        cache.store(fun, cache_key, result)
+    if result_sink:
+        result_sink(result)
+    elif tu_reports and record:
+        tu_reports.add(record)
 
-        from libcpychecker_html.make_html import HtmlPage
-        data = rep.to_json(fun)
-        srcfile = open(fun.start.file)
-        htmlfile = open(filename_v2, 'w')
-        htmlfile.write(str(HtmlPage(srcfile, data)))
-        htmlfile.close()
-        srcfile.close()
 
+    if stats:
+        stats.end_phase()
 
     if show_timings:
-        end_cpusecs = time.clock()
         gcc.inform(fun.start, 'Finished analyzing reference-counting within %s' % fun.decl.name)
         gcc.inform(fun.start,
                    ('%i transitions, %fs CPU'
-                    % (limits.trans_seen, end_cpusecs - start_cpusecs)))
+                    % (stats.counters['transitions'], stats.get_total_time())))
 
     if 0:
         dot = cfg_to_dot(fun.cfg, fun.decl.name)
@@ -0,0 +1,94 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Policies for which reports the refcount checker writes out, and the compact
+per-translation-unit bundle of the problems that it found.
+
+Rendering the HTML reports for a function is much more expensive than
+finding the problems in it, and most of the reports are never looked at.
+With the "json" policy, no HTML is rendered whilst compiling; instead, the
+JSON form of each function's reports (as from Reporter.to_json) is gathered
+into a single bundle for the translation unit, rather than a file for each
+function, from which the HTML can be rendered later, if needed, with:
+
+    python -m libcpychecker_html.render foo.c.cpychecker-reports.jsonl.gz
+
+The bundle is written out at the end of the translation unit, as gzipped
+JSON Lines: a header line giving the format version, the dump base name and
+the directory that the compiler was run in, followed by one line for each
+function with problems.
+"""
+
+import gzip
+import json
+import os
+
+import gcc
+
+# The possible values of the "reports" option:
+#   'none': don't write out any reports
+#   'json': add the problems to the per-translation-unit bundle
+#   'html': write out the HTML reports for each function (the default)
+#   'all':  both of the above
+REPORT_POLICIES = ('none', 'json', 'html', 'all')
+
+# Bump this when changing the format of the bundle:
+REPORTS_FORMAT_VERSION = 2
+
+def policy_writes_json(policy):
+    assert policy in REPORT_POLICIES
+    return policy in ('json', 'all')
+
+def policy_writes_html(policy):
+    assert policy in REPORT_POLICIES
+    return policy in ('html', 'all')
+
+def get_bundle_filename():
+    return '%s.cpychecker-reports.jsonl.gz' % gcc.get_dump_base_name()
+
+class TranslationUnitReports:
+    """
+    The JSON forms of the reports for every function within a translation
+    unit that had problems
+    """
+    def __init__(self):
+        self.functions = [] # list of dicts, as from Reporter.to_json
+
+    def add(self, record):
+        self.functions.append(record)
+
+    def get_header(self):
+        # Source filenames within the records are relative to the directory
+        # that the compiler was run in:
+        return dict(version=REPORTS_FORMAT_VERSION,
+                    dump_base_name=gcc.get_dump_base_name(),
+                    directory=os.getcwd())
+
+    def iter_json_lines(self):
+        for js in [self.get_header()] + self.functions:
+            yield json.dumps(js, separators=(',', ':'))
+
+    def write_bundle(self):
+        """
+        Write out the bundle, returning its filename
+        """
+        filename = get_bundle_filename()
+        # (gzip.open has no text mode on Python 2, so encode by hand):
+        with gzip.open(filename, 'wb') as f:
+            for line in self.iter_json_lines():
+                f.write(line.encode('utf-8') + b'\n')
+        return filename
@@ -0,0 +1,307 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Summaries of the refcounting behavior of static helper functions, so that
+calls to them can be modelled using what their bodies actually do, rather
+than assuming that every unknown function returning PyObject* returns a new
+reference or NULL with an exception set.
+
+A summary is computed by running the refcount checker's engine over the
+callee, and is cached until the end of the translation unit.  The summaries
+of a function's callees are all computed before the function itself is
+analyzed (see get_callee_summary_table), so that they aren't charged to its
+budgets; any helpers that a callee calls in turn are summarized first, so
+that the summaries are built bottom-up through the callgraph.  For recursive
+calls the summary isn't available, and we fall back to the usual
+assumptions.
+"""
+
+import gcc
+
+from gccutils import check_isinstance
+from libcpychecker.absinterp import ConcreteValue, \
+    PointerToRegion, Transition, FnMeta, Limits, TooComplicated, iter_traces, \
+    set_callee_summaries
+from libcpychecker.attributes import fnnames_returning_borrowed_refs, \
+    stolen_refs_by_fnname, fnnames_setting_exception, \
+    fnnames_setting_exception_on_negative_result
+from libcpychecker import utils
+from libcpychecker.utils import log
+
+# The limit on the number of transitions when analyzing a callee:
+maxtrans = 256
+
+class FunctionSummary:
+    """
+    The refcounting behavior of a function returning PyObject*, as seen by
+    its callers
+    """
+    __slots__ = ('fndecl', 'returns', 'can_return_null',
+                 'null_sets_exception', 'stolen_args')
+
+    def __init__(self, fndecl, returns, can_return_null,
+                 null_sets_exception, stolen_args):
+        check_isinstance(fndecl, gcc.FunctionDecl)
+        self.fndecl = fndecl
+        # 'new' or 'borrowed', describing the non-NULL return value:
+        self.returns = returns
+        self.can_return_null = can_return_null
+        self.null_sets_exception = null_sets_exception
+        # tuple of the (0-based) indices of arguments that the function
+        # steals a reference to:
+        self.stolen_args = stolen_args
+
+    def __repr__(self):
+        return ('FunctionSummary(returns=%r, can_return_null=%r,'
+                ' null_sets_exception=%r, stolen_args=%r)'
+                % (self.returns, self.can_return_null,
+                   self.null_sets_exception, self.stolen_args))
+
+    def get_transitions(self, state, stmt, fnmeta):
+        """
+        Generate the list of Transition instances for a call to the
+        function, from the given State
+        """
+        check_isinstance(stmt, gcc.GimpleCall)
+        check_isinstance(fnmeta, FnMeta)
+        if self.returns == 'new':
+            s_success, _ = \
+                state.cpython.mkstate_new_ref(stmt,
+                                              'new ref from call to %s'
+                                              % fnmeta.name)
+        else:
+            s_success = state.cpython.mkstate_borrowed_ref(stmt, fnmeta)
+        if self.can_return_null:
+            if self.null_sets_exception:
+                s_failure = state.cpython.mkstate_exception(stmt)
+            elif stmt.lhs:
+                s_failure = state.mkstate_return_of(
+                    stmt,
+                    ConcreteValue(stmt.lhs.type, stmt.loc, 0))
+            else:
+                s_failure = state.mkstate_nop(stmt)
+            transitions = state.make_transitions_for_fncall(stmt, fnmeta,
+                                                            s_success,
+                                                            s_failure)
+        else:
+            transitions = [Transition(state, s_success,
+                                      fnmeta.desc_when_call_succeeds())]
+
+        args = state.eval_stmt_args(stmt)
+        for t_iter in transitions:
+            for argindex in self.stolen_args:
+                v_arg = args[argindex]
+                if isinstance(v_arg, PointerToRegion):
+                    t_iter.dest.cpython.steal_reference(v_arg, stmt.loc)
+        return transitions
+
+def _is_null(value):
+    return isinstance(value, ConcreteValue) and value.value == 0
+
+def _get_relvalue(state, value):
+    # Get the "relvalue" of the ob_refcnt of the object that the given
+    # AbstractValue points to, or None:
+    from libcpychecker.refcounts import RefcountValue
+    if not isinstance(value, PointerToRegion):
+        return None
+    ob_refcnt = state.get_value_of_field_by_region(value.region, 'ob_refcnt')
+    if isinstance(ob_refcnt, RefcountValue):
+        return ob_refcnt.relvalue
+
+def _is_same_object(v_arg, v_return):
+    return (isinstance(v_arg, PointerToRegion)
+            and isinstance(v_return, PointerToRegion)
+            and v_arg.region is v_return.region)
+
+def _all_the_same(values):
+    # Get the value, if all of them are the same, or None:
+    values = set(values)
+    if len(values) == 1:
+        return values.pop()
+
+def compute_summary(fndecl):
+    """
+    Analyze the body of the given gcc.FunctionDecl, returning a
+    FunctionSummary, or None if its behavior can't be summarized
+    """
+    from libcpychecker import refcounts
+    from libcpychecker.diagnostics import Reporter
+    check_isinstance(fndecl, gcc.FunctionDecl)
+    fun = fndecl.function
+    if not fun or not fun.cfg:
+        # Not yet lowered (or not defined in this translation unit):
+        return None
+
+    # Calls from the callee to other helpers use their summaries in turn:
+    table = get_callee_summary_table(fun)
+
+    # Any problems within the callee are reported when the callee itself is
+    # checked, so discard the warnings issued whilst interpreting it here:
+    old_summaries = set_callee_summaries(table)
+    old_reporter = refcounts.interpretation_reporter
+    refcounts.interpretation_reporter = Reporter()
+    try:
+        traces = iter_traces(refcounts.make_stmt_graph(fun),
+                             {'cpython': refcounts.CPython},
+                             limits=Limits(maxtrans=maxtrans))
+    except TooComplicated:
+        return None
+    finally:
+        set_callee_summaries(old_summaries)
+        refcounts.interpretation_reporter = old_reporter
+
+    pyobj_args = [idx for idx, parm in enumerate(fndecl.arguments)
+                  if refcounts.type_is_pyobjptr_subclass(parm.type)]
+
+    returns = []
+    null_exceptions = []
+    arg_deltas = dict((idx, []) for idx in pyobj_args)
+    for trace in traces:
+        if trace.err:
+            continue
+        endstate = trace.get_last_state()
+        if not endstate.has_returned:
+            continue
+        v_return = endstate.return_rvalue
+        if _is_null(v_return):
+            null_exceptions.append(
+                not _is_null(endstate.cpython.exception_rvalue))
+            returned_relvalue = 0
+        else:
+            returned_relvalue = _get_relvalue(endstate, v_return)
+            if returned_relvalue == 1:
+                returns.append('new')
+            elif returned_relvalue == 0:
+                returns.append('borrowed')
+            else:
+                return None
+        initstate = trace.transitions[0].src
+        for idx in pyobj_args:
+            v_arg = initstate.eval_rvalue(fndecl.arguments[idx], None)
+            delta = _get_relvalue(endstate, v_arg)
+            if delta is not None and _is_same_object(v_arg, v_return):
+                # The argument is being returned (e.g. "Py_INCREF(arg);
+                # return arg;"), and the returned reference has already
+                # been accounted for above:
+                delta -= returned_relvalue
+            arg_deltas[idx].append(delta)
+
+    if not returns:
+        return None
+    returned = _all_the_same(returns)
+    if returned is None:
+        return None
+    if null_exceptions:
+        null_sets_exception = _all_the_same(null_exceptions)
+        if null_sets_exception is None:
+            return None
+    else:
+        null_sets_exception = False
+
+    stolen_args = []
+    for idx in pyobj_args:
+        delta = _all_the_same(arg_deltas[idx])
+        if delta == -1:
+            stolen_args.append(idx)
+        elif delta != 0:
+            return None
+
+    return FunctionSummary(fndecl, returned, bool(null_exceptions),
+                           null_sets_exception, tuple(stolen_args))
+
+def function_can_be_summarized(fndecl):
+    """
+    Should calls to the given gcc.FunctionDecl use its summary?
+
+    Only static functions: the definition of anything else could be
+    replaced at link time, and any function covered by the attribute
+    tables is handled by those instead
+    """
+    check_isinstance(fndecl, gcc.FunctionDecl)
+    if fndecl.is_public:
+        return False
+    name = fndecl.name
+    return not (name in fnnames_returning_borrowed_refs
+                or name in stolen_refs_by_fnname
+                or name in fnnames_setting_exception
+                or name in fnnames_setting_exception_on_negative_result)
+
+# Mapping from gcc.FunctionDecl to FunctionSummary (or None):
+_summaries = {}
+
+# The gcc.FunctionDecl instances whose summaries we're computing:
+_in_progress = set()
+
+def get_function_summary(fndecl):
+    """
+    Get the FunctionSummary for the given gcc.FunctionDecl, or None
+    """
+    check_isinstance(fndecl, gcc.FunctionDecl)
+    if fndecl in _summaries:
+        return _summaries[fndecl]
+    if fndecl in _in_progress:
+        # A recursive call:
+        return None
+    if not function_can_be_summarized(fndecl):
+        return None
+    fun = fndecl.function
+    if not fun or not fun.cfg:
+        # Don't cache this; the function may be lowered later:
+        return None
+    _in_progress.add(fndecl)
+    try:
+        if utils.logging_enabled:
+            log('computing summary of %s', fndecl.name)
+        summary = compute_summary(fndecl)
+    finally:
+        _in_progress.remove(fndecl)
+    if utils.logging_enabled:
+        log('summary of %s: %r', fndecl.name, summary)
+    _summaries[fndecl] = summary
+    return summary
+
+def get_callee_summary_table(fun):
+    """
+    Get a dict mapping from gcc.FunctionDecl to FunctionSummary for the
+    callees of the given gcc.Function that have summaries, computing them
+    as necessary, for use with absinterp.set_callee_summaries
+    """
+    check_isinstance(fun, gcc.Function)
+    result = {}
+    for bb in fun.cfg.basic_blocks:
+        if not bb.gimple:
+            continue
+        for stmt in bb.gimple:
+            if isinstance(stmt, gcc.GimpleCall) and stmt.fndecl:
+                summary = get_function_summary(stmt.fndecl)
+                if summary:
+                    result[stmt.fndecl] = summary
+    return result
+
+def get_callee_summaries(fun):
+    """
+    Get a sorted list of (name, repr of summary) pairs for the callees of the
+    given gcc.Function that have summaries, for use in cache keys
+    """
+    return sorted(set((fndecl.name, repr(summary))
+                      for fndecl, summary
+                      in get_callee_summary_table(fun).items()))
+
+def _on_finish_unit():
+    _summaries.clear()
+
+gcc.register_callback(gcc.PLUGIN_FINISH_UNIT, _on_finish_unit)
@@ -19,8 +19,9 @@
 Helper functions for looking up various CPython implementation types.
 """
 import gcc
-from gccutils import get_global_typedef, check_isinstance
+from gccutils import get_global_typedef, check_isinstance, memoize_per_unit
 
+@memoize_per_unit
 def is_py3k():
     """
     Is the Python.h we're compiling against python 3?
@@ -30,6 +31,7 @@ def is_py3k():
     else:
         return True
 
+@memoize_per_unit
 def is_debug_build():
     """
     Is the Python.h we're compiling against configured --with-pydebug ?
@@ -37,12 +39,15 @@ def is_debug_build():
     obj = get_global_typedef('PyObject')
     return obj.type.fields[0].name == '_ob_next'
 
+@memoize_per_unit
 def get_Py_ssize_t():
     return get_global_typedef('Py_ssize_t')
 
+@memoize_per_unit
 def get_Py_buffer():
     return get_global_typedef('Py_buffer')
 
+@memoize_per_unit
 def Py_UNICODE():
     return get_global_typedef('Py_UNICODE')
 
@@ -53,25 +58,32 @@ def get_PY_LONG_LONG():
     # Assume so for now:
     return gcc.Type.long_long()
 
+@memoize_per_unit
 def get_PyObject():
     return get_global_typedef('PyObject')
 
+@memoize_per_unit
 def get_PyObjectPtr():
     return get_global_typedef('PyObject').pointer
 
+@memoize_per_unit
 def get_PyTypeObject():
     return get_global_typedef('PyTypeObject')
 
+@memoize_per_unit
 def get_PyStringObject():
     return get_global_typedef('PyStringObject')
 
+@memoize_per_unit
 def get_PyUnicodeObject():
     return get_global_typedef('PyUnicodeObject')
 
+@memoize_per_unit
 def get_Py_complex():
     return get_global_typedef('Py_complex')
 
 # Python 3:
+@memoize_per_unit
 def get_PyBytesObject():
     return get_global_typedef('PyBytesObject')
 
@@ -22,6 +22,10 @@ import gcc
 
 logfile = None
 
+# Set this to True to enable logging.  The analysis code guards its calls
+# to log() with "if utils.logging_enabled:", so that their arguments aren't
+# evaluated when logging is disabled.  Look the flag up through this module
+# rather than importing it by name, so that setting it at runtime works:
 logging_enabled = False
 
 def log(msg, *args):
@@ -22,22 +22,29 @@ HERE = dirname(abspath(__file__))
 # Map functions to their modules.
 FUNCTIONS = {}
 
+# Map functions to the urls of their documentation, built once by init(), so
+# that looking up every name within the source code is cheap.
+URLS = {}
+
+_initialized = False
+
 def init():
     """Initialize this module"""
+    global _initialized
     for line in open(join(HERE, 'c-api.txt')):
         line = line.strip()
         if line.startswith('#'):
             continue
         module, function = line.split()
         FUNCTIONS[function] = module
+        URLS[function] = ("http://docs.python.org/c-api/%s.html#%s"
+                          % (module, function))
     del module, function
+    _initialized = True
 
 def get_url(function):
     """Get a url for a function"""
-    module = FUNCTIONS.get(function)
-    if module:
-        return "http://docs.python.org/c-api/%s.html#%s" % (module, function)
-    else:
-        return None
-
-init() # This is done once, upon import
+    # The table is read on first use, rather than upon import:
+    if not _initialized:
+        init()
+    return URLS.get(function)
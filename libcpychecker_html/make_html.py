@@ -33,13 +33,13 @@ from lxml.html import (
     tostring, fragment_fromstring as parse, builder as E
 )
 
-from pygments import highlight
+from pygments import format as format_tokens
 from pygments.lexers.compiled import CLexer
 from pygments.formatters.html import HtmlFormatter
+from pygments.token import Text
 
 import base64
 from copy import deepcopy
-from itertools import islice
 
 
 def open(filename, mode='r'):  # pylint:disable=redefined-builtin
@@ -83,26 +83,48 @@ class HtmlPage(object):
         )
         return head
 
-    def raw_code(self):
-        """Get the correct lines from the code file"""
-        first, last = self.data['function']['lines']
-        # Line numbers are ONE-based
-        return ''.join(islice(self.codefile, first - 1, last))
+    def lexed_lines(self):
+        """Get the tokens on each line of the code file"""
+        key = code_file_key(self.codefile)
+        lines = LEXED_LINES.get(key)
+        if lines is None:
+            lines = lex_lines(self.codefile.read())
+            if key is not None:
+                LEXED_LINES[key] = lines
+        return lines
 
     def code(self):
         """generate the contents of the #code section"""
+        first, last = self.data['function']['lines']
+        key = code_file_key(self.codefile)
+        if key is not None:
+            key += (first, last)
+        code = HIGHLIGHTED_CODE.get(key)
+        if code is None:
+            code = self.highlighted_code()
+            if key is not None:
+                HIGHLIGHTED_CODE[key] = code
+        # Callers are free to modify the result:
+        return deepcopy(code)
+
+    def highlighted_code(self):
+        """Format the function's code with Pygments, linking to the C-API
+        docs"""
+        first, last = self.data['function']['lines']
+
         # Get ready to use Pygments:
         formatter = CodeHtmlFormatter(
             style='default',
             cssclass='source',
-            linenostart=self.data['function']['lines'][0],
+            linenostart=first,
         )
 
-        # <link rel="stylesheet", href="pygments_c.css", type="text/css">
-        open('pygments_c.css', 'w').write(formatter.get_style_defs())
-
-        # Use pygments to convert it all to HTML:
-        code = parse(highlight(self.raw_code(), CLexer(), formatter))
+        # Use pygments to convert the correct lines to HTML (line numbers
+        # are ONE-based):
+        tokens = [token
+                  for line in self.lexed_lines()[first - 1:last]
+                  for token in line]
+        code = parse(format_tokens(tokens, formatter))
 
         # linkify the python C-API functions
         for name in code.xpath('//span[@class="n"]'):
@@ -269,18 +291,68 @@ class HtmlPage(object):
         )
 
 
+# The tokens on each line of each code file, keyed by (filename, mtime), so
+# that rendering the pages for several functions within the same file only
+# lexes it once per process.
+LEXED_LINES = {}
+
+# The highlighted code of each function, keyed by (filename, mtime, first
+# line, last line).
+HIGHLIGHTED_CODE = {}
+
+# Our static assets, in the forms in which they are inlined into each page.
+ASSETS = {}
+
+# Pygments' lexer for C, which can be shared between pages (keeping any
+# leading and trailing blank lines, so that we can split its output by line).
+LEXER = CLexer(stripnl=False)
+
+
+def code_file_key(codefile):
+    """Get the key for caching things derived from a code file, or None if
+    we can't tell when the file changes."""
+    from os import stat
+    try:
+        filename = realpath(codefile.name)
+        mtime = stat(filename).st_mtime
+    except (AttributeError, TypeError, OSError):
+        return None
+    return (filename, mtime)
+
+
+def lex_lines(code):
+    """Lex C code, returning a list of the tokens on each line (including
+    its newline)"""
+    lines = [[]]
+    for ttype, value in LEXER.get_tokens(code):
+        parts = value.split('\n')
+        for part in parts[:-1]:
+            if part:
+                lines[-1].append((ttype, part))
+            lines[-1].append((Text, '\n'))
+            lines.append([])
+        if parts[-1]:
+            lines[-1].append((ttype, parts[-1]))
+    return lines
+
+
 def data_uri(mimetype, filename):
     """represent a file as a data uri"""
-    data = open(join(HERE, filename), 'rb').read()
-    data = base64.encodestring(data)
-    data = data.replace(b'\n', b'')
-    return 'data:%s;base64,%s' % (mimetype, data.decode('ascii'))
+    key = ('data_uri', mimetype, filename)
+    if key not in ASSETS:
+        data = open(join(HERE, filename), 'rb').read()
+        data = base64.b64encode(data)
+        ASSETS[key] = 'data:%s;base64,%s' % (mimetype, data.decode('ascii'))
+    return ASSETS[key]
 
 
 def file_contents(filename):
     """Add a leading newline to make the first line show up in the right spot.
     """
-    return '\n' + open(join(HERE, filename)).read()
+    key = ('file_contents', filename)
+    if key not in ASSETS:
+        ASSETS[key] = '\n' + open(join(HERE, filename)).read()
+    return ASSETS[key]
 
 
 class CodeHtmlFormatter(HtmlFormatter):
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Render HTML reports from the per-translation-unit bundle of problems
+written out by "gcc-with-cpychecker --reports=json", outside of the build:
+
+    python -m libcpychecker_html.render foo.c.cpychecker-reports.jsonl.gz \\
+        [--function=NAME ...] [--outdir=OUTDIR]
+
+One page is written for each function with problems (or for just the named
+functions), named as the compiler would have named it.
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+import gzip
+import json
+from os.path import basename, join
+
+from .make_html import HtmlPage, open
+
+
+def read_bundle(filename):
+    """Read a bundle, as written by libcpychecker.reports, returning its
+    header and a dict mapping from function names to their data"""
+    with gzip.open(filename, 'rb') as bundle:
+        lines = [line.decode('utf-8') for line in bundle if line.strip()]
+    header = json.loads(lines[0])
+    functions = {}
+    for line in lines[1:]:
+        data = json.loads(line)
+        functions[data['function']['name']] = data
+    return header, functions
+
+
+def render(header, functions, funcnames=None, outdir=None):
+    """Write out the pages for the given functions within a bundle (or all
+    of them), returning their filenames"""
+    if outdir is None:
+        prefix = join(header['directory'], header['dump_base_name'])
+    else:
+        prefix = join(outdir, basename(header['dump_base_name']))
+    if funcnames is None:
+        funcnames = sorted(functions)
+    filenames = []
+    for funcname in funcnames:
+        data = functions[funcname]
+        # Source filenames are relative to where the compiler was run:
+        with open(join(header['directory'], data['filename'])) as codefile:
+            html = str(HtmlPage(codefile, data))
+        filename = '%s.%s-refcount-errors.v2.html' % (prefix, funcname)
+        with open(filename, 'w') as outfile:
+            outfile.write(html)
+        filenames.append(filename)
+    return filenames
+
+
+def main(argv):
+    """our entry point"""
+    from argparse import ArgumentParser
+    parser = ArgumentParser(prog='python -m libcpychecker_html.render')
+    parser.add_argument('bundle',
+                        help='a .cpychecker-reports.jsonl.gz file')
+    parser.add_argument('--function', action='append', dest='funcnames',
+                        help='only render the report for this function')
+    parser.add_argument('--outdir',
+                        help='write the reports to this directory, rather'
+                        ' than alongside the source file')
+    args = parser.parse_args(argv[1:])
+
+    header, functions = read_bundle(args.bundle)
+    for funcname in args.funcnames or []:
+        if funcname not in functions:
+            return 'No reports for function %r in %s' % (funcname, args.bundle)
+    for filename in render(header, functions, args.funcnames, args.outdir):
+        print(filename)
+
+if __name__ == '__main__':
+    from sys import argv as ARGV
+    exit(main(ARGV))
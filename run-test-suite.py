@@ -31,6 +31,18 @@
 # This runner either invokes all tests, or just a subset, if supplied the
 # names of the subdirectories as arguments.  All test cases within the given
 # directories will be run.
+#
+# The tests are run in parallel, starting with those that took longest in the
+# previous run (as recorded in the --timings file), and the outcome of each is
+# printed as soon as it is known, along with its wall time.  --shard=I/N runs
+# just one part of the suite, so that it can be spread across N machines, and
+# --junit-xml and --json write out the results for use by CI systems.
+#
+# By default, tests are only rerun if something that they depend on has
+# changed since they last passed: their input files, script and expected
+# output, any files that their sources #include "like this", the plugin
+# itself, and whichever of the plugin's Python modules they imported (as
+# recorded during their last run in the --deps file).  --all runs every test.
 
 # The optional metadata.ini can contain these sections:
 #
@@ -44,10 +56,16 @@
 
 import configparser
 import glob
+import hashlib
+import io
+import json
 import os
 import multiprocessing
 import re
+import shutil
 import sys
+import tempfile
+import time
 from distutils.sysconfig import get_python_inc
 from subprocess import Popen, PIPE
 
@@ -274,9 +292,60 @@ class SkipTest(Exception):
     def __init__(self, reason):
         self.reason = reason
 
-def run_test(testdir, srcdir):
+# The source of a sitecustomize module that gets imported when the plugin
+# initializes its embedded interpreter, and that records the files of all of
+# the Python modules that were imported during the compilation.  Being first
+# on PYTHONPATH, it hides any sitecustomize that was already installed (e.g.
+# by the system), so it imports that one in turn:
+SITECUSTOMIZE_PY = '''
+import atexit
+import os
+import sys
+
+def _import_original():
+    ourdir = os.path.realpath(os.path.dirname(os.path.abspath(__file__)))
+    saved_path = list(sys.path)
+    ourmodule = sys.modules.pop('sitecustomize', None)
+    sys.path[:] = [entry for entry in sys.path
+                   if os.path.realpath(entry or os.curdir) != ourdir]
+    try:
+        import sitecustomize
+        return sitecustomize
+    except ImportError:
+        return None
+    finally:
+        sys.path[:] = saved_path
+        if ourmodule is not None:
+            sys.modules['sitecustomize'] = ourmodule
+
+_original_sitecustomize = _import_original()
+
+def _record_deps():
+    with open(os.environ['GCC_PYTHON_PLUGIN_TEST_DEPS'], 'w') as f:
+        for module in list(sys.modules.values()):
+            filename = getattr(module, '__file__', None)
+            if filename:
+                f.write(os.path.abspath(filename) + '\\n')
+
+if 'GCC_PYTHON_PLUGIN_TEST_DEPS' in os.environ:
+    atexit.register(_record_deps)
+'''
+
+# Directory holding the above, set up by the main process before the workers
+# are forked off, or None if we're not recording dependencies:
+sitecustomize_dir = None
+
+def write_sitecustomize():
+    global sitecustomize_dir
+    sitecustomize_dir = tempfile.mkdtemp(prefix='gcc-python-plugin-deps-')
+    with open(os.path.join(sitecustomize_dir, 'sitecustomize.py'), 'w') as f:
+        f.write(SITECUSTOMIZE_PY)
+
+def run_test(testdir, srcdir, deps=None):
     # Compile each 'input.c', using 'script.py'
     # Assume success and empty stdout; compare against expected stderr, or empty if file not present
+    # If "deps" is a list, the paths of the Python modules used by the
+    # compilation (within srcdir) are appended to it.
     inputfiles = get_source_files(testdir)
     outfile = os.path.join(testdir, 'output.o')
     script_py = os.path.join(testdir, 'script.py')
@@ -301,6 +370,18 @@ def run_test(testdir, srcdir):
     env = dict(os.environ)
     env['LC_ALL'] = 'C'
 
+    if deps is not None and sitecustomize_dir:
+        fd, deps_txt = tempfile.mkstemp(prefix='deps-', suffix='.txt',
+                                        dir=sitecustomize_dir)
+        os.close(fd)
+        env['GCC_PYTHON_PLUGIN_TEST_DEPS'] = deps_txt
+        env['PYTHONPATH'] = os.pathsep.join([sitecustomize_dir]
+                                            + ([env['PYTHONPATH']]
+                                               if env.get('PYTHONPATH')
+                                               else []))
+    else:
+        deps_txt = None
+
     # Generate the command-line for invoking gcc:
     args = [CC]
     if len(inputfiles) == 1:
@@ -381,6 +462,15 @@ def run_test(testdir, srcdir):
     #print 'err: %r' % err.actual
     exitcode_actual = p.wait()
 
+    if deps_txt:
+        # (the file stays empty if the plugin's interpreter didn't shut down
+        # cleanly, in which case the test won't be treated as up-to-date)
+        with open(deps_txt) as f:
+            for line in f.read().splitlines():
+                if line.startswith(srcdir):
+                    deps.append(line)
+        os.unlink(deps_txt)
+
     if options.show:
         # then the user wants to see the gcc invocation directly
         sys.stdout.write(out.actual)
@@ -432,6 +522,42 @@ parser.add_option("--srcdir",
 parser.add_option("-s", "--show",
                   action="store_true", dest="show", default=False,
                   help="Show stdout, stderr and the command line for each test")
+parser.add_option("--shard",
+                  type="string",
+                  dest="shard",
+                  help=("only run the I-th of N roughly equal parts of the"
+                        " tests (counting from 1), so that the suite can be"
+                        " spread across several machines"),
+                  metavar="I/N")
+parser.add_option("--timings",
+                  type="string",
+                  dest="timings",
+                  default="test-timings.json",
+                  help=("file recording how long each test took, so that"
+                        " the next run can start the slowest tests first"
+                        " (default: %default)"),
+                  metavar="FILE")
+parser.add_option("--junit-xml",
+                  type="string",
+                  dest="junit_xml",
+                  help="write the results in JUnit XML form to FILE",
+                  metavar="FILE")
+parser.add_option("--json",
+                  type="string",
+                  dest="json",
+                  help="write the results in JSON form to FILE",
+                  metavar="FILE")
+parser.add_option("--deps",
+                  type="string",
+                  dest="deps",
+                  default="test-deps.json",
+                  help=("file recording what each test depended on when it"
+                        " last passed, so that it need not be rerun until one"
+                        " of those files changes (default: %default)"),
+                  metavar="FILE")
+parser.add_option("-a", "--all",
+                  action="store_true", dest="all", default=False,
+                  help="Run all of the tests, even those that are unchanged since they last passed")
 (options, args) = parser.parse_args()
 
 if options.srcdir is None:
@@ -793,49 +919,239 @@ if GCC_VERSION >= 7000:
     exclude_tests_below('tests/cpychecker/absinterp')
     exclude_tests_below('tests/cpychecker/refcounts')
 
-def run_one_test(testdir):
+def parse_shard(shard):
+    m = re.match(r'^([0-9]+)/([0-9]+)$', shard)
+    if not m or not 1 <= int(m.group(1)) <= int(m.group(2)):
+        parser.error('--shard must be of the form I/N, with 1 <= I <= N')
+    return int(m.group(1)), int(m.group(2))
+
+if options.shard:
+    # Split up the tests by name rather than by timings, so that every
+    # machine agrees on which tests are in which shard:
+    shard_index, num_shards = parse_shard(options.shard)
+    testdirs = sorted(testdirs)[shard_index - 1::num_shards]
+
+def read_timings(path):
+    """
+    Get a dict mapping from test directory to the wall time in seconds of
+    its last run
+    """
     try:
-        sys.stdout.write('%s: ' % testdir)
-        run_test(testdir, options.srcdir)
-        print('OK')
-        return (testdir, 'OK', None)
-    except SkipTest:
-        err = sys.exc_info()[1]
-        print('skipped: %s' % err.reason)
-        return (testdir, 'SKIP', err.reason)
-    except DejaGnuError:
-        print('FAIL')
-        return (testdir, 'FAIL', None)
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+def write_timings(path, timings):
+    with open(path, 'w') as f:
+        json.dump(timings, f, sort_keys=True, indent=4)
+
+def get_relative_testdir(testdir):
+    # Record tests relative to the srcdir, so that the timings and results
+    # don't depend on where the tree is:
+    if testdir.startswith(options.srcdir):
+        return testdir[len(options.srcdir):]
+    return testdir
+
+def read_deps(path):
+    """
+    Get a dict mapping from test directory to a dict describing what it
+    depended on when it last passed (see get_deps_record)
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+def write_deps(path, deps):
+    with open(path, 'w') as f:
+        json.dump(deps, f, sort_keys=True, indent=4)
+
+_file_hashes = {}
+
+def get_file_hash(path):
+    """
+    Get a hash of the content of the given file, or None if it doesn't exist
+    """
+    if path not in _file_hashes:
+        try:
+            with open(path, 'rb') as f:
+                _file_hashes[path] = hashlib.sha1(f.read()).hexdigest()
+        except (IOError, OSError):
+            _file_hashes[path] = None
+    return _file_hashes[path]
+
+def get_test_files(testdir):
+    """
+    Get the paths of the files that define the test itself, whether or not
+    they exist, together with any files that its sources #include via
+    quoted names
+    """
+    result = set(os.path.join(testdir, name)
+                 for name in ('script.py', 'stdout.txt', 'stderr.txt',
+                              'metadata.ini', 'getopts.py'))
+    try:
+        inputfiles = get_source_files(testdir)
     except RuntimeError:
-        err = sys.exc_info()[1]
-        print('FAIL')
-        print(err)
-        return (testdir, 'FAIL', None)
+        inputfiles = []
+    for inputfile in inputfiles:
+        result.add(inputfile)
+        with open(inputfile) as f:
+            for line in f:
+                m = re.match(r'\s*#\s*include\s*"(.+)"', line)
+                if m:
+                    result.add(os.path.normpath(
+                        os.path.join(os.path.dirname(inputfile), m.group(1))))
+    return result
+
+def get_environment_key():
+    # Anything changing the environment that the tests run in invalidates
+    # all of the recorded dependencies:
+    return '%s %s %s %s' % (CC, GCC_VERSION, PLUGIN_NAME,
+                            sys.version.replace('\n', ' '))
+
+def get_deps_record(testdir, python_deps):
+    """
+    Get a dict describing everything that a test depended on, given the
+    paths of the Python modules that it used
+    """
+    paths = get_test_files(testdir)
+    paths.update(python_deps)
+    # The shared libraries that GCC loads for the plugin: the plugin itself,
+    # and the library of wrappers around GCC's internal API that it links
+    # against:
+    paths.add(os.path.abspath('%s.so' % PLUGIN_NAME))
+    paths.add(os.path.abspath('gcc-c-api/libgcc-c-api.so'))
+    # The runner itself decides whether a test passes:
+    paths.add(os.path.abspath(__file__))
+    paths.add(os.path.abspath(sys.modules['dejagnu'].__file__))
+    return dict(environment=get_environment_key(),
+                files=dict((path, get_file_hash(path))
+                           for path in sorted(paths)))
+
+def is_unchanged(testdir, record):
+    """
+    Is everything that the test depended on when it last passed (as given
+    by a dict from get_deps_record) still the same?
+    """
+    if record.get('environment') != get_environment_key():
+        return False
+    # A new #include, or a new expected output file, is also a change:
+    for path in get_test_files(testdir):
+        if path not in record['files']:
+            return False
+    for path, filehash in record['files'].items():
+        if get_file_hash(path) != filehash:
+            return False
+    return True
+
+class TestOutcome:
+    def __init__(self, testdir, result, detail, elapsed, output,
+                 deps=None):
+        self.testdir = testdir
+        self.result = result # one of 'OK', 'SKIP', 'FAIL'
+        self.detail = detail
+        self.elapsed = elapsed # wall time, in seconds
+        self.output = output
+        # list of the Python modules (within the srcdir) that the test used:
+        self.deps = deps
+
+    def to_json(self):
+        return dict(test=get_relative_testdir(self.testdir),
+                    result=self.result,
+                    detail=self.detail,
+                    time=self.elapsed,
+                    output=self.output)
+
+def run_one_test(testdir):
+    # Capture everything that the test writes, so that the output from tests
+    # running in parallel doesn't get interleaved:
+    saved_stdout, saved_stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = io.StringIO()
+    start = time.time()
+    deps = []
+    try:
+        try:
+            run_test(testdir, options.srcdir, deps)
+            result, detail = 'OK', None
+        except SkipTest:
+            err = sys.exc_info()[1]
+            result, detail = 'SKIP', err.reason
+        except DejaGnuError:
+            result, detail = 'FAIL', None
+        except RuntimeError:
+            err = sys.exc_info()[1]
+            print(err)
+            result, detail = 'FAIL', None
+        output = sys.stdout.getvalue()
+    finally:
+        sys.stdout, sys.stderr = saved_stdout, saved_stderr
+    return TestOutcome(testdir, result, detail, time.time() - start, output,
+                       deps)
 
 class TestRunner:
     def __init__(self):
         self.num_passes = 0
         self.skipped_tests = []
         self.failed_tests = []
+        self.unchanged_tests = []
+        self.outcomes = []
+
+    def select_tests(self, testdirs, deps):
+        """
+        Get the subset of the tests that need to be run, given the dict of
+        what each test depended on when it last passed
+        """
+        result = []
+        for testdir in testdirs:
+            record = deps.get(get_relative_testdir(testdir))
+            if record and is_unchanged(testdir, record):
+                self.unchanged_tests.append(testdir)
+            else:
+                result.append(testdir)
+        return result
+
+    def get_schedule(self, testdirs, timings):
+        """
+        Order the tests so that the slowest ones (as of the last run) start
+        first, and the quick ones fill in the gaps at the end; tests we
+        don't have timings for are assumed to be slow
+        """
+        def get_key(testdir):
+            elapsed = timings.get(get_relative_testdir(testdir))
+            if elapsed is None:
+                elapsed = float('inf')
+            return (-elapsed, testdir)
+        return sorted(testdirs, key=get_key)
 
     def run_tests(self, testdirs):
-        for testdir in sorted(testdirs):
-            tr.handle_outcome(run_one_test(testdir))
+        for testdir in testdirs:
+            self.handle_outcome(run_one_test(testdir))
 
     def run_tests_in_parallel(self, testdirs):
         pool = multiprocessing.Pool(None) # uses cpu_count
-        for outcome in pool.map(run_one_test, testdirs):
-            tr.handle_outcome(outcome)
+        # Handle each outcome as soon as it arrives:
+        for outcome in pool.imap_unordered(run_one_test, testdirs):
+            self.handle_outcome(outcome)
+        pool.close()
+        pool.join()
 
     def handle_outcome(self, outcome):
-        testdir, result, detail = outcome
-        if result == 'OK':
+        self.outcomes.append(outcome)
+        if outcome.result == 'OK':
             self.num_passes += 1
-        elif result == 'SKIP':
-            self.skipped_tests.append(testdir)
+            status = 'OK'
+        elif outcome.result == 'SKIP':
+            self.skipped_tests.append(outcome.testdir)
+            status = 'skipped: %s' % outcome.detail
         else:
-            assert result == 'FAIL'
-            self.failed_tests.append(testdir)
+            assert outcome.result == 'FAIL'
+            self.failed_tests.append(outcome.testdir)
+            status = 'FAIL'
+        print('%s: %s (%.2fs)' % (outcome.testdir, status, outcome.elapsed))
+        sys.stdout.write(outcome.output)
+        sys.stdout.flush()
 
     def print_results(self):
         def num(count, singular, plural):
@@ -844,16 +1160,89 @@ class TestRunner:
         print('%s; %s; %s' % (num(self.num_passes, "success", "successes"),
                               num(len(self.failed_tests), "failure", "failures"),
                               num(len(self.skipped_tests), "skipped", "skipped")))
-
+        if self.unchanged_tests:
+            print('%s not rerun, being unchanged since they last passed'
+                  ' (use --all to run them)'
+                  % num(len(self.unchanged_tests), "test", "tests"))
+
+    def update_timings(self, timings):
+        for outcome in self.outcomes:
+            if outcome.result != 'SKIP':
+                timings[get_relative_testdir(outcome.testdir)] = outcome.elapsed
+
+    def update_deps(self, deps):
+        # Only a passing test can be skipped next time; anything else gets
+        # rerun until it passes:
+        for outcome in self.outcomes:
+            testdir = get_relative_testdir(outcome.testdir)
+            if outcome.result == 'OK' and outcome.deps:
+                deps[testdir] = get_deps_record(outcome.testdir, outcome.deps)
+            elif testdir in deps:
+                del deps[testdir]
+
+    def write_json(self, path):
+        outcomes = sorted(self.outcomes, key=lambda outcome: outcome.testdir)
+        with open(path, 'w') as f:
+            json.dump(dict(shard=options.shard,
+                           successes=self.num_passes,
+                           failures=len(self.failed_tests),
+                           skipped=len(self.skipped_tests),
+                           unchanged=sorted(get_relative_testdir(testdir)
+                                            for testdir in self.unchanged_tests),
+                           tests=[outcome.to_json() for outcome in outcomes]),
+                      f, sort_keys=True, indent=4)
+
+    def write_junit_xml(self, path):
+        from xml.etree import ElementTree as ET
+        suite = ET.Element('testsuite',
+                           name='gcc-python-plugin',
+                           tests=str(len(self.outcomes)),
+                           failures=str(len(self.failed_tests)),
+                           skipped=str(len(self.skipped_tests)),
+                           time='%.3f' % sum(outcome.elapsed
+                                             for outcome in self.outcomes))
+        for outcome in sorted(self.outcomes,
+                              key=lambda outcome: outcome.testdir):
+            testdir = get_relative_testdir(outcome.testdir)
+            case = ET.SubElement(suite, 'testcase',
+                                 classname=os.path.dirname(testdir).replace(os.sep, '.'),
+                                 name=os.path.basename(testdir),
+                                 time='%.3f' % outcome.elapsed)
+            if outcome.result == 'SKIP':
+                ET.SubElement(case, 'skipped', message=outcome.detail)
+            elif outcome.result == 'FAIL':
+                failure = ET.SubElement(case, 'failure', message='FAIL')
+                failure.text = outcome.output
+        ET.ElementTree(suite).write(path, encoding='utf-8',
+                                    xml_declaration=True)
+
+timings = read_timings(options.timings)
+deps = read_deps(options.deps)
 tr = TestRunner()
-if 1:
-    tr.run_tests_in_parallel(sorted(testdirs))
-else:
-    tr.run_tests(sorted(testdirs))
+if not options.all:
+    testdirs = tr.select_tests(testdirs, deps)
+schedule = tr.get_schedule(testdirs, timings)
+write_sitecustomize()
+try:
+    if 1:
+        tr.run_tests_in_parallel(schedule)
+    else:
+        tr.run_tests(schedule)
+finally:
+    shutil.rmtree(sitecustomize_dir, ignore_errors=True)
+
+tr.update_timings(timings)
+write_timings(options.timings, timings)
+tr.update_deps(deps)
+write_deps(options.deps, deps)
+if options.json:
+    tr.write_json(options.json)
+if options.junit_xml:
+    tr.write_junit_xml(options.junit_xml)
 
 tr.print_results()
 if len(tr.failed_tests) > 0:
     print('Failed tests:')
-    for test in tr.failed_tests:
+    for test in sorted(tr.failed_tests):
         print('  %s' % test)
     sys.exit(1)
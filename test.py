@@ -62,7 +62,7 @@ def my_pass_execution_callback(*args, **kwargs):
             for bb in fun.cfg.basic_blocks:
                 print('bb: %r' % bb)
                 print('bb.gimple: %r' % bb.gimple)
-                if isinstance(bb.gimple, list):
+                if bb.gimple:
                     for stmt in bb.gimple:
                         print('  %r: %r : %s column: %i block: %r' % (stmt, repr(str(stmt)), stmt.loc, stmt.loc.column, stmt.block))
                         print(get_src_for_loc(stmt.loc))
@@ -0,0 +1,45 @@
+/*
+   Copyright 2026 Red Hat, Inc.
+
+   This is free software: you can redistribute it and/or modify it
+   under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful, but
+   WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+   General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see
+   <http://www.gnu.org/licenses/>.
+*/
+
+#include <Python.h>
+
+PyObject *
+test(PyObject *self, PyObject *args)
+{
+    PyObject *a;
+    PyObject *b = NULL;
+    float f;
+
+    if (!PyArg_UnpackTuple(args, "test", 1, 2, &a, &b)) {
+        return NULL;
+    }
+
+    /* The builtin checkers should still be run: */
+    if (!PyArg_ParseTuple(args, "i", &f)) {
+        return NULL;
+    }
+    return PyFloat_FromDouble(f);
+}
+
+/*
+  PEP-7
+Local variables:
+c-basic-offset: 4
+indent-tabs-mode: nil
+End:
+*/
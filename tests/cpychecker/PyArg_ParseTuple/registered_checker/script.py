@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that checkers can be registered for the calls to other functions
+import gcc
+
+from libcpychecker.formatstrings import register_callsite_checker
+
+def check_unpack_tuple(stmt):
+    gcc.inform(stmt.loc,
+               'PyArg_UnpackTuple called with min=%i max=%i and %i pointers'
+               % (stmt.args[2].constant, stmt.args[3].constant,
+                  len(stmt.args) - 4))
+
+register_callsite_checker('PyArg_UnpackTuple', check_unpack_tuple)
+
+from libcpychecker import main
+main()
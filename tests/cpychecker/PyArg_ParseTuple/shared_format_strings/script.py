@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that parsed format strings are shared between callsites, except
+# for those that record information about the callsite
+import sys
+
+import gcc
+
+from libcpychecker.formatstrings import parse_format_string, \
+    FormatStringWarning
+from libcpychecker.PyArg_ParseTuple import PyArgParseFmt
+from libcpychecker.Py_BuildValue import PyBuildValueFmt
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        fmt = parse_format_string(PyArgParseFmt, 'O|i', False)
+        print('fmt: %r' % fmt.fmt_string)
+        print('reused: %s'
+              % (fmt is parse_format_string(PyArgParseFmt, 'O|i', False)))
+        print('exp types reused: %s'
+              % (fmt.get_exp_types() is fmt.get_exp_types()))
+        print('keyed by with_size_t: %s'
+              % (fmt is not parse_format_string(PyArgParseFmt, 'O|i', True)))
+        bv = parse_format_string(PyBuildValueFmt, 'Oi', False)
+        print('Py_BuildValue reused: %s'
+              % (bv is parse_format_string(PyBuildValueFmt, 'Oi', False)))
+        print('keyed by parser: %s'
+              % (bv is not parse_format_string(PyArgParseFmt, 'Oi', False)))
+        print('"O!" reused: %s'
+              % (parse_format_string(PyArgParseFmt, 'O!', False)
+                 is parse_format_string(PyArgParseFmt, 'O!', False)))
+        for i in range(2):
+            try:
+                parse_format_string(PyArgParseFmt, 'O)', False)
+            except FormatStringWarning:
+                err = sys.exc_info()[1]
+                print('error: %s' % err)
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
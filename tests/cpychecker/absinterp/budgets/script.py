@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that exceeding each of the budgets of a Limits instance degrades
+# the analysis (widening ranges of values, and merging the states that are
+# then equivalent), rather than abandoning it, and that the refcount checker
+# reports this
+import re
+
+import gcc
+
+from libcpychecker.absinterp import iter_traces, iter_traces_by_worklist, \
+    Limits
+from libcpychecker.refcounts import make_stmt_graph, impl_check_refcounts
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        stmtgraph = make_stmt_graph(fn)
+
+        # The ranges differ, so merging alone doesn't help:
+        traces = iter_traces_by_worklist(stmtgraph, {})
+        print('iter_traces_by_worklist: %i traces' % len(traces))
+
+        for kwargs in [dict(),
+                       dict(max_states=0),
+                       dict(max_bytes=0),
+                       dict(max_cpu_secs=0)]:
+            limits = Limits(maxtrans=1024, **kwargs)
+            traces = iter_traces(stmtgraph, {}, limits=limits)
+            print('%r: %i traces, degraded: %r'
+                  % (kwargs, len(traces), limits.degraded))
+            print('return value: %s' % traces[0].return_value().value)
+
+        rep = impl_check_refcounts(fn, max_states=0)
+        for d in rep.get_saved_diagnostics():
+            # (the number of transitions is an implementation detail):
+            print('%s: %s' % (d.kind, re.sub('after [0-9]+ transitions',
+                                             'after N transitions',
+                                             d.msg)))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that a DeltaMap behaves like an OrderedDict, across random
+# sequences of sets, deletes and copies (the latter sharing layers between
+# the maps), including the order of iteration after a key is deleted and
+# then set again
+
+from collections import OrderedDict
+import random
+
+from libcpychecker.deltamap import DeltaMap
+
+def check_same(dm, od):
+    assert list(dm.items()) == list(od.items()), (dm, od)
+    assert list(dm) == list(od.keys())
+    assert list(dm.values()) == list(od.values())
+    assert len(dm) == len(od)
+    for key in range(NUM_KEYS):
+        assert (key in dm) == (key in od)
+        assert dm.get(key) == od.get(key)
+
+# A small set of keys, so that keys are often updated, deleted, and set
+# again:
+NUM_KEYS = 8
+
+def run_sequence(rng, num_ops):
+    # A list of (DeltaMap, OrderedDict) pairs, all derived from the first
+    # pair by copying:
+    pairs = [(DeltaMap(), OrderedDict())]
+    for i in range(num_ops):
+        dm, od = rng.choice(pairs)
+        op = rng.random()
+        if op < 0.5:
+            key = rng.randrange(NUM_KEYS)
+            value = rng.randrange(100)
+            dm[key] = value
+            od[key] = value
+        elif op < 0.8:
+            if od:
+                key = rng.choice(list(od.keys()))
+                del dm[key]
+                del od[key]
+        else:
+            pairs.append((dm.copy(), od.copy()))
+        # Changes to one map must not be visible through any other:
+        for dm, od in pairs:
+            check_same(dm, od)
+
+NUM_SEQUENCES = 200
+NUM_OPS = 50
+rng = random.Random(0)
+for i in range(NUM_SEQUENCES):
+    run_sequence(rng, NUM_OPS)
+print('random sequences: %i of %i operations' % (NUM_SEQUENCES, NUM_OPS))
+
+# Delete-then-reinsert moves the key to the end, both before and after a
+# copy:
+dm = DeltaMap([('a', 1), ('b', 2), ('c', 3)])
+dm2 = dm.copy()
+del dm['a']
+dm['a'] = 4
+del dm2['b']
+dm3 = dm2.copy()
+dm2['b'] = 5
+print('reinserted: %r' % list(dm.items()))
+print('reinserted in copy: %r' % list(dm2.items()))
+print('copy of copy: %r' % list(dm3.items()))
@@ -0,0 +1,58 @@
+/*
+   Copyright 2026 Red Hat, Inc.
+
+   This is free software: you can redistribute it and/or modify it
+   under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful, but
+   WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+   General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see
+   <http://www.gnu.org/licenses/>.
+*/
+
+#include <stdio.h>
+
+/*
+  Each if/else leaves the same state on both branches, so there are 4 paths
+  through this function, but only one distinct state at its end.  (The
+  files are deliberately leaked, to keep the paths simple)
+*/
+int
+test(void *p, void *q)
+{
+    FILE *f;
+    FILE *g;
+    int x;
+
+    f = fopen("first.txt", "r");
+
+    if (p == q) {
+        x = 1;
+    } else {
+        x = 1;
+    }
+
+    g = fopen("second.txt", "r");
+
+    if (q == p) {
+        x = 2;
+    } else {
+        x = 2;
+    }
+
+    return x;
+}
+
+/*
+  PEP-7
+Local variables:
+c-basic-offset: 4
+indent-tabs-mode: nil
+End:
+*/
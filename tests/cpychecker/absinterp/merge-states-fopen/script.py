@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that states can be merged in a function that calls fopen, both by
+# iter_traces_by_worklist and once the analysis has been degraded, and that
+# the FILE* from different calls to fopen aren't treated as equivalent
+import gcc
+
+from libcpychecker.absinterp import iter_traces, iter_traces_by_worklist, \
+    Limits
+from libcpychecker.c_stdio import NonNullFilePtr
+from libcpychecker.refcounts import make_stmt_graph
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        stmtgraph = make_stmt_graph(fn)
+
+        traces = iter_traces(stmtgraph, {})
+        print('iter_traces: %i traces' % len(traces))
+
+        traces = iter_traces_by_worklist(stmtgraph, {})
+        print('iter_traces_by_worklist: %i traces' % len(traces))
+        print('return value: %s' % traces[0].return_value().value)
+
+        limits = Limits(maxtrans=256, max_states=0)
+        traces = iter_traces(stmtgraph, {}, limits=limits)
+        print('degraded iter_traces: %i traces' % len(traces))
+
+        keys = [NonNullFilePtr(stmt).merge_key()
+                for bb in fn.cfg.basic_blocks
+                for stmt in (bb.gimple or [])
+                if isinstance(stmt, gcc.GimpleCall)
+                and stmt.fndecl and stmt.fndecl.name == 'fopen']
+        print('fopen calls: %i' % len(keys))
+        print('distinct FILE* keys: %i' % len(set(keys)))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
@@ -0,0 +1,53 @@
+/*
+   Copyright 2026 Red Hat, Inc.
+
+   This is free software: you can redistribute it and/or modify it
+   under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful, but
+   WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+   General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see
+   <http://www.gnu.org/licenses/>.
+*/
+
+extern void *get(void);
+
+/*
+  Both branches of the first "if" leave the same state at "y = 5;", but
+  only a path that took the "else" branch the first time around the loop
+  can go on to take the other branch and return 5
+*/
+int
+test(void)
+{
+    int x = 0;
+    int y = 0;
+
+    for (;;) {
+        if (get()) {
+            x = y;
+        } else {
+            x = 0;
+        }
+        y = 5;
+        if (get()) {
+            break;
+        }
+    }
+
+    return x;
+}
+
+/*
+  PEP-7
+Local variables:
+c-basic-offset: 4
+indent-tabs-mode: nil
+End:
+*/
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that iter_traces_by_worklist doesn't merge states at a point
+# within a loop when the paths leading to them have taken different edges
+# around the loop, since they can go on to have different futures
+import gcc
+
+from libcpychecker.absinterp import iter_traces, iter_traces_by_worklist
+from libcpychecker.refcounts import make_stmt_graph
+
+def get_return_values(traces):
+    return sorted(set(trace.return_value().value
+                      for trace in traces
+                      if trace.return_value()))
+
+def on_pass_execution(p, fn):
+    stmtgraph = make_stmt_graph(fn)
+
+    traces = iter_traces(stmtgraph, {})
+    print('iter_traces: %s' % get_return_values(traces))
+
+    traces = iter_traces_by_worklist(stmtgraph, {})
+    print('iter_traces_by_worklist: %s' % get_return_values(traces))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution,
+                      filter_passes='*warn_function_return')
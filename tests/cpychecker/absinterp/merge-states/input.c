@@ -0,0 +1,61 @@
+/*
+   Copyright 2026 Red Hat, Inc.
+
+   This is free software: you can redistribute it and/or modify it
+   under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful, but
+   WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+   General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see
+   <http://www.gnu.org/licenses/>.
+*/
+
+/*
+  Each if/else leaves the same state on both branches, so there are 16
+  paths through this function, but only one distinct state at its end
+*/
+int
+test(void *a, void *b, void *c, void *d)
+{
+    int x;
+
+    if (a == b) {
+        x = 1;
+    } else {
+        x = 1;
+    }
+
+    if (b == c) {
+        x = 2;
+    } else {
+        x = 2;
+    }
+
+    if (c == d) {
+        x = 3;
+    } else {
+        x = 3;
+    }
+
+    if (d == a) {
+        x = 4;
+    } else {
+        x = 4;
+    }
+
+    return x;
+}
+
+/*
+  PEP-7
+Local variables:
+c-basic-offset: 4
+indent-tabs-mode: nil
+End:
+*/
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that iter_traces_by_worklist merges equivalent states at join
+# points, rather than enumerating every path
+import gcc
+
+from libcpychecker.absinterp import iter_traces, iter_traces_by_worklist
+from libcpychecker.refcounts import make_stmt_graph
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        stmtgraph = make_stmt_graph(fn)
+
+        traces = iter_traces(stmtgraph, {})
+        print('iter_traces: %i traces' % len(traces))
+
+        traces = iter_traces_by_worklist(stmtgraph, {})
+        print('iter_traces_by_worklist: %i traces' % len(traces))
+        print('return value: %s' % traces[0].return_value().value)
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
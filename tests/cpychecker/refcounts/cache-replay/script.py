@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that a result replayed from the cache of the refcount checker
+# emits the same diagnostics as the analysis that it was saved from
+import os
+import shutil
+import tempfile
+
+import gcc
+
+from libcpychecker.cache import CachedResult, location_as_tuple
+from libcpychecker.refcounts import check_refcounts
+
+def describe(result):
+    if result is None:
+        return 'replayed from the cache'
+    return 'analyzed'
+
+def on_pass_execution(p, fn):
+    cachedir = tempfile.mkdtemp()
+    try:
+        # The first time, the function is analyzed, emitting the warnings
+        # about the call, and the result is saved:
+        print('first check: %s' % describe(check_refcounts(fn,
+                                                           cache_dir=cachedir)))
+        # The second time, the same warnings are replayed:
+        print('second check: %s' % describe(check_refcounts(fn,
+                                                            cache_dir=cachedir)))
+    finally:
+        shutil.rmtree(cachedir)
+
+    # The announcement of an HTML report gives the filename that it's
+    # written out to within this build:
+    result = CachedResult([('warning', location_as_tuple(fn.start),
+                            'a saved warning')],
+                          {'-refcount-errors.html': '<html></html>'})
+    result.replay(fn)
+    filename = '%s.test-refcount-errors.html' % gcc.get_dump_base_name()
+    with open(filename) as f:
+        print('%s: %s' % (os.path.basename(filename), f.read()))
+    os.unlink(filename)
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution,
+                      filter_passes='*warn_function_return')
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+# Verify the on-disk cache of results used by the refcount checker
+import shutil
+import tempfile
+
+import gcc
+
+from libcpychecker.cache import RefcountCache, CachedResult, \
+    location_as_tuple
+from gccutils.selftests import assertEqual
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        cachedir = tempfile.mkdtemp()
+        try:
+            cache = RefcountCache(cachedir)
+
+            # The key should be stable, and should depend on the options:
+            key = cache.get_key(fn, dict(maxtrans=256))
+            assertEqual(key, cache.get_key(fn, dict(maxtrans=256)))
+            assert key != cache.get_key(fn, dict(maxtrans=1024))
+
+            # Initially the cache is empty:
+            assertEqual(cache.lookup(fn, key), None)
+
+            # Results referring to locations outside of the function can't
+            # be replayed, so they aren't stored:
+            cache.store(fn, key,
+                        CachedResult([('inform', ('nosuchfile.c', 1, 1),
+                                       'unknown location')],
+                                     {}))
+            assertEqual(cache.lookup(fn, key), None)
+
+            # Round-trip of a result:
+            cache.store(fn, key,
+                        CachedResult([('warning', location_as_tuple(fn.end),
+                                       'a warning')],
+                                     {'.json' : '{}'},
+                                     {'reports' : []}))
+            result = cache.lookup(fn, key)
+            assertEqual(result.diagnostics,
+                        [('warning', location_as_tuple(fn.end), 'a warning')])
+            assertEqual(result.files, {'.json' : '{}'})
+            assertEqual(result.record, {'reports' : []})
+            print('cached result for %s found' % fn.decl.name)
+        finally:
+            shutil.rmtree(cachedir)
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
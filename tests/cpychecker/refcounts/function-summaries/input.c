@@ -0,0 +1,60 @@
+/*
+   Copyright 2026 Red Hat, Inc.
+
+   This is free software: you can redistribute it and/or modify it
+   under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful, but
+   WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+   General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see
+   <http://www.gnu.org/licenses/>.
+*/
+
+#include <Python.h>
+
+/*
+  Test of the summaries of static helper functions
+*/
+
+static PyObject *
+make_new(long v)
+{
+    return PyLong_FromLong(v);
+}
+
+static PyObject *
+get_borrowed(PyObject *dict)
+{
+    return PyDict_GetItemString(dict, "key");
+}
+
+static PyObject *
+new_ref_to_arg(PyObject *obj)
+{
+    Py_INCREF(obj);
+    return obj;
+}
+
+static PyObject *
+steal_item(PyObject *list, PyObject *item)
+{
+    PyList_SetItem(list, 0, item);
+    return make_new(0);
+}
+
+PyObject *
+test(PyObject *list, PyObject *dict)
+{
+    PyObject *item = make_new(42);
+    if (!item) {
+        return NULL;
+    }
+    steal_item(list, item);
+    return new_ref_to_arg(get_borrowed(dict));
+}
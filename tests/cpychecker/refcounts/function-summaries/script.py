@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify the summaries computed for static helper functions
+
+import gcc
+
+from libcpychecker.summaries import get_function_summary
+
+def on_pass_execution(p, fn):
+    if p.name == '*free_lang_data':
+        # The functions defined within input.c, in source order:
+        decls = sorted([node.decl for node in gcc.get_callgraph_nodes()
+                        if node.decl.location.file.endswith('input.c')],
+                       key=lambda decl: decl.location.line)
+        for decl in decls:
+            print('%s: %r' % (decl.name, get_function_summary(decl)))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
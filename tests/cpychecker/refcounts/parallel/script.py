@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that FunctionPool runs functions in child processes, emitting
+# their diagnostics (including those emitted directly) in source order, and
+# falling back to running within the compiler process when a child fails
+import os
+
+import gcc
+
+from libcpychecker.cache import CachedResult, location_as_tuple
+from libcpychecker.parallel import FunctionPool
+
+compiler_pid = os.getpid()
+
+def checkfn(fun, result_sink):
+    if result_sink:
+        if fun.decl.name == 'third':
+            raise ValueError('this child fails')
+        if os.getpid() != compiler_pid:
+            where = 'a child process'
+        else:
+            where = 'the compiler process'
+        if fun.decl.name == 'second':
+            # Diagnostics emitted directly by a child are captured, and
+            # emitted by the compiler process before those of its result:
+            gcc.warning(fun.start,
+                        'warned directly whilst checking %s in %s'
+                        % (fun.decl.name, where))
+        result_sink(CachedResult([('warning', location_as_tuple(fun.end),
+                                   'checked %s in %s'
+                                   % (fun.decl.name, where))],
+                                 {}))
+    else:
+        gcc.warning(fun.end,
+                    'checked %s in the compiler process' % fun.decl.name)
+
+pool = FunctionPool(2)
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        pool.submit(fn, checkfn)
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
+
+class JoinPass(gcc.SimpleIpaPass):
+    def execute(self):
+        pool.join()
+
+ps = JoinPass(name='join-pool')
+ps.register_before('*free_lang_data')
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that check_refcounts can gather the JSON form of its reports into
+# a per-translation-unit bundle, instead of writing out HTML
+import gzip
+import json
+import os
+
+import gcc
+
+from libcpychecker.refcounts import check_refcounts
+from libcpychecker.reports import TranslationUnitReports
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        tu_reports = TranslationUnitReports()
+        check_refcounts(fn, reports='json', tu_reports=tu_reports)
+        filename = tu_reports.write_bundle()
+        print('bundle: %s' % os.path.basename(filename))
+        with gzip.open(filename, 'rb') as f:
+            lines = [json.loads(line.decode('utf-8')) for line in f]
+        os.unlink(filename)
+        print('header: %s' % sorted(lines[0].keys()))
+        for data in lines[1:]:
+            print('function: %s' % data['function']['name'])
+            print('filename: %s' % data['filename'])
+            for report in data['reports']:
+                print('message: %s' % report['message'])
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that check_refcounts records the phases and counters of its work
+import json
+
+import gcc
+
+from libcpychecker.instrumentation import TranslationUnitStats
+from libcpychecker.refcounts import check_refcounts
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        tu_stats = TranslationUnitStats()
+        check_refcounts(fn, tu_stats=tu_stats)
+        stats = tu_stats.functions[0]
+        print('function: %s' % stats.name)
+        print('phases: %s' % list(stats.phases.keys()))
+        print('counters: %s' % list(stats.counters.keys()))
+        print('traces: %i' % stats.counters['traces'])
+        print('reports: %i' % stats.counters['reports'])
+        js = json.loads(json.dumps(tu_stats.to_json()))
+        print('JSON: %s' % sorted(js.keys()))
+        print('JSON totals: %s' % sorted(js['totals'].keys()))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
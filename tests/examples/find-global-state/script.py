@@ -90,10 +90,12 @@ def on_pass_execution(p, fn):
                         if stmts:
                             for stmt in stmts:
                                 stmt.walk_tree(sf.find_state_users,
-                                               stmt.loc)
+                                               stmt.loc,
+                                               types=gcc.VarDecl)
 
         # Flush the data that was found:
         sf.flush()
 
 gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
-                      on_pass_execution)
+                      on_pass_execution,
+                      filter_passes='*free_lang_data')
@@ -48,7 +48,8 @@ def on_pass_execution(p, fn):
                     print('  str(stmt.args[%i]): %r' % (i, str(stmt.args[i])))
                 print('  str(stmt.lhs): %s' % str(stmt.lhs))
 
-# Wire up our callback:
+# Wire up our callback, only calling it for the pass we're interested in:
 gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
-                      on_pass_execution)
+                      on_pass_execution,
+                      filter_passes='*warn_function_return')
 
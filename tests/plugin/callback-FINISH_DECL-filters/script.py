@@ -0,0 +1,45 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+
+# Test case for the filter_* keyword arguments to gcc.register_callback
+
+import gcc
+
+def finish_decl_cb(decl, fn, label, **kwargs):
+    print('%s: %r %r' % (label, decl, kwargs))
+
+gcc.register_callback(gcc.PLUGIN_FINISH_DECL, finish_decl_cb,
+                      ('types', ), filter_types=gcc.VarDecl, bar='baz')
+gcc.register_callback(gcc.PLUGIN_FINISH_DECL, finish_decl_cb,
+                      ('prefixes', ), filter_prefixes=('test_', 'none_'))
+gcc.register_callback(gcc.PLUGIN_FINISH_DECL, finish_decl_cb,
+                      ('suffixes', ), filter_suffixes='_fn')
+gcc.register_callback(gcc.PLUGIN_FINISH_DECL, finish_decl_cb,
+                      ('names', ), filter_names=['i', 'field'])
+gcc.register_callback(gcc.PLUGIN_FINISH_DECL, finish_decl_cb,
+                      ('regex', ), filter_regex='^ext_')
+gcc.register_callback(gcc.PLUGIN_FINISH_DECL, finish_decl_cb,
+                      ('combined', ),
+                      filter_types=(gcc.ParmDecl, gcc.TypeDecl),
+                      filter_names='i', filter_suffixes='_typedef')
+
+# Filters are only supported for events that are passed a tree:
+try:
+    gcc.register_callback(gcc.PLUGIN_FINISH_UNIT, finish_decl_cb,
+                          filter_names='i')
+except ValueError as err:
+    print('ValueError: %s' % err)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Test case for the filter_passes keyword argument to gcc.register_callback
+
+import gcc
+
+def on_pass_execution(p, fn, label, **kwargs):
+    print('%s: %s %r %r' % (label, p.name, fn, kwargs))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION, on_pass_execution,
+                      ('one', ), filter_passes='*warn_function_return',
+                      bar='baz')
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION, on_pass_execution,
+                      ('several', ),
+                      filter_passes=['*warn_function_return', 'cfg'])
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION, on_pass_execution,
+                      ('none', ), filter_passes='no-such-pass')
+
+# filter_passes is only supported for PLUGIN_PASS_EXECUTION:
+try:
+    gcc.register_callback(gcc.PLUGIN_FINISH_UNIT, on_pass_execution,
+                          filter_passes='cfg')
+except ValueError as err:
+    print('ValueError: %s' % err)
+
+# ...and the filters on trees aren't supported for it:
+try:
+    gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION, on_pass_execution,
+                          filter_passes='cfg', filter_names='test_function')
+except ValueError as err:
+    print('ValueError: %s' % err)
+
+try:
+    gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION, on_pass_execution,
+                          filter_passes=42)
+except TypeError as err:
+    print('TypeError: %s' % err)
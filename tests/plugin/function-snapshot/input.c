@@ -0,0 +1,54 @@
+/*
+   Copyright 2026 Red Hat, Inc.
+
+   This is free software: you can redistribute it and/or modify it
+   under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful, but
+   WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+   General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see
+   <http://www.gnu.org/licenses/>.
+*/
+
+/*
+  A function with a loop, with several calls to a couple of callees, and
+  with statements attributed to more than one source file, to exercise the
+  tables that gcc.Function.snapshot() builds
+ */
+
+extern int first_callee(int);
+extern int second_callee(int);
+
+int
+test_function(int a, int b)
+{
+    int i;
+    int total = 0;
+
+    for (i = 0; i < a; i++) {
+        total += first_callee(i);
+    }
+
+    if (total < b) {
+        total += second_callee(total);
+    } else {
+        total += first_callee(b);
+    }
+
+#line 1 "other-file.c"
+    return total - second_callee(a);
+}
+
+/*
+  PEP-7
+Local variables:
+c-basic-offset: 4
+indent-tabs-mode: nil
+End:
+*/
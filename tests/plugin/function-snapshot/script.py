@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that gcc.Function.snapshot() agrees with walking gcc.Function.cfg
+
+import os
+from array import array
+
+import gcc
+
+FLAGS = ('true_value', 'false_value', 'loop_exit', 'can_fallthru',
+         'complex', 'eh')
+TRUE_VALUE = 1 << FLAGS.index('true_value')
+FALSE_VALUE = 1 << FLAGS.index('false_value')
+
+def check_snapshot(fn, snap):
+    blocks = fn.cfg.basic_blocks
+    assert list(snap.block_index) == [bb.index for bb in blocks]
+    assert len(snap.succ_offsets) == len(blocks) + 1
+    assert len(snap.stmt_offsets) == len(blocks) + 1
+
+    for i, bb in enumerate(blocks):
+        assert snap.block(i) == bb
+
+        edges = range(snap.succ_offsets[i], snap.succ_offsets[i + 1])
+        assert len(edges) == len(bb.succs)
+        for j, e in zip(edges, bb.succs):
+            assert snap.block(snap.succ_dest[j]) == e.dest
+            for bit, flag in enumerate(FLAGS):
+                assert bool(snap.succ_flags[j] & (1 << bit)) == getattr(e, flag)
+
+        stmts = (bb.phi_nodes or []) + (bb.gimple or [])
+        indices = range(snap.stmt_offsets[i], snap.stmt_offsets[i + 1])
+        assert len(indices) == len(stmts)
+        for j, stmt in zip(indices, stmts):
+            assert snap.stmt(j) == stmt
+            assert snap.kinds[snap.stmt_kind[j]] == type(stmt)
+            if isinstance(stmt, gcc.GimpleCall) and stmt.fndecl:
+                assert snap.callee_names[snap.callee[j]] == stmt.fndecl.name
+            else:
+                assert snap.callee[j] == -1
+            if stmt.loc:
+                assert snap.files[snap.file[j]] == stmt.loc.file
+                assert snap.line[j] == stmt.loc.line
+                assert snap.column[j] == stmt.loc.column
+            else:
+                assert snap.file[j] == -1
+    return True
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        print('early snapshot: %r' % fn.snapshot())
+
+    if p.name == 'ssa':
+        snap = fn.snapshot()
+        print('type: %r' % type(snap))
+        print('function: %r' % snap.function)
+        print('arrays: %r' % all(isinstance(getattr(snap, name), array)
+                                 for name in ('block_index',
+                                              'succ_offsets', 'succ_dest',
+                                              'succ_flags', 'stmt_offsets',
+                                              'stmt_kind', 'callee',
+                                              'file', 'line', 'column')))
+
+        print('matches cfg: %r' % check_snapshot(fn, snap))
+        print('callee_names: %r' % (snap.callee_names, ))
+        print('calls: %i' % len([idx for idx in snap.callee if idx != -1]))
+        print('conditional edges: %i'
+              % len([flags for flags in snap.succ_flags
+                     if flags & (TRUE_VALUE | FALSE_VALUE)]))
+        print('files: %r' % sorted(os.path.basename(f) for f in snap.files))
+        print('kinds include GimpleCall: %r' % (gcc.GimpleCall in snap.kinds))
+
+        # The snapshot marks its blocks and statements for GCC's garbage
+        # collector:
+        gcc._force_garbage_collection()
+        print('matches cfg after garbage collection: %r'
+              % check_snapshot(fn, snap))
+
+        try:
+            snap.stmt(len(snap.stmt_kind))
+        except IndexError as e:
+            print('IndexError: %s' % e)
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
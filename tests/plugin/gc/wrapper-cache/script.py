@@ -0,0 +1,47 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that wrapper objects are unique whilst they are alive, but that
+# the wrapper caches don't keep them alive
+
+import sys
+
+import gcc
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        # An object that nothing else refers to, for comparing refcounts:
+        baseline = []
+
+        decl = fn.decl
+        print('decl is fn.decl: %r' % (decl is fn.decl))
+        print('extra refs to decl: %r'
+              % (sys.getrefcount(decl) - sys.getrefcount(baseline)))
+
+        stmt = fn.cfg.basic_blocks[2].gimple[-1]
+        print('type(stmt): %r' % type(stmt))
+        print('stmt is fn.cfg.basic_blocks[2].gimple[-1]: %r'
+              % (stmt is fn.cfg.basic_blocks[2].gimple[-1]))
+        print('extra refs to stmt: %r'
+              % (sys.getrefcount(stmt) - sys.getrefcount(baseline)))
+
+        # Once the old wrapper has gone, we should get a new one:
+        name = decl.name
+        del decl
+        print('fn.decl.name == name: %r' % (fn.decl.name == name))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Selftest for the "types" and "collect" arguments to walk_tree, and for
+# gcc.Function.walk_tree
+import gcc
+
+class FilteredWalkPass(gcc.GimplePass):
+    def execute(self, fun):
+        # This is called per-function during compilation:
+        print('fun: %s' % fun)
+
+        # Collect all of the string constants in the function:
+        nodes = fun.walk_tree(types=gcc.StringCst, collect=True)
+        print('  string constants: %r' % [node.constant for node in nodes])
+
+        # Collect the named variables and parameters, via a set of types:
+        nodes = fun.walk_tree(types={gcc.VarDecl, gcc.ParmDecl}, collect=True)
+        print('  named decls: %r'
+              % sorted(set(node.name for node in nodes if node.name)))
+
+        # The callback only sees matching nodes, along with the extra
+        # arguments:
+        self.count = 0
+        node = fun.walk_tree(self.find_node, 'extra', types=gcc.StringCst,
+                             flag=True)
+        print('  first string constant: %r (after %i calls)'
+              % (node, self.count))
+
+        for bb in fun.cfg.basic_blocks:
+            if bb.gimple:
+                for stmt in bb.gimple:
+                    node = stmt.walk_tree(self.find_node, 'extra',
+                                          types=gcc.StringCst, flag=True)
+                    if node:
+                        print('  stmt: %s' % stmt)
+                        print('    node: %r' % node)
+                    nodes = stmt.walk_tree(types=gcc.Constant, collect=True)
+                    assert all(isinstance(node, gcc.Constant) for node in nodes)
+
+        for kwargs in ({'types': int},
+                       {},
+                       {'types': gcc.VarDecl}):
+            try:
+                stmt.walk_tree(**kwargs)
+            except TypeError as e:
+                print('  TypeError: %s' % e)
+        try:
+            stmt.walk_tree(self.find_node, collect=True)
+        except TypeError as e:
+            print('  TypeError: %s' % e)
+
+    def find_node(self, node, extra, flag):
+        assert isinstance(node, gcc.StringCst)
+        assert extra == 'extra'
+        assert flag
+        self.count += 1
+        return True
+
+ps = FilteredWalkPass(name='filtered-walk-tree')
+ps.register_after('cfg')
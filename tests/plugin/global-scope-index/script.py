@@ -0,0 +1,61 @@
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify the indexed lookups of names within the global scope
+
+import gcc
+
+from gccutils import get_global_scope_index, get_global_typedef, \
+    get_global_vardecl_by_name, memoize_per_unit
+
+num_calls = 0
+
+@memoize_per_unit
+def get_second_typedef():
+    global num_calls
+    num_calls += 1
+    return get_global_typedef('second_typedef')
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        index = get_global_scope_index()
+        print('type(index): %s' % type(index).__name__)
+        print('index is get_global_scope_index(): %r'
+              % (index is get_global_scope_index()))
+
+        print('get_global_typedef(\'first_typedef\'): %r'
+              % get_global_typedef('first_typedef'))
+        print('get_global_typedef(\'first_var\'): %r'
+              % get_global_typedef('first_var'))
+        print('get_global_vardecl_by_name(\'second_var\'): %r'
+              % get_global_vardecl_by_name('second_var'))
+        print('get_global_vardecl_by_name(\'not_a_var\'): %r'
+              % get_global_vardecl_by_name('not_a_var'))
+
+        # The index should agree with a scan of the decls:
+        for u in gcc.get_translation_units():
+            for v in u.block.vars:
+                if isinstance(v, gcc.TypeDecl):
+                    assert get_global_typedef(v.name) == v
+                elif isinstance(v, gcc.VarDecl):
+                    assert get_global_vardecl_by_name(v.name) == v
+
+        print('get_second_typedef(): %r' % get_second_typedef())
+        print('get_second_typedef(): %r' % get_second_typedef())
+        print('num_calls: %r' % num_calls)
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
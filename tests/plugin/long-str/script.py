@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify that str() of a tree isn't truncated, however long its text, and
+# that rendering the same tree again gives the same text
+
+import gcc
+
+def on_pass_execution(p, data):
+    if p.name == 'visibility':
+        for var in gcc.get_variables():
+            if var.decl.name != 'table':
+                continue
+            s = str(var.decl.initial)
+            print('len(s) > 1024: %r' % (len(s) > 1024))
+            print("s.endswith('399}'): %r" % s.endswith('399}'))
+            print('same again: %r' % (str(var.decl.initial) == s))
+            print('var.decl.type: %s' % var.decl.type)
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#   Copyright 2026 Red Hat, Inc.
+#
+#   This is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see
+#   <http://www.gnu.org/licenses/>.
+
+# Verify the behavior of gcc.SequenceView
+
+import gcc
+
+def on_pass_execution(p, fn):
+    if p.name == '*warn_function_return':
+        blocks = fn.cfg.basic_blocks
+        print('type(blocks): %r' % type(blocks))
+        print('len(blocks): %i' % len(blocks))
+        print('bool(blocks): %r' % bool(blocks))
+        print('blocks[0] == fn.cfg.entry: %r' % (blocks[0] == fn.cfg.entry))
+        print('blocks[1] == fn.cfg.exit: %r' % (blocks[1] == fn.cfg.exit))
+        print('blocks[-1] is blocks[len(blocks) - 1]: %r'
+              % (blocks[-1] is blocks[len(blocks) - 1]))
+        print('blocks[1:3]: %r' % blocks[1:3])
+        print('blocks == list(blocks): %r' % (blocks == list(blocks)))
+        print('blocks == fn.cfg.basic_blocks: %r'
+              % (blocks == fn.cfg.basic_blocks))
+        print('blocks != []: %r' % (blocks != []))
+        print('repr(blocks) == repr(list(blocks)): %r'
+              % (repr(blocks) == repr(list(blocks))))
+        print('[bb.index for bb in reversed(blocks)]: %r'
+              % [bb.index for bb in reversed(blocks)])
+
+        entry = fn.cfg.entry
+        print('entry.preds: %r' % entry.preds)
+        print('bool(entry.preds): %r' % bool(entry.preds))
+        print('[e.dest.index for e in entry.succs]: %r'
+              % [e.dest.index for e in entry.succs])
+        print('entry.gimple + entry.succs == list(entry.succs): %r'
+              % (entry.gimple + entry.succs == list(entry.succs)))
+        print('type([] + entry.succs): %r' % type([] + entry.succs))
+
+        for bb in blocks:
+            if bb.gimple:
+                for stmt in bb.gimple:
+                    print('first stmt: %r' % stmt)
+                    break
+                break
+
+        try:
+            blocks[len(blocks)]
+        except IndexError as e:
+            print('IndexError: %s' % e)
+
+        it = iter(entry.succs)
+        print('type(it): %r' % type(it))
+        print('len(list(it)): %i' % len(list(it)))
+        print('len(list(it)): %i' % len(list(it)))
+
+        print('type(gcc.get_variables()): %r' % type(gcc.get_variables()))
+
+gcc.register_callback(gcc.PLUGIN_PASS_EXECUTION,
+                      on_pass_execution)